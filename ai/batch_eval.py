@@ -0,0 +1,74 @@
+from __future__ import annotations
+from importlib.util import find_spec
+from game.state import GameState, Player
+from game.constants import PIECES_PER_PLAYER, HAPPINESS, WATER
+from .eval import EvalWeights, DEFAULT_WEIGHTS
+
+# numpy is optional and only imported by the functions below, so that
+# importing the search does not pay for loading it.
+HAVE_NUMPY = find_spec("numpy") is not None
+
+# Row layout of a position batch: black positions, white positions, then
+# optional extra columns (turn, pending, ...) that the evaluation ignores.
+BLACK_COLS = slice(0, PIECES_PER_PLAYER)
+WHITE_COLS = slice(PIECES_PER_PLAYER, 2 * PIECES_PER_PLAYER)
+
+
+def _require_numpy():
+    if not HAVE_NUMPY:
+        raise ImportError("batch evaluation needs numpy")
+    import numpy
+    return numpy
+
+
+def positions_array(states: list[GameState]):
+    """(N, 14) array of black then white positions for a list of states."""
+    np = _require_numpy()
+    return np.array([s.black + s.white for s in states], dtype=np.int64).reshape(-1, 2 * PIECES_PER_PLAYER)
+
+
+def evaluate_batch(positions, ai_player: Player, weights: EvalWeights = DEFAULT_WEIGHTS):
+    """
+    ai.eval.evaluate() for every row of an (N, >=14) int array at once,
+    returned as a float64 array. Same terms, same values.
+    """
+    np = _require_numpy()
+    w = weights
+    positions = np.asarray(positions)
+    black = positions[:, BLACK_COLS]
+    white = positions[:, WHITE_COLS]
+    mine, theirs = (black, white) if ai_player == Player.BLACK else (white, black)
+
+    on_board = mine != 0
+    n = on_board.sum(axis=1)
+    my_out = PIECES_PER_PLAYER - n
+    op_out = PIECES_PER_PLAYER - (theirs != 0).sum(axis=1)
+
+    # Sorted, OUT (0) sorts first, so the on-board pieces are the last n
+    # columns. Vanguard as in evaluate(): everything at or above the third
+    # highest on-board position (or the lowest, with fewer than three).
+    ordered = np.sort(mine, axis=1)
+    floor_col = np.minimum(PIECES_PER_PLAYER - np.minimum(n, 3), PIECES_PER_PLAYER - 1)
+    floor = np.take_along_axis(ordered, floor_col[:, None], axis=1)
+    vanguard = on_board & (mine >= floor)
+    van_sum = np.where(vanguard, mine, 0).sum(axis=1)
+    van_home = (vanguard & (mine >= HAPPINESS)).sum(axis=1)
+    progress = mine.sum(axis=1)
+    water = (mine == WATER).sum(axis=1)
+
+    low, high = ordered[:, :-1], ordered[:, 1:]
+    pair = (low > 0) & (high == low + 1)
+    bridges = (pair & (low < 22)).sum(axis=1)
+    late_bridges = (pair & (low >= 22)).sum(axis=1)
+
+    danger = np.where((theirs >= 24) & (theirs <= 26), theirs, 0).sum(axis=1)
+    op_progress = theirs.sum(axis=1)
+
+    return (my_out * w.win
+            - op_out * w.win * w.opponent_out_factor
+            + van_sum * w.vanguard + van_home * w.vanguard_home_bonus
+            + (progress - van_sum) * w.rear
+            + water * w.water
+            + bridges * w.bridge + late_bridges * w.late_bridge
+            + danger * w.danger
+            + op_progress * w.opponent_progress).astype(np.float64)
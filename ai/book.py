@@ -0,0 +1,184 @@
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import struct
+import sys
+import time
+from dataclasses import asdict
+
+from game.state import GameState, Player
+from game.move import Move
+from game.rules import initial_state, legal_moves, apply_move, skip_turn, is_terminal, generate_children
+from game.constants import ROLL_PROBS
+from game.zobrist import position_hash
+from game.canonical import square_move, move_from_square, NO_MOVE
+from .tt import decision_key
+from .eval import EvalWeights, DEFAULT_WEIGHTS
+
+# File layout: header, the EvalWeights the book was searched with as UTF-8
+# JSON, then one fixed-size record per book position:
+#   key (u64, decision_key of the position and roll), move (u8), value (f64)
+# Keys come from position_hash() and moves are game.canonical.square_move()
+# codes, so one entry serves every numbering of the pieces.
+_MAGIC = b"SNOB"
+_VERSION = 5
+_HEADER = struct.Struct("<4sHHHIH")  # magic, version, plies, depth, count, weights length
+_RECORD = struct.Struct("<QBd")
+_KEY_MASK = (1 << 64) - 1
+
+DEFAULT_PATH = "senet_book.bin"
+DEFAULT_PLIES = 3
+DEFAULT_DEPTH = 4
+
+
+def book_key(state: GameState, roll: int) -> int:
+    return decision_key(position_hash(state), roll, state.turn) & _KEY_MASK
+
+
+def _decide(task):
+    # Imported here: the search module imports this one for its book hook.
+    from .expectiminimax import choose_best_move_given_roll
+    state, roll, depth, pruning, weights = task
+    mv, val, _ = choose_best_move_given_roll(state, state.turn, depth, roll, pruning=pruning, weights=weights)
+    return mv, val
+
+
+def build(plies: int = DEFAULT_PLIES, depth: int = DEFAULT_DEPTH, pruning: str = "star2", workers: int | None = None,
+          log_to=None, weights: EvalWeights = DEFAULT_WEIGHTS) -> dict[int, tuple[int, float]]:
+    """
+    Search every decision of the first `plies` plies to `depth`. Once for
+    each colour as the book side: its positions are expanded along the book
+    move, the other side's along every legal move, for every roll. Entries
+    map book_key() to (square_move() code, value).
+    """
+    entries: dict[int, tuple[int, float]] = {}
+    pool = multiprocessing.Pool(workers) if workers != 1 else None
+    try:
+        for book_side in (Player.BLACK, Player.WHITE):
+            start = initial_state()
+            frontier = {position_hash(start): start}
+            for ply in range(plies):
+                nxt: dict[int, GameState] = {}
+                todo = []
+                for state in frontier.values():
+                    if is_terminal(state):
+                        continue
+                    for roll in ROLL_PROBS:
+                        if state.turn == book_side:
+                            todo.append((state, roll))
+                            continue
+                        children = [c for _, c in generate_children(state, roll)] or [skip_turn(state, roll)]
+                        for child in children:
+                            nxt[position_hash(child)] = child
+                fresh = [(s, r) for s, r in todo if book_key(s, r) not in entries]
+                tasks = [(s, r, depth, pruning, weights) for s, r in fresh]
+                t0 = time.perf_counter()
+                results = pool.map(_decide, tasks) if pool is not None else [_decide(t) for t in tasks]
+                for (s, r), (mv, val) in zip(fresh, results):
+                    entries[book_key(s, r)] = (square_move(s, mv), val)
+                for s, r in todo:
+                    mv = move_from_square(s, entries[book_key(s, r)][0])
+                    child = apply_move(s, r, mv, validate=False) if mv is not None else skip_turn(s, r)
+                    nxt[position_hash(child)] = child
+                if log_to:
+                    print(f"{book_side.value} ply {ply + 1}: {len(fresh)} searches in {time.perf_counter() - t0:.1f}s,"
+                          f" {len(entries)} entries", file=log_to)
+                frontier = nxt
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return entries
+
+
+def write(path: str, entries: dict[int, tuple[int, float]], plies: int, depth: int,
+          weights: EvalWeights = DEFAULT_WEIGHTS) -> None:
+    meta = json.dumps(asdict(weights), sort_keys=True).encode()
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, plies, depth, len(entries), len(meta)))
+        f.write(meta)
+        for key in sorted(entries):
+            mv, val = entries[key]
+            f.write(_RECORD.pack(key, mv, val))
+
+
+class OpeningBook:
+    """
+    A book file from write(), read into a dict on the first probe. probe()
+    gives the book move and its search value for a position and roll, or
+    None when the position is not in the book. The values and moves are
+    those of the search with `weights`; the search ignores the book when it
+    runs with other weights.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.plies = 0
+        self.depth = 0
+        self._weights: EvalWeights | None = None
+        self._entries: dict[int, tuple[int, float]] | None = None
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        magic, version, self.plies, self.depth, count, meta_len = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{self.path}: not an opening book for this version")
+        start = _HEADER.size + meta_len
+        self._weights = EvalWeights(**json.loads(data[_HEADER.size:start]))
+        self._entries = {key: (mv, val) for key, mv, val in _RECORD.iter_unpack(data[start:])}
+        if len(self._entries) != count:
+            raise ValueError(f"{self.path}: truncated opening book")
+
+    def __len__(self) -> int:
+        if self._entries is None:
+            self._load()
+        return len(self._entries)
+
+    @property
+    def weights(self) -> EvalWeights:
+        if self._entries is None:
+            self._load()
+        return self._weights
+
+    def probe(self, state: GameState, roll: int) -> tuple[Move | None, float] | None:
+        if self._entries is None:
+            self._load()
+        hit = self._entries.get(book_key(state, roll))
+        if hit is None:
+            return None
+        mv = move_from_square(state, hit[0])
+        if hit[0] != NO_MOVE and (mv is None or mv not in legal_moves(state, roll)):
+            return None  # key collision
+        return mv, hit[1]
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="python -m ai.book", description="Build the opening book")
+    parser.add_argument("-o", "--out", default=DEFAULT_PATH)
+    parser.add_argument("--plies", type=int, default=DEFAULT_PLIES)
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH)
+    parser.add_argument("--pruning", default="star2")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--weights", default=None, help="JSON file of EvalWeights overrides")
+    return parser
+
+
+def run(args) -> int:
+    weights = DEFAULT_WEIGHTS
+    if args.weights:
+        with open(args.weights) as f:
+            weights = EvalWeights(**json.load(f))
+    entries = build(args.plies, args.depth, args.pruning, args.workers, log_to=sys.stderr, weights=weights)
+    write(args.out, entries, args.plies, args.depth, weights)
+    print(f"wrote {len(entries)} positions to {args.out}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
 from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
 from game.state import GameState, Player, OUT
 from game.constants import HAPPINESS, WATER, HORUS, THREE_TRUTHS, RE_ATOUM, REBIRTH
-from game.rules import _occupied_map
 
 W_WIN = 20000000.0        
 W_KILL = 50000.0           
@@ -11,7 +12,23 @@ W_BRIDGE = 1500.0
 W_SAFETY = 2000.0          
 W_DANGER_OP = -10000.0     
 
-def evaluate(state: GameState, ai_player: Player) -> float:
+@dataclass(frozen=True)
+class EvalWeights:
+    win: float = W_WIN
+    opponent_out_factor: float = 1.5
+    vanguard: float = W_VANGUARD
+    vanguard_home_bonus: float = 50000.0
+    rear: float = 10.0
+    water: float = -5000000.0
+    bridge: float = W_BRIDGE
+    late_bridge: float = -1000.0
+    danger: float = -5000.0
+    opponent_progress: float = -200.0
+
+DEFAULT_WEIGHTS = EvalWeights()
+
+def evaluate(state: GameState, ai_player: Player, weights: EvalWeights = DEFAULT_WEIGHTS) -> float:
+    w = weights
     my_pieces = sorted([p for p in state.pieces_of(ai_player) if p != OUT])
     opponent = Player.WHITE if ai_player == Player.BLACK else Player.BLACK
     op_pieces = sorted([p for p in state.pieces_of(opponent) if p != OUT])
@@ -19,33 +36,73 @@ def evaluate(state: GameState, ai_player: Player) -> float:
     score = 0.0
     my_out_count = 7 - len(my_pieces)
     op_out_count = 7 - len(op_pieces)
-    score += (my_out_count * W_WIN)
-    score -= (op_out_count * W_WIN * 1.5) 
+    score += (my_out_count * w.win)
+    score -= (op_out_count * w.win * w.opponent_out_factor) 
     vanguard_count = min(3, len(my_pieces))
     vanguard_pieces = my_pieces[-vanguard_count:] if vanguard_count > 0 else []
 
     for p in my_pieces:
-        if p == 27: score -= 5000000.0 
+        if p == 27: score += w.water 
         
         if p in vanguard_pieces:
-            score += (p * W_VANGUARD) 
-            if p >= 26: score += 50000.0
+            score += (p * w.vanguard) 
+            if p >= 26: score += w.vanguard_home_bonus
         else:
-            score += (p * 10.0)
+            score += (p * w.rear)
 
-    op_threat_level = 0
     for op in op_pieces:
         if op >= 24 and op <= 26:
-            op_threat_level += op
-            score -= (op * 5000.0) 
+            score += (op * w.danger) 
 
     for i in range(len(my_pieces) - 1):
         if my_pieces[i] + 1 == my_pieces[i+1]:
             if my_pieces[i] < 22:
-                score += W_BRIDGE
+                score += w.bridge
             else:
-                score -= 1000.0 
+                score += w.late_bridge 
     op_total_progress = sum(p for p in op_pieces)
-    score -= (op_total_progress * 200.0)
+    score += (op_total_progress * w.opponent_progress)
+
+    return score
+
+
+def _range(coef: float, lo: float, hi: float) -> tuple[float, float]:
+    return min(coef * lo, coef * hi), max(coef * lo, coef * hi)
+
+@lru_cache(maxsize=32)
+def _rest_bounds(w: EvalWeights) -> tuple[float, float]:
+    # Everything except the out counts, each term taken over its full range
+    # (7 pieces, squares up to 30, at most 6 adjacent pairs). Cached, as the
+    # search asks at every windowed chance node.
+    terms = [
+        _range(w.vanguard, 0, 7 * 30), _range(w.vanguard_home_bonus, 0, 7),
+        _range(w.rear, 0, 7 * 30), _range(w.water, 0, 7),
+        _range(w.bridge, 0, 6), _range(w.late_bridge, 0, 6),
+        _range(w.danger, 0, 7 * 26), _range(w.opponent_progress, 0, 7 * 30),
+    ]
+    return sum(t[0] for t in terms), sum(t[1] for t in terms)
+
+def eval_bounds(state: GameState | None = None, ai_player: Player | None = None, plies: int = 0,
+                weights: EvalWeights = DEFAULT_WEIGHTS) -> tuple[float, float]:
+    """
+    (lower, upper) bound on evaluate() for every position reachable from
+    `state` within `plies` moves, or for any position when state is None.
+    Pieces never come back once out, so only the side's remaining moves can
+    change the out counts.
+    """
+    w = weights
+    if state is None:
+        my_lo, my_hi, op_lo, op_hi = 0, 7, 0, 7
+    else:
+        opponent = Player.WHITE if ai_player == Player.BLACK else Player.BLACK
+        my_lo = sum(1 for p in state.pieces_of(ai_player) if p == OUT)
+        op_lo = sum(1 for p in state.pieces_of(opponent) if p == OUT)
+        first, second = (plies + 1) // 2, plies // 2
+        my_moves, op_moves = (first, second) if state.turn == ai_player else (second, first)
+        my_hi = min(7, my_lo + my_moves)
+        op_hi = min(7, op_lo + op_moves)
 
-    return score
\ No newline at end of file
+    mine = _range(w.win, my_lo, my_hi)
+    theirs = _range(-w.win * w.opponent_out_factor, op_lo, op_hi)
+    rest_lo, rest_hi = _rest_bounds(w)
+    return mine[0] + theirs[0] + rest_lo, mine[1] + theirs[1] + rest_hi
@@ -1,14 +1,26 @@
 
 from __future__ import annotations
+import time
 from dataclasses import dataclass, field
-from math import inf
-from typing import Optional, Tuple
+from math import inf, nan, nextafter
+from typing import Callable, Optional, Tuple
 from game.state import GameState, Player, OUT
-from game.rules import legal_moves, apply_move, skip_turn, is_terminal
+from game.rules import legal_moves
+from game.board import SearchBoard
 from game.dice import roll_distribution
 from game.move import Move, MoveKind
+from game.canonical import square_move, move_from_square
 from game.constants import HAPPINESS, THREE_TRUTHS, RE_ATOUM, HORUS
-from .eval import evaluate
+from .eval import evaluate, eval_bounds, EvalWeights, DEFAULT_WEIGHTS
+from .incremental import IncrementalEval
+from .tt import TranspositionTable, ChanceCache, EXACT, LOWER, UPPER, decision_key
+from .tablebase import Tablebase
+from .ordering import SearchContext, static_priority
+from .book import OpeningBook
+from .batch_eval import evaluate_batch, HAVE_NUMPY
+from . import trace as tr
+from . import profiling
+from .trace import TraceSink, ArrayTrace, move_code
 
 @dataclass
 class SearchStats:
@@ -16,6 +28,45 @@ class SearchStats:
     leafs: int = 0
     chosen_eval_value: float = 0.0
     tree_info: list[str] = field(default_factory=list) 
+    tt_hits: int = 0
+    tt_misses: int = 0
+    tb_hits: int = 0
+    book_hits: int = 0
+    depth_reached: int = 0
+    cutoffs: int = 0             # beta cutoffs after a roll
+    first_move_cutoffs: int = 0  # of those, on the first move searched
+    chance_hits: int = 0
+    chance_misses: int = 0
+    trace: TraceSink | None = None  # the expectiminimax search tree, when traced
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def chance_hit_rate(self) -> float:
+        probes = self.chance_hits + self.chance_misses
+        return self.chance_hits / probes if probes else 0.0
+
+class SearchAborted(Exception):
+    """Raised out of a search that was stopped early; carries its partial stats."""
+
+    def __init__(self, stats: SearchStats):
+        super().__init__()
+        self.stats = stats
+
+    def __reduce__(self):
+        # Picklable, so it can come back from a worker process.
+        return type(self), (self.stats,)
+
+class SearchTimeout(SearchAborted):
+    pass
+
+class SearchCancelled(SearchAborted):
+    pass
+
+# How often (in nodes) the search looks at the clock and the stop/progress hooks.
+_CLOCK_CHECK_MASK = 0xFF
 
 def filter_suicide_moves(state: GameState, moves: list[Move], roll: int) -> list[Move]:
 
@@ -38,109 +89,248 @@ def filter_suicide_moves(state: GameState, moves: list[Move], roll: int) -> list
     return suicide_moves
 
 def _order_moves(moves: list[Move], state: GameState, roll: int, ai_player: Player) -> list[Move]:
+    # Sorts `moves` in place; callers pass a list of their own.
     opp = Player.WHITE if state.turn == Player.BLACK else Player.BLACK
     op_pieces = state.pieces_of(opp)
     my_pieces = state.pieces_of(state.turn)
 
     def move_priority(mv):
         piece_pos = my_pieces[mv.piece_id]
-        target_pos = piece_pos + roll
-        if piece_pos == 27: 
-            return 100_000_000 
-        if mv.kind == MoveKind.PROMOTE:
-            return 50_000_000 
-        if target_pos in op_pieces:
-            return 1_000_000 + (target_pos * 10_000)
-        if target_pos == 26: 
-            return 500_000
-        if piece_pos > 20:
-            return piece_pos * 1000 
-        return target_pos 
-    return sorted(moves, key=move_priority, reverse=True)
-
-def choose_best_move_given_roll(state: GameState, ai_player: Player, depth: int, roll: int, print_tree: bool = False) -> tuple[object, float, SearchStats]:
-    stats = SearchStats()
+        return static_priority(piece_pos, mv.kind, roll, piece_pos + roll in op_pieces)
+    moves.sort(key=move_priority, reverse=True)
+    return moves
+
+PRUNING_MODES = ("none", "star1", "star2")
+
+def _make_search(state: GameState, ai_player: Player, stats: SearchStats, tt: TranspositionTable | None,
+                 pruning: str, weights: EvalWeights, trace: TraceSink | None, deadline: float | None,
+                 should_stop: Callable[[], bool] | None, on_progress: Callable[[SearchStats], None] | None,
+                 incremental: bool, tablebase: Tablebase | None, batch_leaves: bool = False,
+                 context: SearchContext | None = None, chance_cache: ChanceCache | None = None):
+    # Builds the search closures over one SearchBoard set up at `state`.
+    # Returns (board, value_turn, value_after_roll, child_value).
+    if pruning not in PRUNING_MODES:
+        raise ValueError(f"Unknown pruning mode: {pruning}")
+    checkpoints = deadline is not None or should_stop is not None or on_progress is not None
     dist = roll_distribution()
+    inc = IncrementalEval(state, weights) if incremental else None
+    board = SearchBoard(state, inc)
+    if batch_leaves and not HAVE_NUMPY:
+        raise ImportError("batch_leaves needs numpy")
+    # Leaf values of the current depth-1 chance node, by position hash. The
+    # tablebase scores leaves itself, so it turns batching off.
+    batch_leaves = batch_leaves and tablebase is None
+    leaf_values: dict[int, float] = {}
     
-    def log_node(node_type: str, depth: int, roll: int | None, value: float, alpha: float | None = None, beta: float | None = None, move: Move | None = None, is_leaf: bool = False):
-        if not print_tree:
-            return
-        indent = "  " * (depth)
-        node_info = f"{indent}[{node_type}] Depth={depth}"
-        if roll is not None:
-            node_info += f", Roll={roll}"
-        if move is not None:
-            move_str = f"piece#{move.piece_id} {move.kind.value}"
-            node_info += f", Move={move_str}"
-        if alpha is not None:
-            node_info += f", Alpha={alpha:.2f}"
-        if beta is not None:
-            node_info += f", Beta={beta:.2f}"
-        node_info += f", Value={value:.2f}"
-        if is_leaf:
-            node_info += " [LEAF]"
-        stats.tree_info.append(node_info)
-    
-    def value_turn(s: GameState, d: int, current_roll: int | None = None) -> float:
+    # Records go straight to the sink; with no sink, every call site is
+    # skipped by its `emit is not None` test.
+    emit = trace.record if trace is not None else None
+    # Same for the profiler: with one active, the board's methods and the
+    # leaf evaluation are swapped for timed wrappers on this board only.
+    prof = profiling.active()
+    leaf_eval = evaluate
+    if prof is not None:
+        for name in ("legal_moves", "make", "unmake", "_rebirth_target"):
+            setattr(board, name, prof.timed(name, getattr(board, name)))
+        leaf_eval = prof.timed("evaluate", evaluate)
+        if inc is not None:
+            inc.value = prof.timed("evaluate", inc.value)
+
+    def value_turn(d: int, current_roll: int | None, alpha: float = -inf, beta: float = inf) -> float:
         stats.nodes += 1
-        if d == 0 or is_terminal(s):
+        if prof is not None:
+            prof.node(d)
+        if checkpoints and not stats.nodes & _CLOCK_CHECK_MASK:
+            if deadline is not None and time.perf_counter() > deadline:
+                raise SearchTimeout(stats)
+            if should_stop is not None and should_stop():
+                raise SearchCancelled(stats)
+            if on_progress is not None:
+                on_progress(stats)
+        if tablebase is not None and not board.is_terminal():
+            tb_val = tablebase.value(board, ai_player, weights)
+            if tb_val is not None:
+                stats.leafs += 1
+                stats.tb_hits += 1
+                if emit is not None:
+                    emit(tr.TABLEBASE, d, current_roll or 0, -1, nan, nan, tb_val)
+                return tb_val
+        if d == 0 or board.is_terminal():
             stats.leafs += 1
-            eval_val = evaluate(s, ai_player)
-            node_type = "EXPECTATION" if current_roll is None else "EVAL"
-            log_node(node_type, d, current_roll, eval_val, is_leaf=True)
+            eval_val = leaf_values.get(board.hash) if batch_leaves else None
+            if eval_val is None:
+                eval_val = inc.value(ai_player, board) if inc is not None else leaf_eval(board, ai_player, weights)
+            if emit is not None:
+                emit(tr.EVAL, d, current_roll or 0, -1, nan, nan, eval_val)
             return eval_val
+
+        if chance_cache is not None:
+            ckey = chance_cache.key(board.hash, d, ai_player)
+            cached = chance_cache.get(ckey)
+            if cached is not None:
+                stats.chance_hits += 1
+                if emit is not None:
+                    emit(tr.EXPECTATION, d, current_roll or 0, -1, alpha, beta, cached)
+                return cached
+            stats.chance_misses += 1
+
+        if emit is not None:
+            emit(tr.EXPECTATION, d, current_roll or 0, -1, alpha, beta, 0.0)
+        if batch_leaves and d == 1:
+            batch_children()
         
-        node_type = "EXPECTATION"
-        log_node(node_type, d, current_roll, 0.0)
-        
+        windowed = pruning != "none" and (alpha != -inf or beta != inf)
+        if windowed:
+            lo, hi = eval_bounds(board, ai_player, d, weights)
+            if pruning == "star2":
+                cut = probe_chance(d, alpha, beta, lo, hi)
+                if cut is not None:
+                    if prof is not None:
+                        prof.cutoff(profiling.STAR2, d)
+                    if emit is not None:
+                        emit(tr.EXPECTATION, d, current_roll or 0, -1, alpha, beta, cut)
+                    return cut
+
         exp_val = 0.0
-        roll_values = []
+        remaining = 1.0
+        # The profile only sees the rolls of nodes that finish uncut.
+        rolled = [] if prof is not None else None
         for r, p in dist.items():
-            v, _ = value_after_roll(s, d, r, -inf, inf)
+            if windowed:
+                # Star1: the window this roll must hit for the expectation to
+                # stay inside (alpha, beta), assuming the unsearched rolls take
+                # the extreme eval bound. Nudged outwards against rounding.
+                remaining -= p
+                a = nextafter((alpha - exp_val - hi * remaining) / p, -inf)
+                b = nextafter((beta - exp_val - lo * remaining) / p, inf)
+                v, _ = value_after_roll(d, r, a, b)
+                if v <= a or v >= b:
+                    cut = alpha if v <= a else beta
+                    if prof is not None:
+                        prof.cutoff(profiling.STAR1, d)
+                    if emit is not None:
+                        emit(tr.CHANCE_CUTOFF, d, r, -1, nan, nan, cut)
+                        emit(tr.EXPECTATION, d, current_roll or 0, -1, alpha, beta, cut)
+                    return cut
+            else:
+                v, _ = value_after_roll(d, r, -inf, inf)
             exp_val += p * v
-            roll_values.append((r, p, v))
-        
-        if print_tree:
-            indent = "  " * (d)
-            for r, p, v in roll_values:
-                stats.tree_info.append(f"{indent}  Roll={r}, Prob={p:.3f}, Value={v:.2f}, Weighted={p*v:.2f}")
-            stats.tree_info.append(f"{indent}Expected Value={exp_val:.2f}")
-        
-        log_node(node_type, d, current_roll, exp_val)
+            if rolled is not None:
+                rolled.append((r, p * v))
+            if emit is not None:
+                emit(tr.ROLL, d, r, -1, nan, nan, v)
+
+        if emit is not None:
+            emit(tr.EXPECTATION, d, current_roll or 0, -1, alpha, beta, exp_val)
+        if rolled is not None:
+            for r, weighted in rolled:
+                prof.roll_value(d, r, weighted)
+        if chance_cache is not None:
+            # Every roll came back inside its window, so this is exact.
+            chance_cache.put(ckey, exp_val)
         return exp_val
+
+    def batch_children():
+        # Every position one move away, for every roll, scored in one
+        # evaluate_batch() call. The search below then visits the same
+        # leaves it always would and just looks their values up.
+        rows = []
+        keys = []
+        for r in dist:
+            for mv in board.legal_moves(r) or [None]:
+                token = board.make(mv, r)
+                rows.append(board.black + board.white)
+                keys.append(board.hash)
+                board.unmake(token)
+        leaf_values.clear()
+        leaf_values.update(zip(keys, evaluate_batch(rows, ai_player, weights).tolist()))
+
+    def child_value(mv: Move | None, d: int, r: int, alpha: float, beta: float) -> float:
+        token = board.make(mv, r)
+        v = value_turn(d, r, alpha, beta)
+        board.unmake(token)
+        return v
+
+    def probe_chance(d: int, alpha: float, beta: float, lo: float, hi: float) -> float | None:
+        # Star2 probing: the first move after a roll bounds that roll's value
+        # from our side (a lower bound for MAX, an upper bound for MIN). If the
+        # bounds alone already push the expectation out of the window, cut.
+        maximizing = board.turn == ai_player
+        if (maximizing and beta == inf) or (not maximizing and alpha == -inf):
+            return None
+        acc = 0.0
+        remaining = 1.0
+        for r, p in dist.items():
+            remaining -= p
+            tt_move = None
+            if tt is not None:
+                entry = tt.probe(decision_key(board.hash, r, ai_player))
+                tt_move = move_from_square(board, entry.move) if entry is not None else None
+            moves = ordered_moves(d, r, tt_move)
+            first = moves[0] if moves else None
+            if maximizing:
+                b = nextafter((beta - acc - lo * remaining) / p, inf)
+                v = child_value(first, d - 1, r, -inf, b)
+                if v >= b:
+                    return beta
+            else:
+                a = nextafter((alpha - acc - hi * remaining) / p, -inf)
+                v = child_value(first, d - 1, r, a, inf)
+                if v <= a:
+                    return alpha
+            acc += p * v
+        return None
+
+    def ordered_moves(d: int, r: int, tt_move: Move | None) -> list[Move]:
+        raw_moves = board.legal_moves(r)
+        moves = filter_suicide_moves(board, raw_moves, r) if board.turn == ai_player else raw_moves
+        if context is not None:
+            return context.order(board, moves, d, r, tt_move) if len(moves) > 1 else moves
+        if moves:
+            moves = _order_moves(moves, board, r, ai_player)
+        if tt_move is not None and tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        return moves
     
-    def value_after_roll(s: GameState, d: int, r: int, alpha: float, beta: float) -> Tuple[float, Optional[Move]]:
-        raw_moves = legal_moves(s, r)
-        moves = filter_suicide_moves(s, raw_moves, r) if s.turn == ai_player else raw_moves
+    def value_after_roll(d: int, r: int, alpha: float, beta: float) -> Tuple[float, Optional[Move]]:
+        tt_move = None
+        if tt is not None:
+            key = decision_key(board.hash, r, ai_player)
+            entry = tt.probe(key)
+            if entry is not None:
+                tt_move = move_from_square(board, entry.move)
+                if entry.depth == d and (entry.bound == EXACT or
+                                         (entry.bound == LOWER and entry.value >= beta) or
+                                         (entry.bound == UPPER and entry.value <= alpha)):
+                    stats.tt_hits += 1
+                    if prof is not None:
+                        prof.cutoff(profiling.TT, d)
+                    return entry.value, tt_move
+            stats.tt_misses += 1
+
+        moves = ordered_moves(d, r, tt_move)
 
         if not moves:
-            skip_val = value_turn(skip_turn(s, r), d - 1, r)
-            node_type = "MAX" if s.turn == ai_player else "MIN"
-            log_node(node_type, d, r, skip_val, alpha, beta, None)
+            maximizing = board.turn == ai_player
+            skip_val = child_value(None, d - 1, r, alpha, beta)
+            if emit is not None:
+                emit(tr.MAX if maximizing else tr.MIN, d, r, -1, alpha, beta, skip_val)
             return skip_val, None
 
-        maximizing = (s.turn == ai_player)
-        node_type = "MAX" if maximizing else "MIN"
+        maximizing = (board.turn == ai_player)
         best_val = -inf if maximizing else inf
         best_move = None
-        if d >= 1: 
-            moves = _order_moves(moves, s, r, ai_player)
-
-        if print_tree:
-            indent = "  " * (d)
-            stats.tree_info.append(f"{indent}[{node_type}] Depth={d}, Roll={r}, Moves={len(moves)}, Alpha={alpha:.2f}, Beta={beta:.2f}")
-
-        move_values = []
-        for mv in moves:
-            s2 = apply_move(s, r, mv)
-            val = value_turn(s2, d - 1, r)
-            move_values.append((mv, val))
-            
-            if print_tree:
-                indent = "  " * (d)
-                move_str = f"piece#{mv.piece_id} {mv.kind.value}"
-                stats.tree_info.append(f"{indent}  Move={move_str}, Value={val:.2f}")
-            
+        alpha_orig, beta_orig = alpha, beta
+
+        if emit is not None:
+            emit(tr.DECISION, d, r, -1, alpha, beta, len(moves))
+
+        for i, mv in enumerate(moves):
+            val = child_value(mv, d - 1, r, alpha, beta)
+            if emit is not None:
+                emit(tr.MOVE, d, r, move_code(mv), nan, nan, val)
+
             if maximizing:
                 if val > best_val:
                     best_val = val
@@ -152,44 +342,127 @@ def choose_best_move_given_roll(state: GameState, ai_player: Player, depth: int,
                     best_move = mv
                 beta = min(beta, best_val)
             if beta <= alpha:
-                if print_tree:
-                    indent = "  " * (d)
-                    stats.tree_info.append(f"{indent}  [PRUNED] Alpha={alpha:.2f}, Beta={beta:.2f}")
+                stats.cutoffs += 1
+                if not i:
+                    stats.first_move_cutoffs += 1
+                if context is not None:
+                    context.cutoff(board, mv, d, r)
+                if prof is not None:
+                    prof.cutoff(profiling.ALPHA_BETA, d)
+                if emit is not None:
+                    emit(tr.PRUNED, d, r, -1, alpha, beta, best_val)
                 break 
 
-        log_node(node_type, d, r, best_val, alpha, beta, best_move)
+        if emit is not None:
+            emit(tr.MAX if maximizing else tr.MIN, d, r, move_code(best_move), alpha, beta, best_val)
+        if tt is not None:
+            if best_val <= alpha_orig:
+                bound = UPPER
+            elif best_val >= beta_orig:
+                bound = LOWER
+            else:
+                bound = EXACT
+            tt.store(key, d, best_val, bound, square_move(board, best_move))
         return best_val, best_move
-    
+
+    return board, value_turn, value_after_roll, child_value
+
+def _root_moves(state: GameState, ai_player: Player, roll: int, first_move: Move | None = None) -> list[Move]:
     raw_moves = legal_moves(state, roll)
     moves = filter_suicide_moves(state, raw_moves, roll) if state.turn == ai_player else raw_moves
+    if not moves:
+        return moves
+    moves = _order_moves(moves, state, roll, ai_player)
+    if first_move is not None and first_move in moves:
+        moves.remove(first_move)
+        moves.insert(0, first_move)
+    return moves
 
-    if print_tree:
-        stats.tree_info.append(f"=== ROOT: Depth={depth}, Roll={roll}, Turn={state.turn} ===")
+def choose_best_move_given_roll(state: GameState, ai_player: Player, depth: int, roll: int, print_tree: bool = False,
+                                tt: TranspositionTable | None = None, pruning: str = "star2",
+                                deadline: float | None = None, first_move: Move | None = None,
+                                weights: EvalWeights = DEFAULT_WEIGHTS,
+                                should_stop: Callable[[], bool] | None = None,
+                                on_progress: Callable[[SearchStats], None] | None = None,
+                                incremental: bool = True,
+                                tablebase: Tablebase | None = None,
+                                book: OpeningBook | None = None,
+                                batch_leaves: bool = False,
+                                trace: TraceSink | None = None,
+                                context: SearchContext | None = None,
+                                chance_cache: ChanceCache | None = None) -> tuple[object, float, SearchStats]:
+    """
+    Pass the same `tt` on consecutive turns to reuse earlier results. Stored
+    values are only reused at the same remaining depth, so the answer is the
+    same as an uncached search of `depth`.
+
+    pruning="star1" passes the alpha-beta window through chance nodes using
+    the eval_bounds() of the position (Ballard's Star1); "star2" also probes
+    the first move after every roll to cut chance nodes before searching
+    them fully. Both return the same move and value as "none".
+
+    `deadline` is a time.perf_counter() value; past it the search raises
+    SearchTimeout. When `should_stop()` returns True it raises
+    SearchCancelled. Both hooks and `on_progress(stats)` run every 256 nodes.
+    `first_move` is searched first at the root.
+
+    The tree is walked with make/unmake on one SearchBoard. With
+    `incremental` the board keeps an IncrementalEval up to date and the
+    leaves are scored from it instead of a full evaluate(); the values are
+    the same. With a `tablebase`, bear-off positions it covers are scored
+    from it and not searched further. A position in the opening `book` is
+    answered from the book without searching, unless the book was built
+    with other weights. `batch_leaves` (needs numpy)
+    scores the leaves under each depth-1 chance node with one
+    evaluate_batch() call instead of one by one; the values are the same.
+
+    Every node of the search goes to `trace` as an ai.trace record;
+    print_tree=True traces into a fresh ArrayTrace. Either way the sink ends
+    up in stats.trace.
+
+    With a `context` (an ai.ordering.SearchContext, kept between searches
+    like `tt`) moves after a roll are ordered by the table move, killers and
+    history instead of the static priority. The answer is the same.
+
+    Fully searched chance nodes go to `chance_cache` and are answered from
+    it when reached again at the same remaining depth; the values are exact,
+    so this also leaves the answer unchanged.
+    """
+    if book is not None and state.turn == ai_player and book.weights == weights:
+        hit = book.probe(state, roll)
+        if hit is not None:
+            mv, val = hit
+            return mv, val, SearchStats(chosen_eval_value=val, depth_reached=book.depth, book_hits=1)
+    if print_tree and trace is None:
+        trace = ArrayTrace()
+    stats = SearchStats(depth_reached=depth, trace=trace)
+    _, _, _, child_value = _make_search(
+        state, ai_player, stats, tt, pruning, weights, trace, deadline, should_stop, on_progress, incremental,
+        tablebase, batch_leaves, context, chance_cache)
+    moves = _root_moves(state, ai_player, roll, first_move)
+    prof = profiling.active()
+    if prof is not None:
+        prof.root(depth)
+
+    if trace is not None:
+        trace.record(tr.ROOT, depth, roll, -1, nan, nan, len(moves))
 
     if not moves:
-        val = value_turn(skip_turn(state, roll), depth - 1, roll)
+        val = child_value(None, depth - 1, roll, -inf, inf)
         stats.chosen_eval_value = val
-        if print_tree:
-            stats.tree_info.append(f"=== RESULT: No moves, Value={val:.2f} ===")
+        if trace is not None:
+            trace.record(tr.RESULT, depth, roll, -1, nan, nan, val)
         return None, val, stats
-    
-    moves = _order_moves(moves, state, roll, ai_player)
-    
-    if print_tree:
-        stats.tree_info.append(f"Root moves to evaluate: {len(moves)}")
-    
+
     best_mv = None
     best_val = -inf
     alpha = -inf
     
     for mv in moves:
-        s2 = apply_move(state, roll, mv)
-        v = value_turn(s2, depth - 1, roll)
-        
-        if print_tree:
-            move_str = f"piece#{mv.piece_id} {mv.kind.value}"
-            stats.tree_info.append(f"Root Move={move_str}, Value={v:.2f}")
-        
+        v = child_value(mv, depth - 1, roll, alpha, inf)
+        if trace is not None:
+            trace.record(tr.ROOT_MOVE, depth, roll, move_code(mv), alpha, nan, v)
+
         if v > best_val:
             best_val = v
             best_mv = mv
@@ -197,12 +470,119 @@ def choose_best_move_given_roll(state: GameState, ai_player: Player, depth: int,
         alpha = max(alpha, best_val)
 
     stats.chosen_eval_value = best_val
-    
-    if print_tree:
-        if best_mv:
-            move_str = f"piece#{best_mv.piece_id} {best_mv.kind.value}"
-            stats.tree_info.append(f"=== RESULT: Best Move={move_str}, Value={best_val:.2f} ===")
-        else:
-            stats.tree_info.append(f"=== RESULT: No move, Value={best_val:.2f} ===")
+    if trace is not None:
+        trace.record(tr.RESULT, depth, roll, move_code(best_mv), nan, nan, best_val)
+
+    return best_mv, best_val, stats
+
+def search_value(state: GameState, ai_player: Player, depth: int, roll: int | None = None,
+                 alpha: float = -inf, beta: float = inf, tt: TranspositionTable | None = None,
+                 pruning: str = "star2", weights: EvalWeights = DEFAULT_WEIGHTS, incremental: bool = True,
+                 should_stop: Callable[[], bool] | None = None,
+                 tablebase: Tablebase | None = None,
+                 context: SearchContext | None = None,
+                 deadline: float | None = None) -> tuple[float, SearchStats]:
+    """
+    Value of `state` searched `depth` plies deep, as the root search sees a
+    child: a chance node when `roll` is None, otherwise the decision after
+    `roll`. Fail-hard like the rest of the search: a value <= alpha or
+    >= beta is only a bound. `deadline` and `should_stop` as for
+    choose_best_move_given_roll().
+    """
+    stats = SearchStats(depth_reached=depth)
+    _, value_turn, value_after_roll, _ = _make_search(
+        state, ai_player, stats, tt, pruning, weights, None, deadline, should_stop, None, incremental, tablebase,
+        context=context)
+    prof = profiling.active()
+    if prof is not None:
+        prof.root(depth)
+    if roll is None:
+        return value_turn(depth, None, alpha, beta), stats
+    return value_after_roll(depth, roll, alpha, beta)[0], stats
+
+def choose_best_move_timed(state: GameState, ai_player: Player, roll: int, budget_ms: float | None, max_depth: int = 12,
+                           tt: TranspositionTable | None = None, pruning: str = "star2",
+                           weights: EvalWeights = DEFAULT_WEIGHTS, print_tree: bool = False,
+                           should_stop: Callable[[], bool] | None = None,
+                           on_progress: Callable[[SearchStats], None] | None = None,
+                           tablebase: Tablebase | None = None,
+                           book: OpeningBook | None = None,
+                           trace: TraceSink | None = None,
+                           context: SearchContext | None = None,
+                           chance_cache: ChanceCache | None = None) -> tuple[object, float, SearchStats]:
+    """
+    Iterative deepening: search depth 1, 2, ... up to `max_depth` until
+    `budget_ms` runs out (None for no limit) or `should_stop()` turns True,
+    and return the deepest completed result. Depth 1 always completes. Each
+    iteration starts from the previous best move and shares one table.
+    `on_progress` sees the running totals, including the unfinished iteration.
+    Every iteration goes to `trace`; with print_tree instead, stats.trace is
+    the deepest completed iteration's own ArrayTrace. A `context` is aged
+    once per call and then shared by the iterations like the table, and so
+    is `chance_cache`, a new one per call unless given.
+    """
+    start = time.perf_counter()
+    deadline = start + budget_ms / 1000.0 if budget_ms is not None else None
+    tt = tt if tt is not None else TranspositionTable()
+    if context is not None:
+        context.age()
+    chance_cache = chance_cache if chance_cache is not None else ChanceCache()
+
+    mv, val, stats = choose_best_move_given_roll(state, ai_player, 1, roll, print_tree, tt=tt, pruning=pruning,
+                                                 weights=weights, tablebase=tablebase, book=book, trace=trace,
+                                                 context=context, chance_cache=chance_cache)
+    if stats.book_hits:
+        return mv, val, stats
+    total = SearchStats(nodes=stats.nodes, leafs=stats.leafs, chosen_eval_value=val, trace=stats.trace,
+                        tt_hits=stats.tt_hits, tt_misses=stats.tt_misses, tb_hits=stats.tb_hits, depth_reached=1,
+                        cutoffs=stats.cutoffs, first_move_cutoffs=stats.first_move_cutoffs,
+                        chance_hits=stats.chance_hits, chance_misses=stats.chance_misses)
+    if mv is None or len(legal_moves(state, roll)) == 1:
+        return mv, val, total
+
+    live = None
+    if on_progress is not None:
+        live = SearchStats(depth_reached=1)
+        def progress(st: SearchStats):
+            live.nodes = total.nodes + st.nodes
+            live.leafs = total.leafs + st.leafs
+            on_progress(live)
+    else:
+        progress = None
+
+    last_time = time.perf_counter() - start
+    growth = 4.0
+    for depth in range(2, max_depth + 1):
+        now = time.perf_counter()
+        # Don't start an iteration that can't finish anyway.
+        if deadline is not None and now + last_time * growth > deadline:
+            break
+        try:
+            result = choose_best_move_given_roll(state, ai_player, depth, roll, print_tree, tt=tt, pruning=pruning,
+                                                 deadline=deadline, first_move=mv, weights=weights,
+                                                 should_stop=should_stop, on_progress=progress, tablebase=tablebase,
+                                                 trace=trace, context=context, chance_cache=chance_cache)
+        except SearchAborted as e:
+            total.nodes += e.stats.nodes
+            total.leafs += e.stats.leafs
+            break
+        mv, val, stats = result
+        total.nodes += stats.nodes
+        total.leafs += stats.leafs
+        total.tt_hits += stats.tt_hits
+        total.tt_misses += stats.tt_misses
+        total.tb_hits += stats.tb_hits
+        total.cutoffs += stats.cutoffs
+        total.first_move_cutoffs += stats.first_move_cutoffs
+        total.chance_hits += stats.chance_hits
+        total.chance_misses += stats.chance_misses
+        total.depth_reached = depth
+        total.chosen_eval_value = val
+        total.trace = stats.trace
+        if live is not None:
+            live.depth_reached = depth
+        elapsed = time.perf_counter() - now
+        growth = max(2.0, elapsed / last_time) if last_time > 0 else growth
+        last_time = elapsed
 
-    return best_mv, best_val, stats
\ No newline at end of file
+    return mv, val, total
@@ -0,0 +1,147 @@
+from __future__ import annotations
+from bisect import bisect_left, insort
+from game.state import GameState, Player, OUT
+from game.constants import NUM_SQUARES, HAPPINESS, WATER
+from .eval import evaluate, EvalWeights, DEFAULT_WEIGHTS
+
+# evaluate() split into per-side running terms. Sides are 0 = BLACK, 1 = WHITE
+# as in game.bitboard and game.zobrist.
+_DANGER_LO, _DANGER_HI = 24, 26
+_LATE_BRIDGE = 22  # a bridge starting on this square or later is a late bridge
+# Per square: its contribution to the danger sum, and which bridge counter
+# (0 = bridge, 1 = late bridge) a bridge starting there goes to.
+_DANGER = tuple(sq if _DANGER_LO <= sq <= _DANGER_HI else 0 for sq in range(NUM_SQUARES + 1))
+_BRIDGE_KIND = tuple(int(sq >= _LATE_BRIDGE) for sq in range(NUM_SQUARES + 1))
+_SIDES = {Player.BLACK: 0, Player.WHITE: 1}
+
+# Default for new evaluators: check every value() against evaluate().
+DEBUG = False
+
+
+class IncrementalEval:
+    """
+    evaluate() kept up to date move by move instead of recomputed per leaf.
+
+    Per side it tracks the out count, piece counts per square, the progress
+    sum, the 24-26 danger sum, adjacent-square bridges and the sorted
+    positions for the vanguard. Each piece move costs O(1) plus an insort
+    into at most 7 positions.
+
+    make(before, after) diffs two states and pushes the change, unmake()
+    undoes the last make. move_piece() is the underlying update for callers
+    that already know which piece went where. With debug=True (default:
+    the module's DEBUG flag) every value() is checked against evaluate() on
+    the current state.
+    """
+
+    def __init__(self, state: GameState, weights: EvalWeights = DEFAULT_WEIGHTS, debug: bool | None = None):
+        self.weights = weights
+        self.debug = DEBUG if debug is None else debug
+        # counts[side][sq] for squares 1..30; entries 0 and 31 stay zero so
+        # the bridge checks need no bounds tests.
+        self.counts = ([0] * (NUM_SQUARES + 2), [0] * (NUM_SQUARES + 2))
+        self.out = [0, 0]
+        self.progress = [0, 0]
+        self.danger = [0, 0]
+        self.bridges = ([0, 0], [0, 0])  # [bridges, late bridges] per side
+        self.sorted = ([], [])
+        self._log: list[tuple[int, int, int]] = []  # (side, from_sq, to_sq)
+        self._marks: list[int] = []
+        self._states = [state]
+        for side, positions in enumerate((state.black, state.white)):
+            for pos in positions:
+                self.out[side] += 1
+                self.move_piece(side, OUT, pos)
+
+    def move_piece(self, side: int, from_sq: int, to_sq: int):
+        c = self.counts[side]
+        bridges = self.bridges[side]
+        positions = self.sorted[side]
+        if from_sq != OUT:
+            c[from_sq] -= 1
+            self.progress[side] -= from_sq
+            self.danger[side] -= _DANGER[from_sq]
+            del positions[bisect_left(positions, from_sq)]
+            if not c[from_sq]:
+                # Square emptied: it may break a bridge on either side.
+                if c[from_sq - 1]:
+                    bridges[_BRIDGE_KIND[from_sq - 1]] -= 1
+                if c[from_sq + 1]:
+                    bridges[_BRIDGE_KIND[from_sq]] -= 1
+        else:
+            self.out[side] -= 1
+        if to_sq != OUT:
+            c[to_sq] += 1
+            self.progress[side] += to_sq
+            self.danger[side] += _DANGER[to_sq]
+            insort(positions, to_sq)
+            if c[to_sq] == 1:
+                if c[to_sq - 1]:
+                    bridges[_BRIDGE_KIND[to_sq - 1]] += 1
+                if c[to_sq + 1]:
+                    bridges[_BRIDGE_KIND[to_sq]] += 1
+        else:
+            self.out[side] += 1
+
+    def make(self, before: GameState, after: GameState):
+        log = self._log
+        self._marks.append(len(log))
+        move_piece = self.move_piece
+        old, new = before.black, after.black
+        if old != new:
+            for pid in range(len(old)):
+                if old[pid] != new[pid]:
+                    move_piece(0, old[pid], new[pid])
+                    log.append((0, old[pid], new[pid]))
+        old, new = before.white, after.white
+        if old != new:
+            for pid in range(len(old)):
+                if old[pid] != new[pid]:
+                    move_piece(1, old[pid], new[pid])
+                    log.append((1, old[pid], new[pid]))
+        if self.debug:
+            self._states.append(after)
+
+    def unmake(self):
+        log = self._log
+        mark = self._marks.pop()
+        for side, from_sq, to_sq in reversed(log[mark:]):
+            self.move_piece(side, to_sq, from_sq)
+        del log[mark:]
+        if self.debug:
+            self._states.pop()
+
+    def value(self, ai_player: Player, state: GameState | None = None) -> float:
+        # `state` is only read by the debug check, for callers that drive
+        # move_piece() directly instead of make().
+        w = self.weights
+        me = _SIDES[ai_player]
+        op = 1 - me
+        mine = self.sorted[me]
+
+        # Same vanguard as evaluate(): every piece at or above the third
+        # highest position, so ties with it count as vanguard too.
+        van_sum = 0
+        van_home = 0
+        if mine:
+            floor = mine[-3] if len(mine) >= 3 else mine[0]
+            for p in reversed(mine):
+                if p < floor:
+                    break
+                van_sum += p
+                if p >= HAPPINESS:
+                    van_home += 1
+
+        score = (self.out[me] * w.win
+                 - self.out[op] * w.win * w.opponent_out_factor
+                 + van_sum * w.vanguard + van_home * w.vanguard_home_bonus
+                 + (self.progress[me] - van_sum) * w.rear
+                 + self.counts[me][WATER] * w.water
+                 + self.bridges[me][0] * w.bridge + self.bridges[me][1] * w.late_bridge
+                 + self.danger[op] * w.danger
+                 + self.progress[op] * w.opponent_progress)
+        if self.debug:
+            state = state if state is not None else self._states[-1]
+            full = evaluate(state, ai_player, w)
+            assert abs(score - full) <= 1e-9 * max(1.0, abs(full)), (score, full, state)
+        return score
@@ -0,0 +1,231 @@
+from __future__ import annotations
+import random
+import time
+from math import exp, log, sqrt
+from typing import Callable
+
+from game.state import GameState, Player, OUT
+from game.board import SearchBoard
+from game.dice import toss_sticks
+from game.move import Move, MoveKind
+from game.constants import PIECES_PER_PLAYER, WATER
+from game.zobrist import position_hash
+from game.canonical import square_move, move_from_square
+from .eval import evaluate, EvalWeights, DEFAULT_WEIGHTS
+from .expectiminimax import SearchStats
+
+DEFAULT_ITERATIONS = 5000
+DEFAULT_EXPLORATION = 0.7
+# evaluate() difference (BLACK minus WHITE) that a leaf scores as a 73% win
+# for BLACK. Much sharper than the tablebase's SQUASH_SCALE: away from the
+# bear-off the differences are mostly positional, a few 1e5 at most.
+DEFAULT_LEAF_SCALE = 2e5
+
+# How often (in iterations) the search looks at the clock and the stop/progress hooks.
+_CLOCK_CHECK_MASK = 0x3F
+
+
+class _Edge:
+    # The move is held as its game.canonical.square_move() code: nodes are
+    # found again by position_hash(), so the position may come back with
+    # its pieces numbered differently.
+    __slots__ = ("code", "child", "visits", "total")
+
+    def __init__(self, code: int):
+        self.code = code
+        self.child: _Node | None = None
+        self.visits = 0
+        self.total = 0.0  # summed rewards, for the side that plays the move
+
+
+class _Node:
+    # A position before its roll. Decisions hang off it per roll, each with
+    # its own edges; the roll itself is sampled, never chosen.
+    __slots__ = ("key", "edges")
+
+    def __init__(self, key: int):
+        self.key = key
+        self.edges: dict[int, list[_Edge]] = {}
+
+    def size(self) -> int:
+        return 1 + sum(e.child.size() for edges in self.edges.values() for e in edges if e.child is not None)
+
+
+def _black_wins(board: SearchBoard) -> float:
+    return 1.0 if board.counts[0][OUT] == PIECES_PER_PLAYER else 0.0
+
+
+def _policy_move(board: SearchBoard, moves: list[Move], roll: int, rng: random.Random) -> Move | None:
+    # Rollout policy: bear off when possible, otherwise a random move among
+    # the swaps, or the rest if there are none, staying out of the water.
+    if not moves:
+        return None
+    side = 0 if board.turn == Player.BLACK else 1
+    my = board.pieces_of(board.turn)
+    theirs = board.counts[side ^ 1]
+    best: list[Move] = []
+    best_rank = -1
+    for mv in moves:
+        if mv.kind == MoveKind.PROMOTE:
+            return mv
+        to_sq = my[mv.piece_id] + roll
+        rank = 0 if to_sq == WATER else 2 if theirs[to_sq] else 1
+        if rank > best_rank:
+            best, best_rank = [mv], rank
+        elif rank == best_rank:
+            best.append(mv)
+    return rng.choice(best)
+
+
+class MCTS:
+    """
+    Monte Carlo tree search with the stick toss as sampled chance nodes. Keep
+    one around between turns: the subtree of the position it is asked about
+    next is kept, as long as that position is at most one move of each side
+    away from the last root.
+
+    A new leaf scores a logistic of the evaluate() difference at
+    `leaf_scale`, after `rollout_plies` plies of _policy_move() self-play
+    when that is nonzero. Rewards are win probabilities; moves are picked by
+    UCT at `exploration`.
+    """
+
+    def __init__(self, weights: EvalWeights = DEFAULT_WEIGHTS, exploration: float = DEFAULT_EXPLORATION,
+                 rollout_plies: int = 0, leaf_scale: float = DEFAULT_LEAF_SCALE, seed: int | None = None):
+        self.weights = weights
+        self.exploration = exploration
+        self.leaf_scale = leaf_scale
+        self.rollout_plies = rollout_plies
+        self.rng = random.Random(seed)
+        self._root: _Node | None = None
+
+    def reset(self):
+        self._root = None
+
+    def _find_root(self, key: int) -> _Node:
+        # The old root, or a node one or two moves below it.
+        level = [self._root] if self._root is not None else []
+        for _ in range(3):
+            nxt = []
+            for node in level:
+                if node.key == key:
+                    return node
+                nxt.extend(e.child for edges in node.edges.values() for e in edges if e.child is not None)
+            level = nxt
+        return _Node(key)
+
+    def _leaf(self, board: SearchBoard) -> float:
+        # Win probability for BLACK of a new, non-terminal leaf.
+        tokens = []
+        for _ in range(self.rollout_plies):
+            roll = toss_sticks(self.rng)
+            tokens.append(board.make(_policy_move(board, board.legal_moves(roll), roll, self.rng), roll))
+            if board.is_terminal():
+                break
+        if board.is_terminal():
+            value = _black_wins(board)
+        else:
+            w = self.weights
+            diff = evaluate(board, Player.BLACK, w) - evaluate(board, Player.WHITE, w)
+            value = 1.0 / (1.0 + exp(min(max(-diff / self.leaf_scale, -700.0), 700.0)))
+        for token in reversed(tokens):
+            board.unmake(token)
+        return value
+
+    def _select(self, edges: list[_Edge]) -> _Edge:
+        parent = 0
+        for e in edges:
+            if not e.visits:
+                return e
+            parent += e.visits
+        c = self.exploration * sqrt(log(parent))
+        return max(edges, key=lambda e: e.total / e.visits + c / sqrt(e.visits))
+
+    def _iterate(self, board: SearchBoard, root: _Node, roll: int) -> int:
+        # One descent, leaf evaluation and backup; returns the path length.
+        node = root
+        path: list[tuple[_Edge, bool]] = []
+        tokens = []
+        while True:
+            edges = node.edges.get(roll)
+            if edges is None:
+                edges = node.edges[roll] = [_Edge(square_move(board, mv)) for mv in board.legal_moves(roll) or [None]]
+            edge = self._select(edges)
+            path.append((edge, board.turn == Player.BLACK))
+            tokens.append(board.make(move_from_square(board, edge.code), roll))
+            if board.is_terminal():
+                value = _black_wins(board)
+                break
+            if edge.child is None:
+                edge.child = _Node(board.hash)
+                value = self._leaf(board)
+                break
+            node = edge.child
+            roll = toss_sticks(self.rng)
+        for edge, black in path:
+            edge.visits += 1
+            edge.total += value if black else 1.0 - value
+        for token in reversed(tokens):
+            board.unmake(token)
+        return len(path)
+
+    def choose_move(self, state: GameState, ai_player: Player, roll: int, budget_ms: float | None = None,
+                    max_iterations: int | None = None, print_tree: bool = False,
+                    should_stop: Callable[[], bool] | None = None,
+                    on_progress: Callable[[SearchStats], None] | None = None) -> tuple[Move | None, float, SearchStats]:
+        """
+        Search until `budget_ms` runs out, `max_iterations` descents are done
+        (DEFAULT_ITERATIONS when neither is given) or `should_stop()` turns
+        True. Returns the most visited move and its win probability for
+        `ai_player`. stats.nodes counts descents this call.
+        """
+        if budget_ms is None and max_iterations is None:
+            max_iterations = DEFAULT_ITERATIONS
+        deadline = time.perf_counter() + budget_ms / 1000.0 if budget_ms is not None else None
+        stats = SearchStats()
+        board = SearchBoard(state)
+        root = self._root = self._find_root(position_hash(state))
+        reused = sum(e.visits for e in root.edges.get(roll, ()))
+
+        if not board.is_terminal():
+            moves = board.legal_moves(roll)
+            if len(moves) < 2:
+                mv = moves[0] if moves else None
+                return mv, 0.5, stats
+            while max_iterations is None or stats.nodes < max_iterations:
+                depth = self._iterate(board, root, roll)
+                stats.nodes += 1
+                stats.leafs += 1
+                if depth > stats.depth_reached:
+                    stats.depth_reached = depth
+                if not stats.nodes & _CLOCK_CHECK_MASK:
+                    if deadline is not None and time.perf_counter() > deadline:
+                        break
+                    if should_stop is not None and should_stop():
+                        break
+                    if on_progress is not None:
+                        on_progress(stats)
+
+        edges = root.edges.get(roll)
+        if not edges:
+            return None, 0.5, stats
+        best = max(edges, key=lambda e: e.visits)
+        val = best.total / best.visits if best.visits else 0.5
+        if state.turn != ai_player:
+            val = 1.0 - val
+        stats.chosen_eval_value = val
+        if print_tree:
+            stats.tree_info.append(f"=== MCTS ROOT: Roll={roll}, Turn={state.turn}, reused visits={reused} ===")
+            for e in edges:
+                mv = move_from_square(state, e.code)
+                move_str = f"piece#{mv.piece_id} {mv.kind.value}" if mv else "skip"
+                mean = e.total / e.visits if e.visits else 0.0
+                stats.tree_info.append(f"Root Move={move_str}, Visits={e.visits}, Value={mean:.3f}")
+            stats.tree_info.append(f"Tree size: {root.size()} nodes")
+        return move_from_square(state, best.code), val, stats
+
+
+def choose_best_move_mcts(state: GameState, ai_player: Player, roll: int, budget_ms: float | None = None,
+                          **kwargs) -> tuple[Move | None, float, SearchStats]:
+    """One-off MCTS search; keep an MCTS around to reuse its tree across turns."""
+    return MCTS().choose_move(state, ai_player, roll, budget_ms, **kwargs)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+from game.move import Move, MoveKind
+from game.state import Player
+from game.constants import NUM_SQUARES
+from game.canonical import square_move, SQUARE_PROMOTE
+
+# Move orderings a player can search with: static_priority() alone, or a SearchContext.
+ORDERINGS = ("static", "history")
+# Killer slots kept per (remaining depth, roll).
+KILLERS = 2
+# Scores ahead of any history score: the table move, then the killers.
+_TT_SCORE = 1 << 62
+_KILLER_SCORE = 1 << 60
+
+
+def static_priority(piece_pos: int, kind: MoveKind, roll: int, captures: bool) -> int:
+    """expectiminimax._order_moves' priority of one move; `captures`: an opponent piece is on the target."""
+    if piece_pos == 27:
+        return 100_000_000
+    if kind == MoveKind.PROMOTE:
+        return 50_000_000
+    target_pos = piece_pos + roll
+    if captures:
+        return 1_000_000 + (target_pos * 10_000)
+    if target_pos == 26:
+        return 500_000
+    if piece_pos > 20:
+        return piece_pos * 1000
+    return target_pos
+
+
+class SearchContext:
+    """
+    Move-ordering state learned by the search, kept from one search to the
+    next like the transposition table: killer moves per (remaining depth,
+    roll) and a history score per (from square, roll), both by square so
+    they carry over between positions. Only moves after a roll inside the
+    tree are reordered; root moves keep their static order.
+
+    order() puts the table move first, then the killers, then the rest by
+    history score with the static priority breaking ties. cutoff() is told
+    about every move that caused a beta cutoff. age() halves the history,
+    once per turn, so old games fade out.
+    """
+
+    def __init__(self):
+        self.history = [0] * ((NUM_SQUARES + 1) * 6)
+        self.killers: dict[tuple[int, int], list[int]] = {}
+
+    def clear(self):
+        self.history = [0] * len(self.history)
+        self.killers.clear()
+
+    def age(self):
+        self.history = [h >> 1 for h in self.history]
+
+    def order(self, board, moves: list[Move], d: int, r: int, tt_move: Move | None) -> list[Move]:
+        my = board.pieces_of(board.turn)
+        theirs = board.counts[1 if board.turn == Player.BLACK else 0]
+        killers = self.killers.get((d, r), ())
+        history = self.history
+        scored = []
+        for mv in moves:
+            pos = my[mv.piece_id]
+            if mv == tt_move:
+                score = _TT_SCORE
+            else:
+                code = pos | (SQUARE_PROMOTE if mv.kind == MoveKind.PROMOTE else 0)
+                if code in killers:
+                    score = _KILLER_SCORE - killers.index(code)
+                else:
+                    target = pos + r
+                    captures = mv.kind != MoveKind.PROMOTE and target <= NUM_SQUARES and theirs[target] > 0
+                    score = (history[pos * 6 + r] << 27) + static_priority(pos, mv.kind, r, captures)
+            scored.append((score, mv))
+        scored.sort(key=lambda t: t[0], reverse=True)
+        return [mv for _, mv in scored]
+
+    def cutoff(self, board, mv: Move, d: int, r: int):
+        code = square_move(board, mv)
+        slot = self.killers.setdefault((d, r), [])
+        if code not in slot:
+            slot.insert(0, code)
+            del slot[KILLERS:]
+        self.history[(code & ~SQUARE_PROMOTE) * 6 + r] += d * d
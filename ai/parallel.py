@@ -0,0 +1,209 @@
+from __future__ import annotations
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from math import inf, nextafter
+
+from game.state import GameState, Player
+from game.rules import generate_children, is_terminal
+from game.dice import roll_distribution
+from game.move import Move
+from .eval import eval_bounds, EvalWeights, DEFAULT_WEIGHTS
+from .expectiminimax import SearchStats, SearchAborted, choose_best_move_given_roll, search_value, _root_moves
+from .tt import TranspositionTable
+from .tablebase import Tablebase
+
+# Per-process state of a search worker. Each worker keeps its own tables
+# between tasks and calls, one per (weights, tablebase file): stored values
+# depend on both, so searches with other settings must not see them.
+# `_best` is the shared root bound the parent writes, `_cancel` the event
+# that stops every running task.
+_best = None
+_cancel = None
+_tables: dict[tuple, TranspositionTable] = {}
+
+
+def _init_worker(best, cancel):
+    global _best, _cancel
+    _best = best
+    _cancel = cancel
+    _tables.clear()
+
+
+def _table(weights: EvalWeights, tablebase: Tablebase | None) -> TranspositionTable:
+    key = (weights, tablebase.path if tablebase is not None else None)
+    tt = _tables.get(key)
+    if tt is None:
+        tt = _tables[key] = TranspositionTable()
+    return tt
+
+
+def _floor() -> float:
+    # Just below the best root value so far, so a move that ties it still
+    # comes back exact and the earliest of equal moves wins, as serially.
+    best = _best.value
+    return nextafter(best, -inf) if best != -inf else -inf
+
+
+def _move_task(child: GameState, ai_player: Player, depth: int, pruning: str, weights: EvalWeights,
+               incremental: bool, tablebase: Tablebase | None, deadline: float | None):
+    alpha = _floor()
+    v, stats = search_value(child, ai_player, depth, None, alpha, inf, _table(weights, tablebase), pruning, weights,
+                            incremental, should_stop=_cancel.is_set, tablebase=tablebase, deadline=deadline)
+    return v, v > alpha, stats
+
+
+def _roll_task(child: GameState, ai_player: Player, depth: int, roll: int, pruning: str, weights: EvalWeights,
+               incremental: bool, tablebase: Tablebase | None, deadline: float | None):
+    # One roll of the chance node after a root move. When this roll can't
+    # lift the move above the bound even with every other roll at the eval
+    # upper bound, the move is out and the value here is only a bound.
+    alpha = _floor()
+    a = -inf
+    if alpha != -inf:
+        p = roll_distribution()[roll]
+        _, hi = eval_bounds(child, ai_player, depth, weights)
+        a = nextafter((alpha - hi * (1.0 - p)) / p, -inf)
+    v, stats = search_value(child, ai_player, depth, roll, a, inf, _table(weights, tablebase), pruning, weights,
+                            incremental, should_stop=_cancel.is_set, tablebase=tablebase, deadline=deadline)
+    return v, v > a, stats
+
+
+class ParallelSearch:
+    """
+    Root-parallel expectiminimax on a pool of `workers` processes (default:
+    all cores). Every root move is searched as its own task, or with
+    split_rolls=True every (root move, roll) pair, which gives five times as
+    many tasks for the pool to balance.
+
+    The best root value found so far lives in shared memory and each task
+    starts with it as alpha, so late tasks still prune. Only the parent
+    writes it, and only with exact values, so the move and value returned
+    are those of choose_best_move_given_roll whatever order tasks finish in.
+
+    Every task checks `deadline` (a time.perf_counter() value, the same
+    clock in every process) and a shared event that cancel() sets, so
+    choose_best_move raises SearchTimeout or SearchCancelled as the serial
+    search does, once the tasks still running have stopped.
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        ctx = multiprocessing.get_context("spawn")
+        self._best = ctx.Value("d", -inf)
+        self._cancel = ctx.Event()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx, initializer=_init_worker,
+                                         initargs=(self._best, self._cancel))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def cancel(self):
+        """Stop the running choose_best_move (from another thread)."""
+        self._cancel.set()
+
+    def shutdown(self):
+        self._cancel.set()
+        self._pool.shutdown(cancel_futures=True)
+
+    def choose_best_move(self, state: GameState, ai_player: Player, depth: int, roll: int,
+                         pruning: str = "star2", weights: EvalWeights = DEFAULT_WEIGHTS,
+                         split_rolls: bool = False, first_move: Move | None = None,
+                         incremental: bool = True,
+                         tablebase: Tablebase | None = None,
+                         deadline: float | None = None) -> tuple[object, float, SearchStats]:
+        self._cancel.clear()
+        moves = _root_moves(state, ai_player, roll, first_move)
+        if len(moves) < 2 or depth < 2:
+            return choose_best_move_given_roll(state, ai_player, depth, roll, pruning=pruning, first_move=first_move,
+                                               weights=weights, incremental=incremental, tablebase=tablebase,
+                                               deadline=deadline, should_stop=self._cancel.is_set)
+
+        dist = roll_distribution()
+        self._best.value = -inf
+        futures = {}
+        for i, (mv, child) in enumerate(generate_children(state, roll, moves)):
+            # A child the tablebase covers is scored whole, never roll by roll.
+            if split_rolls and not is_terminal(child) and (tablebase is None or tablebase.probe(child) is None):
+                for r in dist:
+                    fut = self._pool.submit(_roll_task, child, ai_player, depth - 1, r, pruning, weights, incremental,
+                                            tablebase, deadline)
+                    futures[fut] = (i, r)
+            else:
+                fut = self._pool.submit(_move_task, child, ai_player, depth - 1, pruning, weights, incremental,
+                                        tablebase, deadline)
+                futures[fut] = (i, None)
+
+        stats = SearchStats(depth_reached=depth)
+        values: list[float | None] = [None] * len(moves)
+        roll_values: dict[int, dict[int, float]] = {}
+        dead: set[int] = set()
+        seen = set()
+        for fut in as_completed(futures):
+            if fut.cancelled():
+                continue
+            seen.add(fut)
+            i, r = futures[fut]
+            try:
+                v, exact, st = fut.result()
+            except SearchAborted as e:
+                # Stop the other tasks too and wait for them, so none is still
+                # running when the next search clears the event.
+                self._cancel.set()
+                for other in futures:
+                    other.cancel()
+                wait(futures)
+                for other in futures:
+                    if other in seen or other.cancelled():
+                        continue
+                    err = other.exception()
+                    if err is None or isinstance(err, SearchAborted):
+                        st = other.result()[2] if err is None else err.stats
+                        stats.nodes += st.nodes
+                        stats.leafs += st.leafs
+                stats.nodes += e.stats.nodes
+                stats.leafs += e.stats.leafs
+                raise type(e)(stats) from None
+            stats.nodes += st.nodes
+            stats.leafs += st.leafs
+            stats.tt_hits += st.tt_hits
+            stats.tt_misses += st.tt_misses
+            stats.tb_hits += st.tb_hits
+            if i in dead:
+                continue
+            if not exact:
+                # Below the bound: this move can't be the best one.
+                dead.add(i)
+                for other, (j, _) in futures.items():
+                    if j == i:
+                        other.cancel()
+                continue
+            if r is not None:
+                rolls = roll_values.setdefault(i, {})
+                rolls[r] = v
+                if len(rolls) < len(dist):
+                    continue
+                # Same order of summation as value_turn, so the same float.
+                v = 0.0
+                for rr, p in dist.items():
+                    v += p * rolls[rr]
+            values[i] = v
+            if v > self._best.value:
+                self._best.value = v
+
+        best_i = None
+        for i, v in enumerate(values):
+            if v is not None and (best_i is None or v > values[best_i]):
+                best_i = i
+        stats.chosen_eval_value = values[best_i]
+        return moves[best_i], values[best_i], stats
+
+
+def choose_best_move_parallel(state: GameState, ai_player: Player, depth: int, roll: int, workers: int | None = None,
+                              **kwargs) -> tuple[object, float, SearchStats]:
+    """One-off ParallelSearch; keep a ParallelSearch around to reuse the pool across turns."""
+    with ParallelSearch(workers) as search:
+        return search.choose_best_move(state, ai_player, depth, roll, **kwargs)
@@ -0,0 +1,231 @@
+from __future__ import annotations
+import argparse
+import json
+import marshal
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Iterator
+
+# Opt-in counters and timers for the expectiminimax search. Nothing is
+# measured unless a SearchProfile is active:
+#
+#     with search_profile() as prof:
+#         choose_best_move_given_roll(...)
+#     prof.as_dict()
+#
+# While one is active, every search started in this process wraps its
+# board's legal_moves/make/unmake/_rebirth_target and the leaf evaluation
+# with timers and reports nodes, cutoffs and roll values to it. Searches
+# started outside the block pay nothing beyond an `is not None` test at
+# each reporting site, like tracing.
+
+# Cutoff kinds.
+ALPHA_BETA = "alpha_beta"    # a decision node stopped after a move
+STAR1 = "star1"              # a chance node cut while searching its rolls
+STAR2 = "star2"              # a chance node cut by the Star2 probe
+TT = "tt"                    # a decision node answered by the table
+
+_active: SearchProfile | None = None
+
+
+def active() -> SearchProfile | None:
+    """The profile searches should report to, if any."""
+    return _active
+
+
+class SearchProfile:
+    """
+    Totals over every search run while the profile was active.
+
+    timers: name -> [calls, seconds]. nodes_by_ply[p]: chance nodes p plies
+    below the root (ply 0 counts the roots). cutoffs[kind][depth]: cutoffs
+    by remaining depth. roll_values[p][roll]: [chance nodes, summed
+    probability-weighted value] of each roll at chance nodes p plies down
+    that searched all their rolls.
+    """
+
+    def __init__(self):
+        self.timers: dict[str, list] = {}
+        self.nodes_by_ply: dict[int, int] = defaultdict(int)
+        self.cutoffs: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.roll_values: dict[int, dict[int, list]] = defaultdict(dict)
+        self.roots = 0
+        self.elapsed = 0.0
+        self._root_depth = 0
+        self._code: dict[str, tuple] = {}
+
+    # --- reporting, called by the search ---
+
+    def timed(self, name: str, fn):
+        """`fn` wrapped to add its calls and time to timers[name]."""
+        slot = self.timers.setdefault(name, [0, 0.0])
+        code = getattr(fn, "__code__", None)
+        if code is not None:
+            self._code[name] = (code.co_filename, code.co_firstlineno, code.co_name)
+        clock = time.perf_counter
+
+        @wraps(fn)
+        def wrapper(*args):
+            t = clock()
+            try:
+                return fn(*args)
+            finally:
+                slot[1] += clock() - t
+                slot[0] += 1
+        return wrapper
+
+    def root(self, depth: int):
+        self.roots += 1
+        self._root_depth = depth
+        self.nodes_by_ply[0] += 1
+
+    def node(self, depth: int):
+        ply = self._root_depth - depth
+        if ply > 0:
+            self.nodes_by_ply[ply] += 1
+
+    def cutoff(self, kind: str, depth: int):
+        self.cutoffs[kind][depth] += 1
+
+    def roll_value(self, depth: int, roll: int, weighted: float):
+        slot = self.roll_values[self._root_depth - depth].setdefault(roll, [0, 0.0])
+        slot[0] += 1
+        slot[1] += weighted
+
+    # --- derived figures ---
+
+    def branching(self) -> dict[int, float]:
+        """Chance nodes at ply p+1 per chance node at ply p."""
+        n = self.nodes_by_ply
+        return {p: n[p + 1] / n[p] for p in sorted(n) if p + 1 in n and n[p]}
+
+    def effective_branching_factor(self) -> float:
+        """b with roots * b**d equal to the chance nodes at the deepest ply d."""
+        n = self.nodes_by_ply
+        deepest = max(n, default=0)
+        if not deepest or not n[0]:
+            return 0.0
+        return (n[deepest] / n[0]) ** (1.0 / deepest)
+
+    def as_dict(self) -> dict:
+        return {
+            "roots": self.roots,
+            "seconds": self.elapsed,
+            "timers": {name: {"calls": calls, "seconds": secs} for name, (calls, secs) in self.timers.items()},
+            "nodes_by_ply": dict(sorted(self.nodes_by_ply.items())),
+            "branching": self.branching(),
+            "effective_branching_factor": self.effective_branching_factor(),
+            "cutoffs": {kind: dict(sorted(by_depth.items())) for kind, by_depth in self.cutoffs.items()},
+            "roll_values": {ply: {roll: {"nodes": k, "mean": total / k} for roll, (k, total) in sorted(rolls.items())}
+                            for ply, rolls in sorted(self.roll_values.items())},
+        }
+
+    # --- export ---
+
+    def prometheus_lines(self, prefix: str = "senet_search") -> Iterator[str]:
+        """The profile in the Prometheus text exposition format."""
+        def family(name, kind, help_text):
+            yield f"# HELP {prefix}_{name} {help_text}"
+            yield f"# TYPE {prefix}_{name} {kind}"
+
+        yield from family("calls_total", "counter", "Calls of an instrumented function.")
+        for name, (calls, _) in self.timers.items():
+            yield f'{prefix}_calls_total{{function="{name}"}} {calls}'
+        yield from family("seconds_total", "counter", "Time spent in an instrumented function.")
+        for name, (_, secs) in self.timers.items():
+            yield f'{prefix}_seconds_total{{function="{name}"}} {secs!r}'
+        yield from family("nodes_total", "counter", "Chance nodes by ply below the root.")
+        for ply, n in sorted(self.nodes_by_ply.items()):
+            yield f'{prefix}_nodes_total{{ply="{ply}"}} {n}'
+        yield from family("cutoffs_total", "counter", "Cutoffs by kind and remaining depth.")
+        for kind, by_depth in self.cutoffs.items():
+            for depth, n in sorted(by_depth.items()):
+                yield f'{prefix}_cutoffs_total{{kind="{kind}",depth="{depth}"}} {n}'
+        yield from family("effective_branching_factor", "gauge", "Chance-node growth per ply.")
+        yield f"{prefix}_effective_branching_factor {self.effective_branching_factor()!r}"
+        yield from family("roll_value_mean", "gauge", "Mean probability-weighted value of a roll at a chance node.")
+        for ply, rolls in sorted(self.roll_values.items()):
+            for roll, (k, total) in sorted(rolls.items()):
+                yield f'{prefix}_roll_value_mean{{ply="{ply}",roll="{roll}"}} {total / k!r}'
+
+    def write_prometheus(self, path: str, prefix: str = "senet_search"):
+        with open(path, "w") as f:
+            for line in self.prometheus_lines(prefix):
+                f.write(line + "\n")
+
+    def pstats_dict(self) -> dict:
+        """The timers in the layout pstats.Stats loads (as cProfile writes it), without callers."""
+        out = {}
+        for name, (calls, secs) in self.timers.items():
+            filename, line, func = self._code.get(name, ("~", 0, name))
+            out[(filename, line, f"{func} [{name}]" if func != name else func)] = (calls, calls, secs, secs, {})
+        return out
+
+    def dump_stats(self, path: str):
+        """Write the timers as a file pstats.Stats(path) reads."""
+        with open(path, "wb") as f:
+            marshal.dump(self.pstats_dict(), f)
+
+
+@contextmanager
+def search_profile(profile: SearchProfile | None = None) -> Iterator[SearchProfile]:
+    """Profile the searches run inside the block into `profile` (default: a new one)."""
+    global _active
+    prof = profile if profile is not None else SearchProfile()
+    outer, _active = _active, prof
+    start = time.perf_counter()
+    try:
+        yield prof
+    finally:
+        prof.elapsed += time.perf_counter() - start
+        _active = outer
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="python -m ai.profiling",
+                                               description="Profile the search on positions from random self-play")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--positions", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pruning", default="star2")
+    parser.add_argument("--prometheus", default=None, help="write the Prometheus text format here")
+    parser.add_argument("--pstats", default=None, help="write a pstats-readable report here")
+    return parser
+
+
+def run(args) -> int:
+    from game.rules import initial_state, legal_moves, apply_move, skip_turn, is_terminal
+    from game.dice import toss_sticks
+    from .expectiminimax import choose_best_move_given_roll
+    # Under `python -m` this file is __main__; the search reports to ai.profiling.
+    from .profiling import search_profile
+
+    rng = random.Random(args.seed)
+    with search_profile() as prof:
+        for _ in range(args.positions):
+            state = initial_state()
+            for _ in range(rng.randrange(10, 60)):
+                roll = toss_sticks(rng)
+                moves = legal_moves(state, roll)
+                state = apply_move(state, roll, rng.choice(moves), validate=False) if moves else skip_turn(state, roll)
+                if is_terminal(state):
+                    state = initial_state()
+            choose_best_move_given_roll(state, state.turn, args.depth, toss_sticks(rng), pruning=args.pruning)
+    print(json.dumps(prof.as_dict(), indent=2))
+    if args.prometheus:
+        prof.write_prometheus(args.prometheus)
+    if args.pstats:
+        prof.dump_stats(args.pstats)
+    return 0
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+from __future__ import annotations
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+from array import array
+from dataclasses import asdict
+from math import exp
+
+from game.state import GameState, Player, OUT
+from game.board import SearchBoard
+from game.constants import NUM_SQUARES, PIECES_PER_PLAYER, ROLL_PROBS, THREE_TRUTHS, RE_ATOUM, HORUS
+from .eval import evaluate, _rest_bounds, EvalWeights, DEFAULT_WEIGHTS
+
+# Bear-off positions: every piece of both sides on squares 21..30 or out, at
+# most one piece per square. An index is
+#   (placement * 2 + turn) * 7 + pending
+# where placement reads the squares 21..30 as base-3 digits (0 empty,
+# 1 black, 2 white, square 21 least significant) and pending is 0 for none
+# or 1 + 3 * player + (square - 28) for a pending piece on 28/29/30.
+#
+# The region is not closed: water and the 28/29 obligations send pieces back
+# to rebirth. Moves that leave it get a fixed value from the heuristic
+# (squash() of the evaluate() difference), everything inside is solved
+# exactly against that boundary.
+REGION_START = 21
+CELLS = NUM_SQUARES - REGION_START + 1
+PLACEMENTS = 3 ** CELLS
+PENDING_CODES = 7
+SIZE = PLACEMENTS * 2 * PENDING_CODES
+
+# File layout: header, the EvalWeights the boundary was scored with as UTF-8
+# JSON, then one u16 win probability per index.
+_MAGIC = b"SNTB"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHHIH")  # magic, version, region start, count, weights length
+_QUANT = 0xFFFF
+
+# Scale of the boundary heuristic: an evaluate() difference of SQUASH_SCALE
+# (about one extra piece out) is worth a 73% win chance.
+SQUASH_SCALE = 5e7
+
+_PLAYERS = (Player.BLACK, Player.WHITE)
+_PENDING_REQ = {THREE_TRUTHS: 3, RE_ATOUM: 2, HORUS: None}
+_POW3 = tuple(3 ** i for i in range(CELLS))
+_ROLLS = tuple(ROLL_PROBS.items())
+
+
+def squash(diff: float) -> float:
+    """Win probability for an evaluate() difference (mover minus opponent)."""
+    if diff < -40 * SQUASH_SCALE:
+        return 0.0
+    return 1.0 / (1.0 + exp(-diff / SQUASH_SCALE))
+
+
+def index_of(state) -> int | None:
+    """
+    Table index of a GameState (or SearchBoard), None outside the region.
+    Only squares count, not piece ids, so every numbering of the pieces
+    shares one index (see game.canonical).
+    """
+    placement = 0
+    for digit, positions in ((1, state.black), (2, state.white)):
+        for pos in positions:
+            if pos == OUT:
+                continue
+            if pos < REGION_START:
+                return None
+            cell = _POW3[pos - REGION_START]
+            if (placement // cell) % 3:
+                return None  # two pieces on one square
+            placement += digit * cell
+    pending = 0
+    if state.pending:
+        pp, pid, _ = state.pending
+        sq = state.pieces_of(pp)[pid]
+        if sq not in _PENDING_REQ:
+            return None
+        pending = 1 + 3 * (0 if pp == Player.BLACK else 1) + sq - THREE_TRUTHS
+    return (placement * 2 + (0 if state.turn == Player.BLACK else 1)) * PENDING_CODES + pending
+
+
+def state_of(index: int) -> GameState | None:
+    """The position behind an index (piece ids in square order), None if invalid."""
+    placement, rest = divmod(index, 2 * PENDING_CODES)
+    turn, pending = divmod(rest, PENDING_CODES)
+    black, white = [], []
+    for i in range(CELLS):
+        digit = (placement // _POW3[i]) % 3
+        if digit == 1:
+            black.append(REGION_START + i)
+        elif digit == 2:
+            white.append(REGION_START + i)
+    if len(black) > PIECES_PER_PLAYER or len(white) > PIECES_PER_PLAYER:
+        return None
+    pend = None
+    if pending:
+        side, offset = divmod(pending - 1, 3)
+        sq = THREE_TRUTHS + offset
+        mine = black if side == 0 else white
+        if sq not in mine:
+            return None
+        pend = (_PLAYERS[side], mine.index(sq), _PENDING_REQ[sq])
+    black += [OUT] * (PIECES_PER_PLAYER - len(black))
+    white += [OUT] * (PIECES_PER_PLAYER - len(white))
+    return GameState(black=tuple(black), white=tuple(white), turn=_PLAYERS[turn], pending=pend)
+
+
+def _options(board: SearchBoard, weights: EvalWeights) -> tuple:
+    # Per roll, what the side to move can choose between: an int is the
+    # index of a child inside the region (worth 1 - its value to us), a float
+    # is the fixed win probability of a terminal or boundary child.
+    mover = board.turn
+    per_roll = []
+    for roll, _ in _ROLLS:
+        opts = []
+        for mv in board.legal_moves(roll) or [None]:
+            token = board.make(mv, roll)
+            if board.is_terminal():
+                opts.append(1.0 if all(p == OUT for p in board.pieces_of(mover)) else 0.0)
+            else:
+                i = index_of(board)
+                if i is None:
+                    opp = board.turn
+                    opts.append(squash(evaluate(board, mover, weights) - evaluate(board, opp, weights)))
+                else:
+                    opts.append(i)
+            board.unmake(token)
+        per_roll.append(tuple(opts))
+    return tuple(per_roll)
+
+
+def _progress(index: int) -> int:
+    placement = index // (2 * PENDING_CODES)
+    total = 0
+    for i in range(CELLS):
+        if (placement // _POW3[i]) % 3:
+            total += REGION_START + i
+    return total
+
+
+def generate(weights: EvalWeights = DEFAULT_WEIGHTS, tolerance: float = 1e-6, max_sweeps: int = 500,
+             log_to=None) -> array:
+    """
+    Solve the region by value iteration over ROLL_PROBS. Returns the win
+    probability of the side to move per index (0.0 for invalid and
+    terminal indices).
+    """
+    start = time.perf_counter()
+    order = []
+    options = []
+    for index in sorted(range(SIZE), key=_progress, reverse=True):
+        state = state_of(index)
+        if state is None or all(p == OUT for p in state.black) or all(p == OUT for p in state.white):
+            continue
+        order.append(index)
+        options.append(_options(SearchBoard(state), weights))
+    if log_to:
+        print(f"{len(order)} positions, transitions in {time.perf_counter() - start:.1f}s", file=log_to)
+
+    # Gauss-Seidel sweeps, most advanced positions first: children mostly
+    # come before their parents, only skips and swaps loop back.
+    values = array("d", [0.0]) * SIZE
+    for index in order:
+        values[index] = 0.5
+    probs = [p for _, p in _ROLLS]
+    for sweep in range(max_sweeps):
+        delta = 0.0
+        for index, per_roll in zip(order, options):
+            v = 0.0
+            for p, opts in zip(probs, per_roll):
+                best = 0.0
+                for o in opts:
+                    w = o if o.__class__ is float else 1.0 - values[o]
+                    if w > best:
+                        best = w
+                v += p * best
+            d = abs(v - values[index])
+            if d > delta:
+                delta = d
+            values[index] = v
+        if log_to:
+            print(f"sweep {sweep + 1}: max change {delta:.2e}", file=log_to)
+        if delta < tolerance:
+            break
+    return values
+
+
+def write(path: str, values, weights: EvalWeights = DEFAULT_WEIGHTS) -> None:
+    """`values` from generate() with the same `weights`."""
+    table = array("H", (round(v * _QUANT) for v in values))
+    if sys.byteorder != "little":
+        table.byteswap()
+    meta = json.dumps(asdict(weights), sort_keys=True).encode()
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, REGION_START, len(table), len(meta)))
+        f.write(meta)
+        table.tofile(f)
+
+
+class Tablebase:
+    """
+    Read-only view of a file written by write(), memory-mapped on first use.
+    probe() gives the win probability of the side to move, value() the same
+    in evaluate() units for the search. The boundary of the table was scored
+    with `weights`, so value() refuses any others.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._table = None
+        self._weights: EvalWeights | None = None
+
+    def __getstate__(self):
+        # Only the path travels to worker processes; they map the file themselves.
+        return {"path": self.path, "_table": None, "_weights": None}
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, region, count, meta_len = _HEADER.unpack_from(self._mm)
+        if magic != _MAGIC or version != _VERSION or region != REGION_START or count != SIZE:
+            raise ValueError(f"{self.path}: not a tablebase for this version")
+        if sys.byteorder != "little":
+            raise ValueError("Tablebase files are little-endian")
+        start = _HEADER.size + meta_len
+        self._weights = EvalWeights(**json.loads(self._mm[_HEADER.size:start]))
+        self._table = memoryview(self._mm)[start:].cast("H")
+
+    @property
+    def weights(self) -> EvalWeights:
+        if self._table is None:
+            self._load()
+        return self._weights
+
+    def probe(self, state) -> float | None:
+        i = index_of(state)
+        if i is None:
+            return None
+        if self._table is None:
+            self._load()
+        return self._table[i] / _QUANT
+
+    def value(self, state, ai_player: Player, weights: EvalWeights = DEFAULT_WEIGHTS) -> float | None:
+        """
+        probe() turned into an evaluate()-scale score for `ai_player`: the
+        exact out-count term of evaluate() plus the win probability placed
+        linearly across the range the rest of evaluate() spans. So it rises
+        with the probability and stays inside eval_bounds() of the position,
+        which keeps the Star1/Star2 bounds valid. Raises ValueError for
+        weights other than the table's.
+        """
+        p = self.probe(state)
+        if p is None:
+            return None
+        if weights is not self._weights and weights != self._weights:
+            raise ValueError(f"{self.path} was built with other weights")
+        if state.turn != ai_player:
+            p = 1.0 - p
+        w = weights
+        opponent = Player.WHITE if ai_player == Player.BLACK else Player.BLACK
+        my_out = sum(1 for pos in state.pieces_of(ai_player) if pos == OUT)
+        op_out = sum(1 for pos in state.pieces_of(opponent) if pos == OUT)
+        base = my_out * w.win - op_out * w.win * w.opponent_out_factor
+        lo, hi = _rest_bounds(w)
+        return base + lo + p * (hi - lo)
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="python -m ai.tablebase",
+                                               description="Generate the bear-off tablebase")
+    parser.add_argument("-o", "--out", default="senet_tb.bin")
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    parser.add_argument("--max-sweeps", type=int, default=500)
+    parser.add_argument("--weights", default=None, help="JSON file of EvalWeights overrides")
+    return parser
+
+
+def run(args) -> int:
+    weights = DEFAULT_WEIGHTS
+    if args.weights:
+        with open(args.weights) as f:
+            weights = EvalWeights(**json.load(f))
+    values = generate(weights, tolerance=args.tolerance, max_sweeps=args.max_sweeps, log_to=sys.stderr)
+    write(args.out, values, weights)
+    print(f"wrote {args.out}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+from __future__ import annotations
+import argparse
+import json
+import struct
+import sys
+from abc import ABC, abstractmethod
+from math import isnan, nan
+from typing import Iterable, Iterator, NamedTuple
+
+from game.move import Move, MoveKind
+from game.constants import ROLL_PROBS
+
+# Record kinds. `depth` is the remaining search depth, as in the search.
+ROOT = 0         # start of a root search; depth = full depth, value unused
+ROOT_MOVE = 1    # a root move and its value
+RESULT = 2       # the chosen root move and value
+EXPECTATION = 3  # a chance node; value 0.0 on entry, the expectation or cut on exit
+EVAL = 4         # a leaf scored by the evaluation
+TABLEBASE = 5    # a leaf scored by the tablebase
+DECISION = 6     # a MAX or MIN node after a roll, on entry; value = number of moves
+MOVE = 7         # one move at a decision node and its value
+PRUNED = 8       # alpha-beta cut at a decision node
+CHANCE_CUTOFF = 9  # Star1 cut at a chance node
+ROLL = 10        # one roll's value at a finished chance node
+MAX = 11         # a decision node's result, side to move is the AI
+MIN = 12         # the same for the opponent
+
+KIND_NAMES = ("ROOT", "ROOT MOVE", "RESULT", "EXPECTATION", "EVAL", "TABLEBASE", "DECISION", "MOVE", "PRUNED",
+              "CHANCE CUTOFF", "ROLL", "MAX", "MIN")
+
+# kind, depth, roll (0 = none), move (piece_id | 8 for a promotion, -1 = none
+# or skip), alpha, beta, value. alpha/beta are NaN where they don't apply.
+RECORD = struct.Struct("<BBbbddd")
+_MAGIC = b"SNTR"
+_HEADER = struct.Struct("<4sH")
+_VERSION = 1
+
+DEFAULT_CAPACITY = 1 << 16
+
+
+class TraceRecord(NamedTuple):
+    kind: int
+    depth: int
+    roll: int
+    move: int
+    alpha: float
+    beta: float
+    value: float
+
+
+def move_code(mv: Move | None) -> int:
+    if mv is None:
+        return -1
+    return mv.piece_id | (8 if mv.kind == MoveKind.PROMOTE else 0)
+
+
+def decode_move(code: int) -> Move | None:
+    if code < 0:
+        return None
+    return Move(piece_id=code & 7, kind=MoveKind.PROMOTE if code & 8 else MoveKind.MOVE)
+
+
+class TraceSink(ABC):
+    """
+    Where the search sends its trace. record() takes the fields of a
+    TraceRecord. Records more than `max_ply` plies below the root are
+    dropped, and of the rest only every `sample_every`-th is kept (root
+    records always are). Subclasses store the kept records in _write() and
+    read them back in records().
+    """
+
+    def __init__(self, max_ply: int | None = None, sample_every: int = 1):
+        self.max_ply = max_ply
+        self.sample_every = sample_every
+        self.seen = 0
+        self.dropped = 0
+        self._min_depth = 0
+
+    def record(self, kind: int, depth: int, roll: int, move: int, alpha: float = nan, beta: float = nan,
+               value: float = 0.0):
+        if kind == ROOT and self.max_ply is not None:
+            self._min_depth = depth - self.max_ply
+        if depth < self._min_depth:
+            return
+        self.seen += 1
+        if self.seen % self.sample_every and kind > RESULT:
+            return
+        self._write(kind, depth, roll, move, alpha, beta, value)
+
+    @abstractmethod
+    def _write(self, *fields):
+        ...
+
+    @abstractmethod
+    def records(self) -> Iterator[TraceRecord]:
+        ...
+
+    def close(self):
+        pass
+
+
+class ArrayTrace(TraceSink):
+    """Records packed into a buffer of `capacity` records allocated up front; the overflow is counted in `dropped`."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, max_ply: int | None = None, sample_every: int = 1):
+        super().__init__(max_ply, sample_every)
+        self.capacity = capacity
+        self._buf = bytearray(capacity * RECORD.size)
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _write(self, *fields):
+        if self._n == self.capacity:
+            self.dropped += 1
+            return
+        RECORD.pack_into(self._buf, self._n * RECORD.size, *fields)
+        self._n += 1
+
+    def records(self) -> Iterator[TraceRecord]:
+        for fields in RECORD.iter_unpack(memoryview(self._buf)[:self._n * RECORD.size]):
+            yield TraceRecord(*fields)
+
+    def __getstate__(self):
+        # Only the used part of the buffer travels between processes.
+        state = dict(self.__dict__)
+        state["_buf"] = bytes(self._buf[:self._n * RECORD.size])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        buf = bytearray(self.capacity * RECORD.size)
+        buf[:len(state["_buf"])] = state["_buf"]
+        self._buf = buf
+
+
+class FileTrace(TraceSink):
+    """Records streamed to `path`: binary, or JSON lines when the name ends in .jsonl."""
+
+    def __init__(self, path: str, max_ply: int | None = None, sample_every: int = 1):
+        super().__init__(max_ply, sample_every)
+        self.path = path
+        self.jsonl = path.endswith(".jsonl")
+        self._f = open(path, "w" if self.jsonl else "wb")
+        if not self.jsonl:
+            self._f.write(_HEADER.pack(_MAGIC, _VERSION))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, *fields):
+        if self.jsonl:
+            rec = TraceRecord(*fields)._asdict()
+            for k in ("alpha", "beta"):
+                if isnan(rec[k]):
+                    rec[k] = None
+            self._f.write(json.dumps(rec) + "\n")
+        else:
+            self._f.write(RECORD.pack(*fields))
+
+    def records(self) -> Iterator[TraceRecord]:
+        self._f.flush()
+        return read_trace(self.path)
+
+    def close(self):
+        self._f.close()
+
+
+def read_trace(path: str) -> Iterator[TraceRecord]:
+    if path.endswith(".jsonl"):
+        with open(path) as f:
+            for line in f:
+                rec = json.loads(line)
+                for k in ("alpha", "beta"):
+                    if rec[k] is None:
+                        rec[k] = nan
+                yield TraceRecord(**rec)
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{path}: not a search trace for this version")
+    for fields in RECORD.iter_unpack(data[_HEADER.size:]):
+        yield TraceRecord(*fields)
+
+
+def _move_str(code: int) -> str:
+    mv = decode_move(code)
+    return f"piece#{mv.piece_id} {mv.kind.value}" if mv is not None else "None"
+
+
+def _window(r: TraceRecord) -> str:
+    out = ""
+    if not isnan(r.alpha):
+        out += f", Alpha={r.alpha:.2f}"
+    if not isnan(r.beta):
+        out += f", Beta={r.beta:.2f}"
+    return out
+
+
+def format_record(r: TraceRecord, root_depth: int) -> str:
+    """One record as a line of text, indented by its ply below a root search of `root_depth`."""
+    indent = "  " * (root_depth - r.depth)
+    roll = f", Roll={r.roll}" if r.roll else ""
+    k = r.kind
+    if k == ROOT:
+        return f"=== ROOT: Depth={r.depth}{roll}, Moves={int(r.value)} ==="
+    if k == ROOT_MOVE:
+        return f"Root Move={_move_str(r.move)}, Value={r.value:.2f}"
+    if k == RESULT:
+        return f"=== RESULT: Best Move={_move_str(r.move)}, Value={r.value:.2f} ==="
+    if k == DECISION:
+        return f"{indent}[DECISION] Depth={r.depth}{roll}, Moves={int(r.value)}{_window(r)}"
+    if k == MOVE:
+        return f"{indent}  Move={_move_str(r.move)}, Value={r.value:.2f}"
+    if k == PRUNED:
+        return f"{indent}  [PRUNED]{_window(r)[1:]}"
+    if k == CHANCE_CUTOFF:
+        return f"{indent}  [CHANCE CUTOFF]{roll[1:]}, Value={r.value:.2f}"
+    if k == ROLL:
+        p = ROLL_PROBS[r.roll]
+        return f"{indent}  Roll={r.roll}, Prob={p:.3f}, Value={r.value:.2f}, Weighted={p * r.value:.2f}"
+    line = f"{indent}[{KIND_NAMES[k]}] Depth={r.depth}{roll}"
+    if r.move >= 0:
+        line += f", Move={_move_str(r.move)}"
+    line += f"{_window(r)}, Value={r.value:.2f}"
+    if k in (EVAL, TABLEBASE):
+        line += " [LEAF]"
+    return line
+
+
+def format_trace(records: Iterable[TraceRecord], max_ply: int | None = None) -> Iterator[str]:
+    root_depth = 0
+    for r in records:
+        if r.kind == ROOT:
+            root_depth = r.depth
+        if max_ply is None or root_depth - r.depth <= max_ply:
+            yield format_record(r, root_depth)
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="python -m ai.trace", description="Pretty-print a search trace")
+    parser.add_argument("path", help="trace file (binary, or .jsonl)")
+    parser.add_argument("--max-ply", type=int, default=None, help="only records this many plies below each root")
+    return parser
+
+
+def run(args) -> int:
+    for line in format_trace(read_trace(args.path), args.max_ply):
+        print(line)
+    return 0
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
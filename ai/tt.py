@@ -0,0 +1,113 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import NamedTuple
+from game.state import Player
+from game.zobrist import ROLL_KEYS
+
+EXACT = 0
+LOWER = 1  # value is a lower bound (search failed high)
+UPPER = 2  # value is an upper bound (search failed low)
+
+class TTEntry(NamedTuple):
+    key: int
+    depth: int
+    value: float
+    bound: int
+    move: int  # game.canonical.square_move() code of the best move
+
+class TranspositionTable:
+    """
+    Bounded table of search results keyed by game.zobrist.position_hash(),
+    so positions that differ only in piece numbering share an entry; the
+    best move is stored by its square for the same reason.
+
+    policy="depth": fixed slot array indexed by key, a colliding entry is only
+    replaced by a result searched at least as deep.
+    policy="lru": keeps the most recently used entries.
+    """
+
+    def __init__(self, max_entries: int = 1 << 18, policy: str = "depth"):
+        if policy not in ("depth", "lru"):
+            raise ValueError(f"Unknown replacement policy: {policy}")
+        self.max_entries = max_entries
+        self.policy = policy
+        self.clear()
+
+    def clear(self):
+        if self.policy == "depth":
+            self._slots: list[TTEntry | None] = [None] * self.max_entries
+        else:
+            self._lru: OrderedDict[int, TTEntry] = OrderedDict()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count if self.policy == "depth" else len(self._lru)
+
+    def probe(self, key: int) -> TTEntry | None:
+        if self.policy == "depth":
+            e = self._slots[key % self.max_entries]
+            return e if e is not None and e.key == key else None
+        e = self._lru.get(key)
+        if e is not None:
+            self._lru.move_to_end(key)
+        return e
+
+    def store(self, key: int, depth: int, value: float, bound: int, move: int):
+        entry = TTEntry(key, depth, value, bound, move)
+        if self.policy == "depth":
+            i = key % self.max_entries
+            old = self._slots[i]
+            if old is None:
+                self._count += 1
+            elif old.key != key and old.depth > depth:
+                return
+            self._slots[i] = entry
+            return
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+# Values are from the AI's point of view, so the same position searched for the
+# other colour must not share an entry.
+_AI_WHITE_KEY = 0x9E3779B97F4A7C15
+
+def decision_key(h: int, roll: int, ai_player: Player) -> int:
+    key = h ^ ROLL_KEYS[roll]
+    return key ^ _AI_WHITE_KEY if ai_player == Player.WHITE else key
+
+class ChanceCache:
+    """
+    Exact chance-node values by (position_hash(), remaining depth, AI side),
+    keeping the `max_entries` most recently used. Unlike the table's entries
+    these hold no bounds: a chance node is only stored when all its rolls
+    were searched, and then its value does not depend on the window it was
+    searched with. Values also depend on the weights and tablebase, so share
+    a cache only between searches that use the same ones (one AI turn).
+    """
+
+    def __init__(self, max_entries: int = 1 << 16):
+        self.max_entries = max_entries
+        self._lru: OrderedDict[int, float] = OrderedDict()
+
+    def clear(self):
+        self._lru.clear()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    @staticmethod
+    def key(h: int, depth: int, ai_player: Player) -> int:
+        return (h << 6) | (depth << 1) | (ai_player == Player.WHITE)
+
+    def get(self, key: int) -> float | None:
+        v = self._lru.get(key)
+        if v is not None:
+            self._lru.move_to_end(key)
+        return v
+
+    def put(self, key: int, value: float):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from game.state import GameState, Player
+from .expectiminimax import choose_best_move_timed, SearchStats
+from .tt import TranspositionTable
+from .book import OpeningBook
+from .mcts import MCTS
+
+ENGINES = ("expectiminimax", "mcts")
+# MCTS has no depth; each step of the requested depth buys it this much time.
+MCTS_MS_PER_DEPTH = 1000.0
+
+# Per-process state of the search worker. The table lives here so it survives
+# from one AI turn to the next.
+_cancel = None
+_nodes = None
+_tt: TranspositionTable | None = None
+_book: OpeningBook | None = None
+_mcts: MCTS | None = None
+
+
+def _init_worker(cancel, nodes, engine, book):
+    global _cancel, _nodes, _tt, _book, _mcts
+    _cancel = cancel
+    _nodes = nodes
+    if engine == "mcts":
+        _mcts = MCTS()
+    else:
+        _tt = TranspositionTable()
+        _book = OpeningBook(book) if book else None
+
+
+def _report(stats: SearchStats):
+    _nodes.value = stats.nodes
+
+
+def _search(state: GameState, ai_player: Player, roll: int, depth: int, print_tree: bool):
+    if _mcts is not None:
+        return _mcts.choose_move(state, ai_player, roll, depth * MCTS_MS_PER_DEPTH, print_tree=print_tree,
+                                 should_stop=_cancel.is_set, on_progress=_report)
+    return choose_best_move_timed(state, ai_player, roll, None, max_depth=depth, tt=_tt, print_tree=print_tree,
+                                  should_stop=_cancel.is_set, on_progress=_report, book=_book)
+
+
+class BackgroundSearch:
+    """
+    Runs the AI search in a separate process so the caller (the Tk main loop)
+    stays responsive. Poll done()/nodes(); move_now() makes the search return
+    the deepest depth it has finished so far. engine="mcts" searches with
+    ai.mcts instead, keeping its tree from one turn to the next. `book`:
+    path of an opening book for the expectiminimax engine.
+    """
+
+    def __init__(self, engine: str = "expectiminimax", book: str | None = None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        # spawn: never fork a process that holds a Tk connection.
+        ctx = multiprocessing.get_context("spawn")
+        self._cancel = ctx.Event()
+        self._nodes = ctx.Value("q", 0, lock=False)
+        self._pool = ProcessPoolExecutor(max_workers=1, mp_context=ctx, initializer=_init_worker,
+                                         initargs=(self._cancel, self._nodes, engine, book))
+        self._future: Future | None = None
+
+    def start(self, state: GameState, ai_player: Player, roll: int, depth: int, print_tree: bool = False):
+        self._cancel.clear()
+        self._nodes.value = 0
+        self._future = self._pool.submit(_search, state, ai_player, roll, depth, print_tree)
+
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def done(self) -> bool:
+        return self._future is not None and self._future.done()
+
+    def nodes(self) -> int:
+        return self._nodes.value
+
+    def result(self):
+        future, self._future = self._future, None
+        return future.result()
+
+    def move_now(self):
+        self._cancel.set()
+
+    def shutdown(self):
+        self._cancel.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
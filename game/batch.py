@@ -0,0 +1,229 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+import numpy as np
+
+from .state import GameState, Player, OUT
+from .constants import (
+    NUM_SQUARES, PIECES_PER_PLAYER, REBIRTH, HAPPINESS, WATER, THREE_TRUTHS, RE_ATOUM, HORUS,
+)
+from . import rules
+
+# Many games stepped in lockstep. Sides are 0 = BLACK, 1 = WHITE. A move is a
+# piece id per game; whether it is a plain move or a promotion follows from
+# the position and roll (a piece never has both), see legal_mask(). -1 means
+# the game skips its turn.
+_PLAYERS = (Player.BLACK, Player.WHITE)
+
+
+@dataclass
+class BatchState:
+    pos: np.ndarray           # (M, 2, 7) int8, positions per side and piece
+    turn: np.ndarray          # (M,) int8
+    pending: np.ndarray       # (M,) bool, a pending obligation exists
+    pend_player: np.ndarray   # (M,) int8
+    pend_pid: np.ndarray      # (M,) int8
+    pend_req: np.ndarray      # (M,) int8, required roll, 0 = any
+
+    def __len__(self) -> int:
+        return len(self.turn)
+
+
+def initial(m: int) -> BatchState:
+    return from_states([rules.initial_state()] * m)
+
+
+def from_states(states: list[GameState]) -> BatchState:
+    m = len(states)
+    b = BatchState(
+        pos=np.array([[s.black, s.white] for s in states], dtype=np.int8).reshape(m, 2, PIECES_PER_PLAYER),
+        turn=np.array([0 if s.turn == Player.BLACK else 1 for s in states], dtype=np.int8),
+        pending=np.zeros(m, dtype=bool),
+        pend_player=np.zeros(m, dtype=np.int8),
+        pend_pid=np.zeros(m, dtype=np.int8),
+        pend_req=np.zeros(m, dtype=np.int8),
+    )
+    for i, s in enumerate(states):
+        if s.pending:
+            pp, pid, req = s.pending
+            b.pending[i] = True
+            b.pend_player[i] = 0 if pp == Player.BLACK else 1
+            b.pend_pid[i] = pid
+            b.pend_req[i] = req or 0
+    return b
+
+
+def to_states(b: BatchState) -> list[GameState]:
+    out = []
+    for i in range(len(b)):
+        pending = None
+        if b.pending[i]:
+            pending = (_PLAYERS[b.pend_player[i]], int(b.pend_pid[i]), int(b.pend_req[i]) or None)
+        out.append(GameState(black=tuple(int(p) for p in b.pos[i, 0]), white=tuple(int(p) for p in b.pos[i, 1]),
+                             turn=_PLAYERS[b.turn[i]], pending=pending))
+    return out
+
+
+def is_terminal(b: BatchState) -> np.ndarray:
+    return (b.pos == OUT).all(axis=2).any(axis=1)
+
+
+def winner(b: BatchState) -> np.ndarray:
+    """Winning side per game, -1 while it is still going."""
+    done = (b.pos == OUT).all(axis=2)
+    return np.where(done[:, 0], 0, np.where(done[:, 1], 1, -1))
+
+
+def _occupancy(pos: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # (k, 31) per-square occupancy of each side; column 0 (OUT) is junk.
+    k = len(pos)
+    rows = np.repeat(np.arange(k), PIECES_PER_PLAYER)
+    black = np.zeros((k, NUM_SQUARES + 1), dtype=bool)
+    white = np.zeros((k, NUM_SQUARES + 1), dtype=bool)
+    black[rows, pos[:, 0].ravel()] = True
+    white[rows, pos[:, 1].ravel()] = True
+    return black, white
+
+
+def legal_mask(b: BatchState, rolls: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (legal, promote), both (M, 7) bool: which pieces have a legal move under
+    each game's roll, and whether that move is a promotion. The same moves
+    as game.rules.legal_moves.
+    """
+    m = len(b)
+    games = np.arange(m)
+    rolls = np.asarray(rolls, dtype=np.int16)
+    turn = b.turn.astype(np.intp)
+    my = b.pos[games, turn].astype(np.int16)
+    black, white = _occupancy(b.pos)
+    # White owns a square both colours share (rules._occupied_map).
+    mine_occ = np.where(turn[:, None] == 1, white, black & ~white)
+    theirs_occ = np.where(turn[:, None] == 1, black & ~white, white)
+
+    r = rolls[:, None]
+    to = my + r
+    on = my != OUT
+    happy_promote = on & (my == HAPPINESS) & (r == 5)
+    ok = on & ~happy_promote
+    ok &= ~((my == THREE_TRUTHS) & (r != 3))
+    ok &= ~((my == RE_ATOUM) & (r != 2))
+    ok &= to <= NUM_SQUARES
+    ok &= ~((my < HAPPINESS) & (to > HAPPINESS))
+    to_c = np.minimum(to, NUM_SQUARES)
+    ok &= ~np.take_along_axis(mine_occ, to_c, axis=1)
+    ok &= ~(np.take_along_axis(theirs_occ, to_c, axis=1) & (to > HAPPINESS))
+
+    promote = happy_promote.copy()
+    pend = b.pending & (b.pend_player == b.turn)
+    pend_pos = my[games, b.pend_pid]
+    pend &= (pend_pos == THREE_TRUTHS) | (pend_pos == RE_ATOUM) | (pend_pos == HORUS)
+    pend &= (b.pend_req == 0) | (rolls == b.pend_req)
+    promote[games[pend], b.pend_pid[pend]] = True
+
+    legal = ok | promote
+    done = is_terminal(b)
+    legal[done] = False
+    promote[done] = False
+    return legal, promote
+
+
+def _rebirth(b: BatchState, games: np.ndarray, side: np.ndarray, pid: np.ndarray):
+    # rules._rebirth_target for one piece in each of `games`: square 15 if
+    # free, else the nearest free square below it, else the nearest above,
+    # else stay.
+    if not len(games):
+        return
+    black, white = _occupancy(b.pos[games])
+    free = ~(black | white)
+    free[:, OUT] = False
+    below = free[:, 1:REBIRTH]
+    above = free[:, REBIRTH + 1:]
+    below_sq = REBIRTH - 1 - np.argmax(below[:, ::-1], axis=1)
+    above_sq = REBIRTH + 1 + np.argmax(above, axis=1)
+    current = b.pos[games, side, pid]
+    target = np.where(free[:, REBIRTH], REBIRTH,
+                      np.where(below.any(axis=1), below_sq,
+                               np.where(above.any(axis=1), above_sq, current)))
+    b.pos[games, side, pid] = target
+
+
+def apply(b: BatchState, rolls: np.ndarray, pids: np.ndarray, promote: np.ndarray | None = None):
+    """
+    Play one move per game in place: piece pids[i] (trusted legal under
+    rolls[i]), or a skip where pids[i] is -1. `promote` is the promote mask
+    from legal_mask() for the same rolls; it is recomputed when omitted.
+    Games that are already over are left alone.
+    """
+    m = len(b)
+    games = np.arange(m)
+    rolls = np.asarray(rolls, dtype=np.int16)
+    pids = np.asarray(pids, dtype=np.intp)
+    if promote is None:
+        _, promote = legal_mask(b, rolls)
+    live = ~is_terminal(b)
+    moving = live & (pids >= 0)
+    safe_pids = np.maximum(pids, 0)
+    is_promote = moving & promote[games, safe_pids]
+    promoted = np.where(is_promote, pids, -1)
+    turn = b.turn.astype(np.intp)
+
+    # Start of the turn (rules._settle_obligations): our pending piece is
+    # reborn unless this move promotes it, and so is anything on 28/29 the
+    # roll can't take out.
+    own = live & b.pending & (b.pend_player == b.turn)
+    kept = (promoted == b.pend_pid) & ((b.pend_req == 0) | (rolls == b.pend_req))
+    fail = own & ~kept
+    _rebirth(b, games[fail], turn[fail], b.pend_pid[fail].astype(np.intp))
+    b.pending[own] = False
+    for pid in range(PIECES_PER_PLAYER):
+        sq = b.pos[games, turn, pid]
+        stuck = live & (promoted != pid) & (((sq == THREE_TRUTHS) & (rolls != 3)) | ((sq == RE_ATOUM) & (rolls != 2)))
+        _rebirth(b, games[stuck], turn[stuck], np.full(int(stuck.sum()), pid))
+
+    g = games[is_promote]
+    b.pos[g, turn[g], pids[g]] = OUT
+
+    plain = moving & ~is_promote
+    g = games[plain]
+    t = turn[g]
+    op = 1 - t
+    p = pids[g]
+    from_sq = b.pos[g, t, p].astype(np.int16)
+    to_sq = from_sq + rolls[g]
+    black, white = _occupancy(b.pos[g])
+    cols = np.arange(len(g))
+    to_black = black[cols, to_sq]
+    to_white = white[cols, to_sq]
+    swap = np.where(t == 1, to_black & ~to_white, to_white)
+    # Swap: our first piece on from_sq trades places with their last piece
+    # on to_sq.
+    mine = b.pos[g, t]
+    theirs = b.pos[g, op]
+    mover = np.argmax(mine == from_sq[:, None], axis=1)
+    victim = PIECES_PER_PLAYER - 1 - np.argmax((theirs == to_sq[:, None])[:, ::-1], axis=1)
+    s = swap
+    b.pos[g[s], op[s], victim[s]] = from_sq[s]
+    b.pos[g[s], t[s], mover[s]] = to_sq[s]
+    b.pos[g[~s], t[~s], p[~s]] = to_sq[~s]
+
+    landed = b.pos[g, t, p]
+    water = landed == WATER
+    _rebirth(b, g[water], t[water], p[water])
+    for sq, req in ((THREE_TRUTHS, 3), (RE_ATOUM, 2), (HORUS, 0)):
+        hit = landed == sq
+        gh = g[hit]
+        b.pending[gh] = True
+        b.pend_player[gh] = t[hit]
+        b.pend_pid[gh] = p[hit]
+        b.pend_req[gh] = req
+
+    b.turn[live] ^= 1
+
+
+def random_pids(legal: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """A uniformly random legal piece per game, -1 where there is none."""
+    noise = rng.random(legal.shape)
+    noise[~legal] = -1.0
+    pids = np.argmax(noise, axis=1)
+    return np.where(legal.any(axis=1), pids, -1)
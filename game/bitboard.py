@@ -0,0 +1,237 @@
+from __future__ import annotations
+from .state import GameState, Player, OUT
+from .move import Move, MoveKind
+from .constants import (
+    NUM_SQUARES, PIECES_PER_PLAYER, REBIRTH, HAPPINESS, WATER, THREE_TRUTHS, RE_ATOUM, HORUS,
+)
+from . import rules
+
+# Packed state layout (a single Python int, hashable and cheap to compare):
+#   bits   0..29  black occupancy mask (square s -> bit s-1)
+#   bits  30..59  white occupancy mask
+#   bits  60..94  black positions, 5 bits per piece (piece i at 60 + 5*i)
+#   bits  95..129 white positions
+#   bit   130     side to move (0 = BLACK, 1 = WHITE)
+#   bits 131..137 pending: present(1) | player(1) | piece_id(3) | required_roll(2)
+#                 required_roll 0 means ANY (Horus)
+#
+# Occupancy follows rules._occupied_map: when a square somehow holds pieces of
+# both colours the white piece owns it, so "black owns s" is black & ~white.
+
+SQUARES_MASK = (1 << NUM_SQUARES) - 1
+WHITE_MASK_SHIFT = NUM_SQUARES
+BLACK_POS_SHIFT = 2 * NUM_SQUARES
+WHITE_POS_SHIFT = BLACK_POS_SHIFT + 5 * PIECES_PER_PLAYER
+TURN_SHIFT = WHITE_POS_SHIFT + 5 * PIECES_PER_PLAYER
+PENDING_SHIFT = TURN_SHIFT + 1
+
+_POS_MASK = 0x1F
+_BLACK_SHIFTS = tuple(BLACK_POS_SHIFT + 5 * i for i in range(PIECES_PER_PLAYER))
+_WHITE_SHIFTS = tuple(WHITE_POS_SHIFT + 5 * i for i in range(PIECES_PER_PLAYER))
+_SIDE_SHIFTS = (_BLACK_SHIFTS, _WHITE_SHIFTS)
+_BELOW_REBIRTH = (1 << (REBIRTH - 1)) - 1
+_PLAYERS = (Player.BLACK, Player.WHITE)
+
+MOVES = tuple(Move(piece_id=i, kind=MoveKind.MOVE) for i in range(PIECES_PER_PLAYER))
+PROMOTES = tuple(Move(piece_id=i, kind=MoveKind.PROMOTE) for i in range(PIECES_PER_PLAYER))
+
+
+def _mask(positions) -> int:
+    m = 0
+    for s in positions:
+        if s:
+            m |= 1 << (s - 1)
+    return m
+
+
+def _positions(code: int, side: int) -> list[int]:
+    return [(code >> sh) & _POS_MASK for sh in _SIDE_SHIFTS[side]]
+
+
+def _encode(black, white, turn: int, pending: int) -> int:
+    code = _mask(black) | (_mask(white) << WHITE_MASK_SHIFT)
+    for sh, s in zip(_BLACK_SHIFTS, black):
+        code |= s << sh
+    for sh, s in zip(_WHITE_SHIFTS, white):
+        code |= s << sh
+    return code | (turn << TURN_SHIFT) | (pending << PENDING_SHIFT)
+
+
+def _pending_code(player: int, piece_id: int, req: int) -> int:
+    return 1 | (player << 1) | (piece_id << 2) | (req << 5)
+
+
+def pack(state: GameState) -> int:
+    turn = 0 if state.turn == Player.BLACK else 1
+    pending = 0
+    if state.pending:
+        pp, pid, req = state.pending
+        pending = _pending_code(0 if pp == Player.BLACK else 1, pid, req or 0)
+    return _encode(state.black, state.white, turn, pending)
+
+
+def unpack(code: int) -> GameState:
+    pending = None
+    pend = code >> PENDING_SHIFT
+    if pend & 1:
+        req = pend >> 5
+        pending = (_PLAYERS[(pend >> 1) & 1], (pend >> 2) & 7, req or None)
+    return GameState(
+        black=tuple(_positions(code, 0)),
+        white=tuple(_positions(code, 1)),
+        turn=_PLAYERS[(code >> TURN_SHIFT) & 1],
+        pending=pending,
+    )
+
+
+def initial_state() -> int:
+    return pack(rules.initial_state())
+
+
+def turn_of(code: int) -> Player:
+    return _PLAYERS[(code >> TURN_SHIFT) & 1]
+
+
+def is_terminal(code: int) -> bool:
+    return not (code & SQUARES_MASK) or not ((code >> WHITE_MASK_SHIFT) & SQUARES_MASK)
+
+
+def winner(code: int) -> Player | None:
+    if not (code & SQUARES_MASK):
+        return Player.BLACK
+    if not ((code >> WHITE_MASK_SHIFT) & SQUARES_MASK):
+        return Player.WHITE
+    return None
+
+
+def legal_moves(code: int, roll: int) -> list[Move]:
+    black = code & SQUARES_MASK
+    white = (code >> WHITE_MASK_SHIFT) & SQUARES_MASK
+    if not black or not white:
+        return []
+
+    turn = (code >> TURN_SHIFT) & 1
+    if turn:
+        mine, theirs = white, black & ~white
+    else:
+        mine, theirs = black & ~white, white
+
+    moves: list[Move] = []
+    pend = code >> PENDING_SHIFT
+    if pend & 1 and (pend >> 1) & 1 == turn:
+        pid = (pend >> 2) & 7
+        req = pend >> 5
+        if (code >> _SIDE_SHIFTS[turn][pid]) & _POS_MASK in (THREE_TRUTHS, RE_ATOUM, HORUS):
+            if not req or roll == req:
+                moves.append(PROMOTES[pid])
+
+    for pid, sh in enumerate(_SIDE_SHIFTS[turn]):
+        from_sq = (code >> sh) & _POS_MASK
+        if from_sq == OUT:
+            continue
+        if from_sq == HAPPINESS and roll == 5:
+            moves.append(PROMOTES[pid])
+            continue
+        if from_sq == THREE_TRUTHS and roll != 3:
+            continue
+        if from_sq == RE_ATOUM and roll != 2:
+            continue
+        to_sq = from_sq + roll
+        if to_sq > NUM_SQUARES:
+            continue
+        if from_sq < HAPPINESS < to_sq:
+            continue
+        bit = 1 << (to_sq - 1)
+        if mine & bit:
+            continue
+        if theirs & bit and to_sq > HAPPINESS:
+            continue
+        moves.append(MOVES[pid])
+
+    return moves
+
+
+def _send_to_rebirth(me: list[int], op: list[int], piece_id: int) -> None:
+    free = ~(_mask(me) | _mask(op)) & SQUARES_MASK
+    if free >> (REBIRTH - 1) & 1:
+        me[piece_id] = REBIRTH
+        return
+    below = free & _BELOW_REBIRTH
+    if below:
+        me[piece_id] = below.bit_length()
+        return
+    above = free >> REBIRTH
+    if above:
+        me[piece_id] = (above & -above).bit_length() + REBIRTH
+
+
+def _clear_obligations(me: list[int], op: list[int], turn: int, pend: int, roll: int,
+                       promoted: int | None) -> int:
+    # Shared prefix of apply_move/skip_turn: settle our own pending piece and send
+    # back anything stranded on 28/29 that this roll cannot take out.
+    if pend & 1 and (pend >> 1) & 1 == turn:
+        pid = (pend >> 2) & 7
+        req = pend >> 5
+        if not (promoted == pid and (not req or roll == req)):
+            _send_to_rebirth(me, op, pid)
+        pend = 0
+    for pid in range(PIECES_PER_PLAYER):
+        from_sq = me[pid]
+        if from_sq == THREE_TRUTHS and roll != 3 and promoted != pid:
+            _send_to_rebirth(me, op, pid)
+        elif from_sq == RE_ATOUM and roll != 2 and promoted != pid:
+            _send_to_rebirth(me, op, pid)
+    return pend
+
+
+def apply_move(code: int, roll: int, move: Move) -> int:
+    if move not in legal_moves(code, roll):
+        raise ValueError("Illegal move")
+
+    turn = (code >> TURN_SHIFT) & 1
+    black = _positions(code, 0)
+    white = _positions(code, 1)
+    me, op = (white, black) if turn else (black, white)
+    pid = move.piece_id
+    promote = move.kind == MoveKind.PROMOTE
+
+    pend = _clear_obligations(me, op, turn, code >> PENDING_SHIFT, roll, pid if promote else None)
+
+    if promote:
+        me[pid] = OUT
+        return _encode(black, white, turn ^ 1, pend)
+
+    from_sq = me[pid]
+    to_sq = from_sq + roll
+    if to_sq in op and (not turn or to_sq not in white):
+        if to_sq > HAPPINESS:
+            raise ValueError("Illegal: cannot capture beyond 26")
+        # Same swap as game.rules: the first of our pieces on from_sq trades
+        # places with the last of theirs on to_sq.
+        mover = me.index(from_sq)
+        victim = PIECES_PER_PLAYER - 1 - op[::-1].index(to_sq)
+        me[mover] = to_sq
+        op[victim] = from_sq
+    else:
+        me[pid] = to_sq
+
+    landed = me[pid]
+    if landed == WATER:
+        _send_to_rebirth(me, op, pid)
+    elif landed == THREE_TRUTHS:
+        pend = _pending_code(turn, pid, 3)
+    elif landed == RE_ATOUM:
+        pend = _pending_code(turn, pid, 2)
+    elif landed == HORUS:
+        pend = _pending_code(turn, pid, 0)
+
+    return _encode(black, white, turn ^ 1, pend)
+
+
+def skip_turn(code: int, roll: int) -> int:
+    turn = (code >> TURN_SHIFT) & 1
+    black = _positions(code, 0)
+    white = _positions(code, 1)
+    me, op = (white, black) if turn else (black, white)
+    pend = _clear_obligations(me, op, turn, code >> PENDING_SHIFT, roll, None)
+    return _encode(black, white, turn ^ 1, pend)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+from .state import GameState, Player, OUT
+from .move import Move, MoveKind
+from .constants import (
+    NUM_SQUARES, PIECES_PER_PLAYER, REBIRTH, HAPPINESS, WATER, THREE_TRUTHS, RE_ATOUM, HORUS,
+)
+from .bitboard import MOVES, PROMOTES
+from .zobrist import SQUARE_KEYS, WHITE_TO_MOVE_KEY, PENDING_REQ_KEYS, position_hash
+
+_PLAYERS = (Player.BLACK, Player.WHITE)
+
+# Pending obligations as small ints so they fit on the undo stack:
+# 0 = none, otherwise 1 | player << 1 | piece_id << 2 | required_roll << 5
+# (required_roll 0 = ANY), the same code as game.bitboard.
+_PENDING = {0: None}
+_PENDING_HASH = {0: 0}
+for _pl in (0, 1):
+    for _pid in range(PIECES_PER_PLAYER):
+        for _req in (0, 2, 3):
+            _code = 1 | (_pl << 1) | (_pid << 2) | (_req << 5)
+            _PENDING[_code] = (_PLAYERS[_pl], _pid, _req or None)
+            _PENDING_HASH[_code] = PENDING_REQ_KEYS[_pl][_req]
+
+# Undo stack entries for a piece move, side << 8 | piece_id << 5 | square,
+# built once so pushing one doesn't allocate an int.
+_UNDO = tuple(tuple(tuple((_side << 8) | (_pid << 5) | _sq for _sq in range(NUM_SQUARES + 1))
+                    for _pid in range(PIECES_PER_PLAYER)) for _side in (0, 1))
+
+
+def _pending_code(pending) -> int:
+    if not pending:
+        return 0
+    pp, pid, req = pending
+    return 1 | ((0 if pp == Player.BLACK else 1) << 1) | (pid << 2) | ((req or 0) << 5)
+
+
+class SearchBoard:
+    """
+    Mutable position for the search: make() plays a move in place and returns
+    an undo token, unmake(token) takes it back. Follows game.rules exactly,
+    including rebirth relocation, swaps, water and the pending 28/29/30
+    obligations, and keeps game.zobrist.position_hash() of the position in
+    `hash`.
+
+    Undo information goes on one flat int stack: the previous hash and
+    pending code, then one entry per piece moved. unmake() puts the saved
+    hash back rather than recomputing it, which saves the big-int
+    arithmetic (and its allocations) on the way up.
+
+    `listener.move_piece(side, from_sq, to_sq)` (side 0 = BLACK, 1 = WHITE)
+    is told about every piece that moves, unmake included; an
+    ai.incremental.IncrementalEval fits.
+
+    black, white, turn, pending and pieces_of() read like a GameState, so
+    functions written against GameState (evaluate, move ordering) also
+    accept a board.
+    """
+
+    def __init__(self, state: GameState, listener=None):
+        self.black = list(state.black)
+        self.white = list(state.white)
+        self.turn = state.turn
+        self._turn = 0 if state.turn == Player.BLACK else 1
+        self._pending = _pending_code(state.pending)
+        self.hash = position_hash(state)
+        self.listener = listener
+        self._sides = (self.black, self.white)
+        # counts[side][sq]: pieces of that side on sq, counts[side][OUT] are out
+        self.counts = ([0] * (NUM_SQUARES + 1), [0] * (NUM_SQUARES + 1))
+        for side, positions in enumerate(self._sides):
+            for sq in positions:
+                self.counts[side][sq] += 1
+        self._stack: list[int] = []
+
+    @property
+    def pending(self):
+        return _PENDING[self._pending]
+
+    def pieces_of(self, p: Player) -> list[int]:
+        return self.black if p == Player.BLACK else self.white
+
+    def to_state(self) -> GameState:
+        return GameState(black=tuple(self.black), white=tuple(self.white), turn=self.turn, pending=self.pending)
+
+    def is_terminal(self) -> bool:
+        return self.counts[0][OUT] == PIECES_PER_PLAYER or self.counts[1][OUT] == PIECES_PER_PLAYER
+
+    def legal_moves(self, roll: int) -> list[Move]:
+        """Same moves in the same order as game.rules.legal_moves."""
+        if self.is_terminal():
+            return []
+        turn = self._turn
+        my = self._sides[turn]
+        mine, theirs = self.counts[turn], self.counts[turn ^ 1]
+        moves: list[Move] = []
+
+        pend = self._pending
+        if pend and (pend >> 1) & 1 == turn:
+            pid = (pend >> 2) & 7
+            req = pend >> 5
+            if my[pid] in (THREE_TRUTHS, RE_ATOUM, HORUS) and (not req or roll == req):
+                moves.append(PROMOTES[pid])
+
+        for pid, from_sq in enumerate(my):
+            if from_sq == OUT:
+                continue
+            if from_sq == HAPPINESS and roll == 5:
+                moves.append(PROMOTES[pid])
+                continue
+            if from_sq == THREE_TRUTHS and roll != 3:
+                continue
+            if from_sq == RE_ATOUM and roll != 2:
+                continue
+            to_sq = from_sq + roll
+            if to_sq > NUM_SQUARES:
+                continue
+            if from_sq < HAPPINESS < to_sq:
+                continue
+            # White owns a square both colours share (see rules._occupied_map).
+            if turn:
+                if mine[to_sq]:
+                    continue
+                if theirs[to_sq] and to_sq > HAPPINESS:
+                    continue
+            else:
+                if mine[to_sq] and not theirs[to_sq]:
+                    continue
+                if theirs[to_sq] and to_sq > HAPPINESS:
+                    continue
+            moves.append(MOVES[pid])
+        return moves
+
+    def _relocate(self, side: int, pid: int, to_sq: int):
+        positions = self._sides[side]
+        from_sq = positions[pid]
+        positions[pid] = to_sq
+        c = self.counts[side]
+        c[from_sq] -= 1
+        c[to_sq] += 1
+        keys = SQUARE_KEYS[side]
+        self.hash += keys[to_sq] - keys[from_sq]
+        self._stack.append(_UNDO[side][pid][from_sq])
+        if self.listener is not None:
+            self.listener.move_piece(side, from_sq, to_sq)
+
+    def _rebirth_target(self, current_pos: int) -> int:
+        black, white = self.counts
+        if not (black[REBIRTH] or white[REBIRTH]):
+            return REBIRTH
+        for s in range(REBIRTH - 1, 0, -1):
+            if not (black[s] or white[s]):
+                return s
+        for s in range(REBIRTH + 1, NUM_SQUARES + 1):
+            if not (black[s] or white[s]):
+                return s
+        return current_pos
+
+    def _set_pending(self, code: int):
+        self.hash += _PENDING_HASH[code] - _PENDING_HASH[self._pending]
+        self._pending = code
+
+    def make(self, move: Move | None, roll: int) -> int:
+        """
+        Play `move` (trusted to be legal), or skip the turn when it is None.
+        Returns the token for unmake().
+        """
+        token = len(self._stack)
+        self._stack.append(self.hash)
+        self._stack.append(self._pending)
+        turn = self._turn
+        my = self._sides[turn]
+        promoted = move.piece_id if move is not None and move.kind == MoveKind.PROMOTE else None
+
+        # Start of the turn, as rules._settle_obligations.
+        pend = self._pending
+        if pend and (pend >> 1) & 1 == turn:
+            pid = (pend >> 2) & 7
+            req = pend >> 5
+            if not (promoted == pid and (not req or roll == req)):
+                self._relocate(turn, pid, self._rebirth_target(my[pid]))
+            self._set_pending(0)
+        mine = self.counts[turn]
+        if mine[THREE_TRUTHS] or mine[RE_ATOUM]:
+            for pid in range(PIECES_PER_PLAYER):
+                from_sq = my[pid]
+                if from_sq == THREE_TRUTHS and roll != 3 and promoted != pid:
+                    self._relocate(turn, pid, self._rebirth_target(from_sq))
+                elif from_sq == RE_ATOUM and roll != 2 and promoted != pid:
+                    self._relocate(turn, pid, self._rebirth_target(from_sq))
+
+        if promoted is not None:
+            self._relocate(turn, promoted, OUT)
+        elif move is not None:
+            pid = move.piece_id
+            from_sq = my[pid]
+            to_sq = from_sq + roll
+            op = turn ^ 1
+            theirs = self.counts[op]
+            if theirs[to_sq] and (op or not self.counts[turn][to_sq]):
+                # Swap: our first piece on from_sq trades places with their
+                # last piece on to_sq.
+                victim = PIECES_PER_PLAYER - 1 - self._sides[op][::-1].index(to_sq)
+                self._relocate(turn, my.index(from_sq), to_sq)
+                self._relocate(op, victim, from_sq)
+            else:
+                self._relocate(turn, pid, to_sq)
+
+            landed = my[pid]
+            if landed == WATER:
+                self._relocate(turn, pid, self._rebirth_target(landed))
+            elif landed == THREE_TRUTHS:
+                self._set_pending(1 | (turn << 1) | (pid << 2) | (3 << 5))
+            elif landed == RE_ATOUM:
+                self._set_pending(1 | (turn << 1) | (pid << 2) | (2 << 5))
+            elif landed == HORUS:
+                self._set_pending(1 | (turn << 1) | (pid << 2))
+
+        self._turn = turn ^ 1
+        self.turn = _PLAYERS[turn ^ 1]
+        self.hash += -WHITE_TO_MOVE_KEY if turn else WHITE_TO_MOVE_KEY
+        return token
+
+    def unmake(self, token: int):
+        stack = self._stack
+        listener = self.listener
+        sides = self._sides
+        top = token + 2
+        while len(stack) > top:
+            e = stack.pop()
+            side = e >> 8
+            pid = (e >> 5) & 7
+            to_sq = e & 0x1F
+            positions = sides[side]
+            from_sq = positions[pid]
+            positions[pid] = to_sq
+            c = self.counts[side]
+            c[from_sq] -= 1
+            c[to_sq] += 1
+            if listener is not None:
+                listener.move_piece(side, from_sq, to_sq)
+        self._pending = stack.pop()
+        self.hash = stack.pop()
+        self._turn ^= 1
+        self.turn = _PLAYERS[self._turn]
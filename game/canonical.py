@@ -0,0 +1,80 @@
+from __future__ import annotations
+from .state import GameState, Player
+from .move import Move, MoveKind
+from .constants import PIECES_PER_PLAYER
+from .bitboard import MOVES, PROMOTES
+
+# Pieces of one side are interchangeable: which id a piece has never changes
+# what the position is worth or which moves it has, only how they are
+# written down. The canonical form numbers each side's pieces in square
+# order (ties by old id), with the pending piece renumbered to match.
+#
+# `order[side][i]` is the old id of canonical piece i (side 0 = BLACK,
+# 1 = WHITE). game.zobrist.position_hash() is the matching hash: equal for
+# all numberings of a position, without building the canonical state.
+
+
+def canonical(state: GameState) -> tuple[GameState, tuple[tuple[int, ...], tuple[int, ...]]]:
+    """The canonical form of `state` and the order to map moves back with."""
+    order = tuple(tuple(sorted(range(PIECES_PER_PLAYER), key=positions.__getitem__))
+                  for positions in (state.black, state.white))
+    pending = state.pending
+    if pending:
+        pp, pid, req = pending
+        pending = (pp, order[0 if pp == Player.BLACK else 1].index(pid), req)
+    canon = GameState(black=tuple(state.black[i] for i in order[0]),
+                      white=tuple(state.white[i] for i in order[1]),
+                      turn=state.turn, pending=pending)
+    return canon, order
+
+
+def is_canonical(state: GameState) -> bool:
+    return list(state.black) == sorted(state.black) and list(state.white) == sorted(state.white)
+
+
+def to_canonical_move(move: Move | None, order, side: Player) -> Move | None:
+    """A move of the original state as the same move of its canonical form."""
+    if move is None:
+        return None
+    return Move(piece_id=order[0 if side == Player.BLACK else 1].index(move.piece_id), kind=move.kind)
+
+
+def from_canonical_move(move: Move | None, order, side: Player) -> Move | None:
+    """A move of the canonical form as the same move of the original state."""
+    if move is None:
+        return None
+    return Move(piece_id=order[0 if side == Player.BLACK else 1][move.piece_id], kind=move.kind)
+
+
+# Moves without piece ids, for caches keyed by position_hash(): the square
+# the piece moves from, | SQUARE_PROMOTE for a promotion; NO_MOVE for a skip.
+# Any piece on that square is as good as any other.
+SQUARE_PROMOTE = 0x20
+NO_MOVE = 0xFF
+
+
+def square_move(state, move: Move | None) -> int:
+    if move is None:
+        return NO_MOVE
+    sq = state.pieces_of(state.turn)[move.piece_id]
+    return sq | (SQUARE_PROMOTE if move.kind == MoveKind.PROMOTE else 0)
+
+
+def move_from_square(state, code: int) -> Move | None:
+    """
+    The move square_move() encoded, by the first piece on that square (the
+    pending piece for its promotion); None if no piece is there.
+    """
+    if code == NO_MOVE:
+        return None
+    positions = state.pieces_of(state.turn)
+    sq = code & ~SQUARE_PROMOTE
+    if sq not in positions:
+        return None
+    pid = positions.index(sq)
+    if code & SQUARE_PROMOTE:
+        pending = state.pending
+        if pending and pending[0] == state.turn and positions[pending[1]] == sq:
+            pid = pending[1]
+        return PROMOTES[pid]
+    return MOVES[pid]
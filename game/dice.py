@@ -1,15 +1,78 @@
 from __future__ import annotations
 import random
+from importlib.util import find_spec
 from .constants import ROLL_PROBS
 
+# numpy is optional and only roll_array() needs it; it is imported there, not
+# here, since every game imports this module and numpy is slow to load.
+HAVE_NUMPY = find_spec("numpy") is not None
+
+# Roll for each 4-bit pattern of sticks (1 = light side up): the number of
+# light sides, with none counting as 5.
+ROLL_OF_BITS = tuple(bin(b).count("1") or 5 for b in range(16))
+# bytes.translate tables: the rolls of the low and high nibble of a byte.
+_LOW_ROLLS = bytes(ROLL_OF_BITS[b & 15] for b in range(256))
+_HIGH_ROLLS = bytes(ROLL_OF_BITS[b >> 4] for b in range(256))
+
 def toss_sticks(rng: random.Random | None = None) -> int:
     """
     4 sticks each gives 0/1. sum=0 => treated as 5.
     Returns in {1,2,3,4,5}.
     """
-    rng = rng or random
-    s = sum(rng.choice([0, 1]) for _ in range(4))
-    return 5 if s == 0 else s
+    return ROLL_OF_BITS[(rng or random).getrandbits(4)]
 
 def roll_distribution() -> dict[int, float]:
     return dict(ROLL_PROBS)
+
+def roll_bytes(n: int, rng: random.Random | None = None) -> bytes:
+    """n tosses as a bytes object, two per random byte."""
+    data = (rng or random).randbytes((n + 1) // 2)
+    out = bytearray(2 * len(data))
+    out[0::2] = data.translate(_LOW_ROLLS)
+    out[1::2] = data.translate(_HIGH_ROLLS)
+    return bytes(out[:n])
+
+def roll_array(n: int, rng=None):
+    """n tosses as a uint8 array, from a numpy Generator (default: a fresh unseeded one)."""
+    if not HAVE_NUMPY:
+        raise ImportError("roll_array needs numpy")
+    import numpy as np
+    rng = rng if rng is not None else np.random.default_rng()
+    return np.array(ROLL_OF_BITS, dtype=np.uint8)[rng.integers(0, 16, size=n, dtype=np.uint8)]
+
+
+class RollStream:
+    """
+    The tosses of one game, reproducible from (seed, game) alone: the same
+    pair always gives the same sequence, whatever else draws random numbers
+    meanwhile. `position` counts the tosses taken; skip(n) jumps ahead.
+    """
+
+    CHUNK = 4096
+
+    def __init__(self, seed: int, game: int = 0):
+        self.seed = seed
+        self.game = game
+        self._rng = random.Random(f"{seed}:{game}")
+        self._buf = b""
+        self._i = 0
+        self.position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> int:
+        if self._i == len(self._buf):
+            self._buf = roll_bytes(self.CHUNK, self._rng)
+            self._i = 0
+        roll = self._buf[self._i]
+        self._i += 1
+        self.position += 1
+        return roll
+
+    def take(self, n: int) -> list[int]:
+        return [next(self) for _ in range(n)]
+
+    def skip(self, n: int):
+        for _ in range(n):
+            next(self)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from .state import GameState, Player
+from .move import Move, MoveKind
+from .rules import initial_state, apply_move, skip_turn
+
+# A game as its seed, the settings it was played with and one byte per ply:
+#   bits 0-2 roll (1-5), bits 3-5 piece id, bit 6 promotion, bit 7 skip.
+# Games start from initial_state(), so the plies replay through game.rules
+# to any position.
+#
+# Record layout: header, settings as UTF-8 JSON, plies.
+#   magic "SNGR", version u8, winner u8 (0 none, 1 BLACK, 2 WHITE),
+#   seed i64, plies u32, settings length u16
+_MAGIC = b"SNGR"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBqIH")
+_WINNER_CODES = {None: 0, Player.BLACK: 1, Player.WHITE: 2}
+_WINNERS = (None, Player.BLACK, Player.WHITE)
+_PROMOTE_BIT = 0x40
+_SKIP_BIT = 0x80
+
+
+def encode_ply(roll: int, move: Move | None) -> int:
+    if move is None:
+        return roll | _SKIP_BIT
+    return roll | (move.piece_id << 3) | (_PROMOTE_BIT if move.kind == MoveKind.PROMOTE else 0)
+
+
+def decode_ply(code: int) -> tuple[int, Move | None]:
+    roll = code & 7
+    if code & _SKIP_BIT:
+        return roll, None
+    return roll, Move(piece_id=(code >> 3) & 7, kind=MoveKind.PROMOTE if code & _PROMOTE_BIT else MoveKind.MOVE)
+
+
+@dataclass
+class GameRecord:
+    seed: int = 0
+    settings: dict = field(default_factory=dict)
+    plies: bytearray = field(default_factory=bytearray)
+    winner: Player | None = None
+
+    def __len__(self) -> int:
+        return len(self.plies)
+
+    def append(self, roll: int, move: Move | None):
+        self.plies.append(encode_ply(roll, move))
+
+    def moves(self) -> Iterator[tuple[int, Move | None]]:
+        for code in self.plies:
+            yield decode_ply(code)
+
+    def states(self, validate: bool = False) -> Iterator[GameState]:
+        """The position before every ply, then the final one."""
+        state = initial_state()
+        yield state
+        for roll, mv in self.moves():
+            state = skip_turn(state, roll) if mv is None else apply_move(state, roll, mv, validate=validate)
+            yield state
+
+    def replay(self, ply: int | None = None, validate: bool = False) -> GameState:
+        """The position after the first `ply` plies (default: all of them)."""
+        n = len(self.plies) if ply is None else ply
+        for i, state in enumerate(self.states(validate)):
+            if i == n:
+                return state
+        raise IndexError(f"ply {ply} out of range for a {len(self.plies)}-ply game")
+
+    def to_bytes(self) -> bytes:
+        meta = json.dumps(self.settings, sort_keys=True, separators=(",", ":")).encode()
+        return _HEADER.pack(_MAGIC, _VERSION, _WINNER_CODES[self.winner], self.seed, len(self.plies),
+                            len(meta)) + meta + bytes(self.plies)
+
+    @classmethod
+    def from_bytes(cls, data, offset: int = 0) -> GameRecord:
+        magic, version, win, seed, n, meta_len = _HEADER.unpack_from(data, offset)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a game record for this version")
+        start = offset + _HEADER.size
+        settings = json.loads(bytes(data[start:start + meta_len]))
+        start += meta_len
+        return cls(seed=seed, settings=settings, plies=bytearray(data[start:start + n]), winner=_WINNERS[win])
+
+
+class GameArchive:
+    """
+    Append-only file of GameRecords with an offset index next to it
+    (`path` + ".idx", one u64 per game). Reads go through a memory map of
+    the data file: archive[i] parses one game, and winner(i), plies(i) and
+    scan() read the header and ply bytes in place without building a
+    GameRecord, so a large archive can be scanned without loading it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path + ".idx"
+        self._offsets = array("Q")
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                self._offsets.frombytes(f.read())
+        self._map: mmap.mmap | None = None
+        self._stale = False  # appended to since mapped
+        self._data = None
+        self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for f in (self._data, self._index):
+            if f is not None:
+                f.close()
+        self._data = self._index = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, record: GameRecord) -> int:
+        """Add a game at the end; returns its number."""
+        if self._data is None:
+            self._data = open(self.path, "ab")
+            self._index = open(self.index_path, "ab")
+        offset = self._data.seek(0, os.SEEK_END)
+        self._data.write(record.to_bytes())
+        self._index.write(struct.pack("<Q", offset))
+        self._offsets.append(offset)
+        self._stale = True
+        return len(self._offsets) - 1
+
+    def flush(self):
+        if self._data is not None:
+            self._data.flush()
+            self._index.flush()
+
+    def _view(self) -> mmap.mmap:
+        # Maps the data file, again if games were appended since.
+        if self._map is None or self._stale:
+            self.flush()
+            if self._map is not None:
+                self._map.close()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._stale = False
+        return self._map
+
+    def __getitem__(self, i: int) -> GameRecord:
+        offset = self._offsets[i]
+        return GameRecord.from_bytes(self._view(), offset)
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def winner(self, i: int) -> Player | None:
+        offset = self._offsets[i]
+        return _WINNERS[self._view()[offset + 5]]
+
+    def plies(self, i: int) -> bytes:
+        """The ply bytes of game i, sliced from the map."""
+        offset = self._offsets[i]
+        return _plies_at(self._view(), offset)
+
+    def scan(self) -> Iterator[tuple[int, Player | None, bytes]]:
+        """(game number, winner, ply bytes) for every game."""
+        if not self._offsets:
+            return
+        view = self._view()
+        for i, offset in enumerate(self._offsets):
+            yield i, _WINNERS[view[offset + 5]], _plies_at(view, offset)
+
+
+def _plies_at(view, offset: int) -> bytes:
+    _, _, _, _, n, meta_len = _HEADER.unpack_from(view, offset)
+    start = offset + _HEADER.size + meta_len
+    return view[start:start + n]
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="python -m game.record", description="Inspect a game archive")
+    parser.add_argument("archive")
+    parser.add_argument("--game", type=int, default=None, help="show this game instead of a summary")
+    parser.add_argument("--ply", type=int, default=None, help="with --game: the position after this many plies")
+    return parser
+
+
+def run(args) -> int:
+    with GameArchive(args.archive) as archive:
+        if args.game is None:
+            wins = {None: 0, Player.BLACK: 0, Player.WHITE: 0}
+            plies = 0
+            for _, w, moves in archive.scan():
+                wins[w] += 1
+                plies += len(moves)
+            print(f"{len(archive)} games, {plies} plies | BLACK {wins[Player.BLACK]} | WHITE {wins[Player.WHITE]}"
+                  f" | unfinished {wins[None]}")
+            return 0
+        record = archive[args.game]
+        print(f"game {args.game}: seed {record.seed}, {len(record)} plies, winner "
+              f"{record.winner.value if record.winner else None}, settings {json.dumps(record.settings)}")
+        if args.ply is not None:
+            print(record.replay(args.ply))
+        else:
+            for i, (roll, mv) in enumerate(record.moves()):
+                print(f"{i:4d} roll {roll} " + (f"piece#{mv.piece_id} {mv.kind.value}" if mv else "skip"))
+    return 0
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from dataclasses import replace
+from typing import Iterator
 from .state import GameState, Player, OUT
 from .move import Move, MoveKind
 from .constants import (
@@ -38,78 +38,106 @@ def _occupied_map(state: GameState) -> dict[int, tuple[Player, int]]:
             occ[pos] = (Player.WHITE, pid)
     return occ
 
-def _send_to_rebirth(state: GameState, p: Player, piece_id: int) -> GameState:
-    
-    occ = _occupied_map(state)
-    current_pos = state.pieces_of(p)[piece_id]
-    
-    target = REBIRTH
-    if target not in occ:
-        positions = list(state.pieces_of(p))
-        positions[piece_id] = target
-        return state.set_pieces_of(p, tuple(positions))
-    
-    target = None
+def _rebirth_target(occ: dict[int, tuple[Player, int]], current_pos: int) -> int:
+    if REBIRTH not in occ:
+        return REBIRTH
     for s in range(REBIRTH - 1, 0, -1):
         if s not in occ:
-            target = s
-            break
-    
-    if target is None:
-        for s in range(REBIRTH + 1, NUM_SQUARES + 1):
-            if s not in occ:
-                target = s
-                break
-    
-    if target is None:
-        target = current_pos
-    
-    if target in occ:
-        for s in range(1, NUM_SQUARES + 1):
-            if s not in occ:
-                target = s
-                break
-        if target is None or target in occ:
-            target = current_pos
+            return s
+    for s in range(REBIRTH + 1, NUM_SQUARES + 1):
+        if s not in occ:
+            return s
+    return current_pos
+
+def _send_to_rebirth(state: GameState, p: Player, piece_id: int) -> GameState:
     
-    positions = list(state.pieces_of(p))
-    positions[piece_id] = target
+    occ = _occupied_map(state)
+    target = _rebirth_target(occ, state.pieces_of(p)[piece_id])
     
     if target < 1 or target > NUM_SQUARES:
         raise RuntimeError(f"Invalid rebirth target: {target} (must be 1-{NUM_SQUARES})")
     
+    positions = list(state.pieces_of(p))
+    positions[piece_id] = target
     return state.set_pieces_of(p, tuple(positions))
 
-def _apply_swap_if_needed(state: GameState, mover: Player, from_sq: int, to_sq: int) -> GameState:
-  
-    if to_sq > HAPPINESS:
-        return state
+def _place(occ: dict[int, tuple[Player, int]], black: list[int], white: list[int],
+           positions: list[int], piece_id: int, to_sq: int):
+    # Move one piece and patch occ so it matches _occupied_map of the new
+    # position lists (white owns a shared square, the highest piece id wins).
+    from_sq = positions[piece_id]
+    positions[piece_id] = to_sq
+    for sq in (from_sq, to_sq):
+        if sq == OUT:
+            continue
+        if sq in white:
+            occ[sq] = (Player.WHITE, len(white) - 1 - white[::-1].index(sq))
+        elif sq in black:
+            occ[sq] = (Player.BLACK, len(black) - 1 - black[::-1].index(sq))
+        else:
+            occ.pop(sq, None)
 
-    occ = _occupied_map(state)
-    if to_sq not in occ:
-        return state
+def _settle_obligations(state: GameState, roll: int, occ: dict[int, tuple[Player, int]],
+                        black: list[int], white: list[int], promoted: int | None):
+    # Start of every turn: our pending piece goes to rebirth unless it is the
+    # one being promoted, and so does anything on 28/29 this roll can't take out.
+    p = state.turn
+    my = black if p == Player.BLACK else white
+    pending = state.pending
+    if pending and pending[0] == p:
+        _, pend_pid, pend_req = pending
+        if not (promoted == pend_pid and (pend_req is None or roll == pend_req)):
+            _place(occ, black, white, my, pend_pid, _rebirth_target(occ, my[pend_pid]))
+        pending = None
+
+    for pid in range(len(my)):
+        from_sq = my[pid]
+        if from_sq == THREE_TRUTHS and roll != 3 and promoted != pid:
+            _place(occ, black, white, my, pid, _rebirth_target(occ, from_sq))
+        elif from_sq == RE_ATOUM and roll != 2 and promoted != pid:
+            _place(occ, black, white, my, pid, _rebirth_target(occ, from_sq))
+    return pending
+
+def _apply(state: GameState, roll: int, move: Move, occ: dict[int, tuple[Player, int]]) -> GameState:
+    p = state.turn
+    nxt = Player.WHITE if p == Player.BLACK else Player.BLACK
+    black = list(state.black)
+    white = list(state.white)
+    my, op = (black, white) if p == Player.BLACK else (white, black)
+    occ = dict(occ)
+    pid = move.piece_id
+    promote = move.kind == MoveKind.PROMOTE
 
-    op, op_pid = occ[to_sq]
-    if op == mover:
-        return state
+    pending = _settle_obligations(state, roll, occ, black, white, pid if promote else None)
 
-    mover_positions = list(state.pieces_of(mover))
-    opp_positions = list(state.pieces_of(op))
+    if promote:
+        my[pid] = OUT
+        return GameState(black=tuple(black), white=tuple(white), turn=nxt, pending=pending)
 
-    mover_pid = None
-    for pid, pos in enumerate(mover_positions):
-        if pos == from_sq:
-            mover_pid = pid
-            break
-    if mover_pid is None:
-        return state
+    from_sq = my[pid]
+    to_sq = from_sq + roll
 
-    mover_positions[mover_pid] = to_sq
-    opp_positions[op_pid] = from_sq
+    owner = occ.get(to_sq)
+    if owner is not None and owner[0] != p:
+        if to_sq > HAPPINESS:
+            raise ValueError("Illegal: cannot capture beyond 26")
+        # Swap: our first piece on from_sq trades places with the occupant.
+        _place(occ, black, white, my, my.index(from_sq), to_sq)
+        _place(occ, black, white, op, owner[1], from_sq)
+    else:
+        _place(occ, black, white, my, pid, to_sq)
 
-    state = state.set_pieces_of(mover, tuple(mover_positions))
-    state = state.set_pieces_of(op, tuple(opp_positions))
-    return state
+    landed = my[pid]
+    if landed == WATER:
+        _place(occ, black, white, my, pid, _rebirth_target(occ, landed))
+    elif landed == THREE_TRUTHS:
+        pending = (p, pid, 3)
+    elif landed == RE_ATOUM:
+        pending = (p, pid, 2)
+    elif landed == HORUS:
+        pending = (p, pid, None)
+
+    return GameState(black=tuple(black), white=tuple(white), turn=nxt, pending=pending)
 
 def _happiness_block_rule(from_sq: int, to_sq: int) -> bool:
   
@@ -121,11 +149,11 @@ def legal_moves(state: GameState, roll: int) -> list[Move]:
 
     if is_terminal(state):
         return []
+    return _legal_moves(state, roll, _occupied_map(state))
 
+def _legal_moves(state: GameState, roll: int, occ: dict[int, tuple[Player, int]]) -> list[Move]:
     p = state.turn
     my = state.pieces_of(p)
-    occ = _occupied_map(state)
-
     moves: list[Move] = []
 
     pending_piece = None
@@ -173,95 +201,32 @@ def legal_moves(state: GameState, roll: int) -> list[Move]:
 
     return moves
 
-def apply_move(state: GameState, roll: int, move: Move) -> GameState:
-  
-    if move not in legal_moves(state, roll):
+def apply_move(state: GameState, roll: int, move: Move, validate: bool = True) -> GameState:
+    """
+    validate=False skips the legality check; only for moves that came from
+    legal_moves() on this same state and roll (e.g. inside the AI search).
+    """
+    if validate and move not in legal_moves(state, roll):
         raise ValueError("Illegal move")
+    return _apply(state, roll, move, _occupied_map(state))
 
-    p = state.turn
-    my = list(state.pieces_of(p))
-
-    if state.pending and state.pending[0] == p:
-        _, pend_pid, pend_req = state.pending
-
-        if not (move.kind == MoveKind.PROMOTE and move.piece_id == pend_pid and
-                (pend_req is None or roll == pend_req)):
-            state = _send_to_rebirth(state, p, pend_pid)
-        state = replace(state, pending=None)
-        my = list(state.pieces_of(p))
-    
-    for pid, from_sq in enumerate(my):
-        if from_sq == OUT:
-            continue
-        
-        if from_sq == THREE_TRUTHS and roll != 3:
-            if not (move.kind == MoveKind.PROMOTE and move.piece_id == pid):
-                state = _send_to_rebirth(state, p, pid)
-                my = list(state.pieces_of(p))
-        
-        if from_sq == RE_ATOUM and roll != 2:
-            if not (move.kind == MoveKind.PROMOTE and move.piece_id == pid):
-                state = _send_to_rebirth(state, p, pid)
-                my = list(state.pieces_of(p))
-
-    if move.kind == MoveKind.PROMOTE:
-        my[move.piece_id] = OUT
-        state = state.set_pieces_of(p, tuple(my))
-        return state.swap_turn()
-
-    from_sq = my[move.piece_id]
-    to_sq = from_sq + roll
-
+def generate_children(state: GameState, roll: int, moves: list[Move] | None = None) -> Iterator[tuple[Move, GameState]]:
+    """
+    Yield (move, child_state) for every legal move, or for `moves` (trusted to
+    be legal) when given, computing the occupancy map only once.
+    """
+    if is_terminal(state):
+        return
     occ = _occupied_map(state)
-    if to_sq in occ and occ[to_sq][0] != p:
-        if to_sq <= HAPPINESS:
-            state = _apply_swap_if_needed(state, p, from_sq, to_sq)
-            my = list(state.pieces_of(p))
-        else:
-            raise ValueError("Illegal: cannot capture beyond 26")
-    else:
-        my[move.piece_id] = to_sq
-        state = state.set_pieces_of(p, tuple(my))
-
-    my = list(state.pieces_of(p))
-    landed = my[move.piece_id]
-
-    if landed == WATER:
-        state = _send_to_rebirth(state, p, move.piece_id)
-    else:
-        landed = state.pieces_of(p)[move.piece_id]
-        if landed == THREE_TRUTHS:
-            state = replace(state, pending=(p, move.piece_id, 3))
-        elif landed == RE_ATOUM:
-            state = replace(state, pending=(p, move.piece_id, 2))
-        elif landed == HORUS:
-            state = replace(state, pending=(p, move.piece_id, None))
-
-    return state.swap_turn()
+    if moves is None:
+        moves = _legal_moves(state, roll, occ)
+    for mv in moves:
+        yield mv, _apply(state, roll, mv, occ)
 
 def skip_turn(state: GameState, roll: int) -> GameState:
   
-    from game.constants import THREE_TRUTHS, RE_ATOUM
-    
-    p = state.turn
-    my = list(state.pieces_of(p))
-    
-    if state.pending and state.pending[0] == p:
-        _, pend_pid, _ = state.pending
-        state = _send_to_rebirth(state, p, pend_pid)
-        state = replace(state, pending=None)
-        my = list(state.pieces_of(p))
-    
-    for pid, from_sq in enumerate(my):
-        if from_sq == OUT:
-            continue
-        
-        if from_sq == THREE_TRUTHS and roll != 3:
-            state = _send_to_rebirth(state, p, pid)
-            my = list(state.pieces_of(p))
-        
-        if from_sq == RE_ATOUM and roll != 2:
-            state = _send_to_rebirth(state, p, pid)
-            my = list(state.pieces_of(p))
-    
-    return state.swap_turn()
+    black = list(state.black)
+    white = list(state.white)
+    pending = _settle_obligations(state, roll, _occupied_map(state), black, white, None)
+    nxt = Player.WHITE if state.turn == Player.BLACK else Player.BLACK
+    return GameState(black=tuple(black), white=tuple(white), turn=nxt, pending=pending)
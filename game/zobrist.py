@@ -0,0 +1,38 @@
+from __future__ import annotations
+import random
+from .state import Player
+from .constants import NUM_SQUARES
+
+# Fixed seed so hashes are stable across runs and processes.
+_rng = random.Random(0x5E4E7)
+
+def _key() -> int:
+    return _rng.getrandbits(64)
+
+WHITE_TO_MOVE_KEY = _key()
+ROLL_KEYS = tuple(_key() for _ in range(6))
+# position_hash() keys: SQUARE_KEYS[side][square], PENDING_REQ_KEYS[player][required_roll]
+SQUARE_KEYS = tuple(tuple(_key() for _ in range(NUM_SQUARES + 1)) for _ in range(2))
+PENDING_REQ_KEYS = tuple(tuple(_key() for _ in range(4)) for _ in range(2))
+
+def position_hash(state) -> int:
+    """
+    Hash that ignores piece ids: the sum of one key per (side, square) for
+    every piece, plus keys for the side to move and the pending obligation
+    by player and required roll. States that differ only by how the pieces
+    of a side are numbered (see game.canonical) hash the same. A sum rather
+    than a xor so two pieces on one square don't cancel out; it is exact, so
+    it can be kept up to date by adding and subtracting keys in any order.
+    Takes a GameState or anything shaped like one.
+    """
+    h = 0
+    for side, positions in ((0, state.black), (1, state.white)):
+        keys = SQUARE_KEYS[side]
+        for pos in positions:
+            h += keys[pos]
+    if state.turn == Player.WHITE:
+        h += WHITE_TO_MOVE_KEY
+    if state.pending:
+        pp, _, req = state.pending
+        h += PENDING_REQ_KEYS[0 if pp == Player.BLACK else 1][req or 0]
+    return h
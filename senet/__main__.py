@@ -0,0 +1,46 @@
+from __future__ import annotations
+import argparse
+import importlib
+import sys
+
+# `python -m senet <command> ...`. This module only imports argparse: each
+# command's module (and through it tkinter, the search, numpy) is imported
+# once the command is known, so headless commands never load tkinter and
+# `--help` loads nothing. senet.bench measures the import of this module
+# against STARTUP_BUDGET_MS.
+
+# command -> (module with build_parser(parser) and run(args), help)
+COMMANDS = {
+    "play": ("ui.tkinter_ui", "play against the AI, or --replay a recorded game"),
+    "selfplay": ("senet.sim", "headless self-play games"),
+    "analyze": ("senet.analyze", "best move for every roll in one position"),
+    "bench": ("senet.bench", "engine benchmarks"),
+}
+# Modules importing this one must not load.
+HEAVY_MODULES = ("tkinter", "numpy", "ai", "game")
+STARTUP_BUDGET_MS = 25.0
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(
+        prog="python -m senet", description="Senet",
+        epilog="commands:\n" + "\n".join(f"  {name:10} {text}" for name, (_, text) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=COMMANDS, metavar="command", help="one of: " + ", ".join(COMMANDS))
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="the command's own options (see <command> --help)")
+    return parser
+
+
+def run(args) -> int:
+    module_name, text = COMMANDS[args.command]
+    module = importlib.import_module(module_name)
+    sub = module.build_parser(argparse.ArgumentParser(prog=f"python -m senet {args.command}", description=text))
+    return module.run(sub.parse_args(args.args))
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+
+from game.state import GameState, Player
+from game.rules import initial_state
+from game.constants import ROLL_PROBS
+from game.record import GameArchive
+from ai.expectiminimax import choose_best_move_given_roll
+from ai.tt import TranspositionTable
+from ai.tablebase import Tablebase
+
+
+def analyze(state: GameState, depth: int, rolls=None, pruning: str = "star2",
+            tablebase: Tablebase | None = None) -> dict:
+    """
+    The best move for the side to move after each roll in `rolls` (default:
+    all five), with its value and search cost, and the roll-weighted value.
+    The searches share one table.
+    """
+    tt = TranspositionTable()
+    rows = []
+    for roll in rolls or ROLL_PROBS:
+        start = time.perf_counter()
+        mv, val, stats = choose_best_move_given_roll(state, state.turn, depth, roll, tt=tt, pruning=pruning,
+                                                     tablebase=tablebase)
+        pieces = state.black if state.turn == Player.BLACK else state.white
+        rows.append({
+            "roll": roll,
+            "move": None if mv is None else {"piece_id": mv.piece_id, "kind": mv.kind.value,
+                                             "from": pieces[mv.piece_id]},
+            "value": val,
+            "nodes": stats.nodes,
+            "ms": (time.perf_counter() - start) * 1000.0,
+        })
+    expected = None
+    if rolls is None:
+        expected = sum(ROLL_PROBS[r["roll"]] * r["value"] for r in rows)
+    return {"turn": state.turn.value, "depth": depth, "rolls": rows, "expected_value": expected}
+
+
+def _load_state(args) -> GameState:
+    if args.archive is None:
+        return initial_state()
+    with GameArchive(args.archive) as archive:
+        return archive[args.game].replay(args.ply)
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="python -m senet.analyze",
+                                               description="Best move for every roll in one position")
+    parser.add_argument("--archive", default=None, help="take the position from this game.record archive")
+    parser.add_argument("--game", type=int, default=0)
+    parser.add_argument("--ply", type=int, default=None, help="position after this many plies (default: the end)")
+    parser.add_argument("--roll", type=int, nargs="+", default=None, choices=sorted(ROLL_PROBS))
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--pruning", default="star2")
+    parser.add_argument("--tablebase", default=None, help="bear-off tablebase file")
+    parser.add_argument("--json", action="store_true", help="print the analysis as JSON")
+    return parser
+
+
+def run(args) -> int:
+    state = _load_state(args)
+    tablebase = Tablebase(args.tablebase) if args.tablebase else None
+    report = analyze(state, args.depth, args.roll, args.pruning, tablebase)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(state)
+    for r in report["rolls"]:
+        mv = r["move"]
+        move = "no move" if mv is None else f"piece#{mv['piece_id']} {mv['kind']} from {mv['from']}"
+        print(f"roll {r['roll']}: {move:28} value {r['value']:12.1f}  {r['nodes']:8d} nodes {r['ms']:8.1f} ms")
+    if report["expected_value"] is not None:
+        print(f"expected value {report['expected_value']:.1f} for {report['turn']} at depth {report['depth']}")
+    return 0
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
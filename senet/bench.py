@@ -0,0 +1,242 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from game.rules import initial_state, legal_moves, apply_move, skip_turn, is_terminal, _send_to_rebirth
+from game.state import OUT
+from game.dice import toss_sticks
+from ai.eval import evaluate
+from ai.expectiminimax import choose_best_move_given_roll
+from .__main__ import HEAVY_MODULES, STARTUP_BUDGET_MS
+
+CORPUS_SEED = 20240101
+CORPUS_SIZE = 200
+SAMPLE_EVERY = 7  # plies between sampled positions
+DEFAULT_DEPTHS = (1, 2, 3, 4)
+# Search positions per depth; deeper searches take longer so use fewer.
+SEARCH_POSITIONS = {1: 200, 2: 100, 3: 20, 4: 4}
+# Modules whose import bench_startup() times: the CLI entry point, then the
+# modules its headless commands load.
+STARTUP_MODULES = ("senet.__main__", "senet.sim", "senet.analyze", "senet.bench")
+STARTUP_REPEATS = 5
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IMPORT_PROBE = ("import sys, time\n"
+                 "t = time.perf_counter()\n"
+                 "import {}\n"
+                 "print((time.perf_counter() - t) * 1000.0)\n"
+                 "print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))")
+
+
+def build_corpus(size: int = CORPUS_SIZE, seed: int = CORPUS_SEED) -> list[tuple]:
+    """
+    Positions sampled from seeded random self-play: (state, roll) pairs with
+    the roll that was actually tossed there. Same seed, same corpus.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    while len(corpus) < size:
+        state = initial_state()
+        ply = 0
+        while not is_terminal(state) and len(corpus) < size:
+            roll = toss_sticks(rng)
+            if ply % SAMPLE_EVERY == 0:
+                corpus.append((state, roll))
+            moves = legal_moves(state, roll)
+            state = apply_move(state, roll, rng.choice(moves), validate=False) if moves else skip_turn(state, roll)
+            ply += 1
+    return corpus
+
+
+def _ops_per_sec(fn, items, min_time: float = 0.2) -> float:
+    # Best of three passes over the corpus, each repeated until min_time.
+    best = 0.0
+    for _ in range(3):
+        n = 0
+        start = time.perf_counter()
+        while True:
+            for item in items:
+                fn(*item)
+            n += len(items)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, n / elapsed)
+    return best
+
+
+def bench_primitives(corpus, min_time: float = 0.2) -> dict:
+    applies = [(s, r, mv) for s, r in corpus for mv in legal_moves(s, r)]
+    rebirths = [(s, s.turn, pid) for s, _ in corpus for pid, pos in enumerate(s.pieces_of(s.turn)) if pos != OUT]
+    evals = [(s, s.turn) for s, _ in corpus]
+    return {
+        "legal_moves": _ops_per_sec(legal_moves, corpus, min_time),
+        "apply_move": _ops_per_sec(lambda s, r, mv: apply_move(s, r, mv, validate=False), applies, min_time),
+        "_send_to_rebirth": _ops_per_sec(_send_to_rebirth, rebirths, min_time),
+        "evaluate": _ops_per_sec(evaluate, evals, min_time),
+    }
+
+
+def bench_search(corpus, depths=DEFAULT_DEPTHS, search_kwargs: dict | None = None) -> dict:
+    search_kwargs = search_kwargs or {}
+    results = {}
+    for depth in depths:
+        positions = corpus[:SEARCH_POSITIONS.get(depth, 2)]
+        nodes = 0
+        start = time.perf_counter()
+        for s, r in positions:
+            _, _, stats = choose_best_move_given_roll(s, s.turn, depth, r, **search_kwargs)
+            nodes += stats.nodes
+        elapsed = time.perf_counter() - start
+
+        # Separate pass for memory: tracemalloc slows everything down.
+        tracemalloc.start()
+        for s, r in positions[:2]:
+            choose_best_move_given_roll(s, s.turn, depth, r, **search_kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[str(depth)] = {
+            "positions": len(positions),
+            "nodes": nodes,
+            "seconds": elapsed,
+            "nodes_per_sec": nodes / elapsed if elapsed else 0.0,
+            "ms_per_search": 1000.0 * elapsed / len(positions),
+            "peak_kib": peak / 1024.0,
+        }
+    return results
+
+
+def bench_startup(modules=STARTUP_MODULES, repeats: int = STARTUP_REPEATS) -> dict:
+    """
+    Milliseconds to import each module in a fresh interpreter, best of
+    `repeats`, and which of senet.__main__.HEAVY_MODULES that loaded.
+    """
+    results = {}
+    for module in modules:
+        best = None
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE.format(module)], capture_output=True, text=True,
+                                 check=True, cwd=_ROOT).stdout.splitlines()
+            ms = float(out[0])
+            best = ms if best is None else min(best, ms)
+        results[module] = {"ms": best, "loads": [m for m in HEAVY_MODULES if m in out[1].split()]}
+    return results
+
+
+def check_startup(startup: dict) -> list[str]:
+    """Why the CLI entry point misses its start-up budget, if it does."""
+    entry = startup.get("senet.__main__")
+    if entry is None:
+        return []
+    problems = []
+    if entry["ms"] > STARTUP_BUDGET_MS:
+        problems.append(f"importing senet.__main__ took {entry['ms']:.1f} ms, budget {STARTUP_BUDGET_MS:.0f} ms")
+    if entry["loads"]:
+        problems.append(f"importing senet.__main__ loaded {', '.join(entry['loads'])}")
+    return problems
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta() -> dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": _git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+
+
+def run_benchmarks(depths=DEFAULT_DEPTHS, corpus_size: int = CORPUS_SIZE, min_time: float = 0.2) -> dict:
+    corpus = build_corpus(corpus_size)
+    return {
+        "meta": {**_meta(), "corpus_seed": CORPUS_SEED, "corpus_size": len(corpus)},
+        "startup": bench_startup(),
+        "ops_per_sec": bench_primitives(corpus, min_time),
+        "search": bench_search(corpus, depths),
+    }
+
+
+def compare(old: dict, new: dict) -> list[str]:
+    """Ratio new/old for every figure present in both reports."""
+    lines = []
+    for name, res in new.get("startup", {}).items():
+        prev = old.get("startup", {}).get(name)
+        if prev and prev["ms"]:
+            lines.append(f"{'import ' + name:>20}: {res['ms'] / prev['ms']:.2f}x ms")
+    for name, value in new.get("ops_per_sec", {}).items():
+        if name in old.get("ops_per_sec", {}):
+            lines.append(f"{name:>20}: {value / old['ops_per_sec'][name]:.2f}x")
+    for depth, res in new.get("search", {}).items():
+        prev = old.get("search", {}).get(depth)
+        if prev and prev["nodes_per_sec"]:
+            lines.append(f"{'search depth ' + depth:>20}: {res['nodes_per_sec'] / prev['nodes_per_sec']:.2f}x nodes/s,"
+                         f" {res['nodes'] / max(1, prev['nodes']):.2f}x nodes")
+    return lines
+
+
+def _print_report(report: dict):
+    for name, res in report["startup"].items():
+        loads = f"  loads {', '.join(res['loads'])}" if res["loads"] else ""
+        print(f"{'import ' + name:>20}: {res['ms']:12.1f} ms{loads}", file=sys.stderr)
+    for name, value in report.get("ops_per_sec", {}).items():
+        print(f"{name:>20}: {value:12,.0f} ops/s", file=sys.stderr)
+    for depth, res in report.get("search", {}).items():
+        print(f"{'search depth ' + depth:>20}: {res['nodes_per_sec']:12,.0f} nodes/s"
+              f"  {res['ms_per_search']:9.1f} ms/search  peak {res['peak_kib']:,.0f} KiB", file=sys.stderr)
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="python -m senet.bench", description="Senet engine benchmarks")
+    parser.add_argument("-o", "--out", default=None, help="write the JSON report here")
+    parser.add_argument("--depths", type=int, nargs="+", default=list(DEFAULT_DEPTHS))
+    parser.add_argument("--corpus-size", type=int, default=CORPUS_SIZE)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per primitive measurement")
+    parser.add_argument("--compare", default=None, help="earlier JSON report to compare against")
+    parser.add_argument("--startup-only", action="store_true", help="only time the imports")
+    parser.add_argument("--check-startup", action="store_true",
+                        help=f"exit 1 if the CLI entry point misses its {STARTUP_BUDGET_MS:.0f} ms start-up budget")
+    return parser
+
+
+def run(args) -> int:
+    if args.startup_only:
+        report = {"meta": _meta(), "startup": bench_startup()}
+    else:
+        report = run_benchmarks(args.depths, args.corpus_size, args.min_time)
+    _print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        for line in compare(old, report):
+            print(line, file=sys.stderr)
+    problems = check_startup(report["startup"])
+    for line in problems:
+        print(f"start-up budget: {line}", file=sys.stderr)
+    return 1 if problems and args.check_startup else 0
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
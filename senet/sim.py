@@ -0,0 +1,242 @@
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+
+from game.rules import initial_state, legal_moves, apply_move, skip_turn, is_terminal, winner
+from game.state import Player
+from game.dice import toss_sticks
+from game.record import GameRecord, GameArchive
+from ai.eval import EvalWeights
+from ai.expectiminimax import choose_best_move_given_roll, choose_best_move_timed
+from ai.tt import TranspositionTable
+from ai.ordering import SearchContext, ORDERINGS
+from ai.tablebase import Tablebase
+from ai.book import OpeningBook
+from ai.mcts import MCTS
+
+PLAYER_KINDS = ("ai", "mcts", "random")
+DEFAULT_MAX_PLIES = 2000
+
+
+@dataclass(frozen=True)
+class PlayerConfig:
+    kind: str = "ai"
+    depth: int = 2
+    budget_ms: float | None = None  # iterative deepening instead of a fixed depth
+    pruning: str = "star2"
+    ordering: str = "static"  # "history": killers and history via an ai.ordering.SearchContext
+    weights: dict = field(default_factory=dict)  # overrides of EvalWeights fields
+    tablebase: str | None = None  # path of a bear-off tablebase file
+    book: str | None = None  # path of an opening book file
+    iterations: int | None = None  # mcts: descents per move (default: ai.mcts.DEFAULT_ITERATIONS)
+    rollout_plies: int = 0  # mcts: policy plies played out below each new leaf
+
+
+@dataclass
+class GameResult:
+    game: int
+    seed: int
+    winner: str | None
+    plies: int
+    nodes: dict[str, int]
+    cpu: dict[str, float]  # CPU seconds spent choosing moves, per player
+    time: float
+    record: bytes | None = None  # game.record encoding of the game, when asked for
+
+
+_books: dict[str, OpeningBook] = {}
+
+def _open_book(path: str) -> OpeningBook:
+    # One book per process, shared by every game it plays.
+    if path not in _books:
+        _books[path] = OpeningBook(path)
+    return _books[path]
+
+
+class _Player:
+    def __init__(self, config: PlayerConfig, color: Player, rng: random.Random):
+        if config.kind not in PLAYER_KINDS:
+            raise ValueError(f"Unknown player kind: {config.kind}")
+        self.config = config
+        self.color = color
+        self.rng = rng
+        self.weights = EvalWeights(**config.weights)
+        self.tt = TranspositionTable() if config.kind == "ai" else None
+        self.context = SearchContext() if config.kind == "ai" and config.ordering == "history" else None
+        self.tablebase = Tablebase(config.tablebase) if config.tablebase else None
+        self.book = _open_book(config.book) if config.book else None
+        if self.book is not None and config.kind == "ai" and self.book.weights != self.weights:
+            raise ValueError(f"{config.book} was built with other weights than the {color.value} player's")
+        if self.tablebase is not None and config.kind == "ai" and self.tablebase.weights != self.weights:
+            raise ValueError(f"{config.tablebase} was built with other weights than the {color.value} player's")
+        self.mcts = MCTS(self.weights, rollout_plies=config.rollout_plies, seed=rng.random()) \
+            if config.kind == "mcts" else None
+        self.nodes = 0
+        self.cpu = 0.0
+
+    def choose(self, state, roll):
+        start = time.process_time()
+        try:
+            return self._choose(state, roll)
+        finally:
+            self.cpu += time.process_time() - start
+
+    def _choose(self, state, roll):
+        if self.config.kind == "random":
+            moves = legal_moves(state, roll)
+            return self.rng.choice(moves) if moves else None
+        c = self.config
+        if self.mcts is not None:
+            mv, _, stats = self.mcts.choose_move(state, self.color, roll, c.budget_ms, c.iterations)
+        elif c.budget_ms is not None:
+            mv, _, stats = choose_best_move_timed(state, self.color, roll, c.budget_ms, max_depth=c.depth,
+                                                  tt=self.tt, pruning=c.pruning, weights=self.weights,
+                                                  tablebase=self.tablebase, book=self.book, context=self.context)
+        else:
+            if self.context is not None:
+                self.context.age()
+            mv, _, stats = choose_best_move_given_roll(state, self.color, c.depth, roll, tt=self.tt,
+                                                       pruning=c.pruning, weights=self.weights,
+                                                       tablebase=self.tablebase, book=self.book,
+                                                       context=self.context)
+        self.nodes += stats.nodes
+        return mv
+
+
+def play_game(game: int, seed: int, black: PlayerConfig, white: PlayerConfig,
+              max_plies: int = DEFAULT_MAX_PLIES, record: bool = False) -> GameResult:
+    """
+    Play one game. Dice and random players draw from one random.Random(seed),
+    so a game is fully reproducible from its seed. With `record` the result
+    carries the game as a game.record.GameRecord encoding.
+    """
+    rng = random.Random(seed)
+    players = {Player.BLACK: _Player(black, Player.BLACK, rng), Player.WHITE: _Player(white, Player.WHITE, rng)}
+    rec = GameRecord(seed=seed, settings={"black": asdict(black), "white": asdict(white), "max_plies": max_plies}) \
+        if record else None
+    state = initial_state()
+    plies = 0
+    start = time.perf_counter()
+    while not is_terminal(state) and plies < max_plies:
+        roll = toss_sticks(rng)
+        mv = players[state.turn].choose(state, roll)
+        state = skip_turn(state, roll) if mv is None else apply_move(state, roll, mv, validate=False)
+        if rec is not None:
+            rec.append(roll, mv)
+        plies += 1
+    w = winner(state)
+    if rec is not None:
+        rec.winner = w
+    return GameResult(
+        game=game,
+        seed=seed,
+        winner=w.value if w else None,
+        plies=plies,
+        nodes={p.value: players[p].nodes for p in players},
+        cpu={p.value: players[p].cpu for p in players},
+        time=time.perf_counter() - start,
+        record=rec.to_bytes() if rec is not None else None,
+    )
+
+
+def _play_task(args) -> GameResult:
+    return play_game(*args)
+
+
+def run_games(n: int, black: PlayerConfig, white: PlayerConfig, seed: int = 0, workers: int | None = None,
+              max_plies: int = DEFAULT_MAX_PLIES, record: bool = False):
+    """
+    Yield GameResults for n games in game order. Game i uses seed + i, so the
+    results don't depend on the number of workers.
+    """
+    tasks = [(i, seed + i, black, white, max_plies, record) for i in range(n)]
+    if workers == 1:
+        for t in tasks:
+            yield _play_task(t)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(_play_task, tasks)
+
+
+def _player_config(args, color: str) -> PlayerConfig:
+    weights = {}
+    path = getattr(args, f"{color}_weights")
+    if path:
+        with open(path) as f:
+            weights = json.load(f)
+    return PlayerConfig(
+        kind=getattr(args, color),
+        depth=getattr(args, f"{color}_depth"),
+        budget_ms=getattr(args, f"{color}_budget_ms"),
+        pruning=args.pruning,
+        ordering=args.ordering,
+        weights=weights,
+        tablebase=args.tablebase,
+        book=args.book,
+        iterations=getattr(args, f"{color}_iterations"),
+        rollout_plies=args.rollout_plies,
+    )
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="python -m senet.sim", description="Headless Senet self-play")
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("-o", "--out", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--record", default=None, help="append the games to this game.record archive")
+    parser.add_argument("--pruning", default="star2")
+    parser.add_argument("--ordering", choices=ORDERINGS, default="static", help="move ordering of the AI players")
+    parser.add_argument("--tablebase", default=None, help="bear-off tablebase file for the AI players")
+    parser.add_argument("--book", default=None, help="opening book file for the AI players")
+    parser.add_argument("--rollout-plies", type=int, default=0, help="mcts players: rollout length below new leaves")
+    for color in ("black", "white"):
+        parser.add_argument(f"--{color}", choices=PLAYER_KINDS, default="ai")
+        parser.add_argument(f"--{color}-depth", type=int, default=2)
+        parser.add_argument(f"--{color}-budget-ms", type=float, default=None)
+        parser.add_argument(f"--{color}-iterations", type=int, default=None, help="mcts: descents per move")
+        parser.add_argument(f"--{color}-weights", default=None, help="JSON file of EvalWeights overrides")
+    return parser
+
+
+def run(args) -> int:
+    black = _player_config(args, "black")
+    white = _player_config(args, "white")
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    archive = GameArchive(args.record) if args.record else None
+    wins = {Player.BLACK.value: 0, Player.WHITE.value: 0, None: 0}
+    cpu = {Player.BLACK.value: 0.0, Player.WHITE.value: 0.0}
+    try:
+        for result in run_games(args.games, black, white, args.seed, args.workers, args.max_plies,
+                                archive is not None):
+            wins[result.winner] += 1
+            for p, t in result.cpu.items():
+                cpu[p] += t
+            if archive is not None:
+                archive.append(GameRecord.from_bytes(result.record))
+            row = asdict(result)
+            del row["record"]
+            out.write(json.dumps(row) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if archive is not None:
+            archive.close()
+    print(f"BLACK {wins['BLACK']} | WHITE {wins['WHITE']} | unfinished {wins[None]}", file=sys.stderr)
+    print(f"CPU s: BLACK {cpu['BLACK']:.1f} | WHITE {cpu['WHITE']:.1f}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from game import rules
+from game.move import Move, MoveKind
+from game.dice import roll_array, toss_sticks
+from game.batch import initial, from_states, to_states, is_terminal, legal_mask, apply, random_pids
+
+
+def _move(pid, promote, i):
+    return None if pid < 0 else Move(piece_id=pid, kind=MoveKind.PROMOTE if promote[i, pid] else MoveKind.MOVE)
+
+
+def _play_both(b, plies, rng):
+    # Steps the games of `b` with random moves through both engines side by
+    # side. Every ply also checks every legal move of every game, not just
+    # the one played.
+    games = len(b.turn)
+    states = to_states(b)
+    for _ in range(plies):
+        live = ~is_terminal(b)
+        if not live.any():
+            break
+        rolls = roll_array(games, rng)
+        legal, promote = legal_mask(b, rolls)
+        for i in np.flatnonzero(live):
+            s, r = states[i], int(rolls[i])
+            ref = rules.legal_moves(s, r)
+            assert sorted(ref, key=lambda mv: mv.piece_id) == [_move(int(p), promote, i)
+                                                               for p in np.flatnonzero(legal[i])], (s, r)
+            for mv in ref or [None]:
+                one = from_states([s])
+                apply(one, [r], [mv.piece_id if mv else -1], promote[i:i + 1])
+                expect = rules.apply_move(s, r, mv, validate=False) if mv else rules.skip_turn(s, r)
+                assert to_states(one)[0] == expect, (s, r, mv)
+        pids = random_pids(legal, rng)
+        apply(b, rolls, pids, promote)
+        for i in np.flatnonzero(live):
+            s, r, mv = states[i], int(rolls[i]), _move(int(pids[i]), promote, i)
+            states[i] = rules.apply_move(s, r, mv, validate=False) if mv else rules.skip_turn(s, r)
+        assert to_states(b) == states
+    return b
+
+
+def _late_position(rng):
+    # Race the front piece for a while, for positions near the bear-off that
+    # random play takes a thousand plies to reach.
+    state = rules.initial_state()
+    for _ in range(rng.randrange(120, 220)):
+        roll = toss_sticks(rng)
+        moves = rules.legal_moves(state, roll)
+        if not moves:
+            nxt = rules.skip_turn(state, roll)
+        else:
+            my = state.pieces_of(state.turn)
+            nxt = rules.apply_move(state, roll, max(moves, key=lambda mv: (mv.kind == MoveKind.PROMOTE,
+                                                                          my[mv.piece_id])))
+        if rules.is_terminal(nxt):
+            break
+        state = nxt
+    return state
+
+
+def test_matches_rules_from_start():
+    _play_both(initial(8), 250, np.random.default_rng(0))
+
+
+def test_matches_rules_to_the_end():
+    rng = random.Random(1)
+    b = _play_both(from_states([_late_position(rng) for _ in range(12)]), 400, np.random.default_rng(1))
+    assert is_terminal(b).sum() >= 6
+
+
+def test_round_trip():
+    states = to_states(initial(3))
+    assert states == [rules.initial_state()] * 3
+    assert to_states(from_states(states)) == states
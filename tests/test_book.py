@@ -0,0 +1,58 @@
+import random
+from dataclasses import replace
+
+import pytest
+
+from game.rules import initial_state
+from ai.eval import DEFAULT_WEIGHTS
+from ai.book import OpeningBook, build, write
+from ai.expectiminimax import choose_best_move_given_roll
+from senet.sim import PlayerConfig, _Player
+from game.state import Player
+
+OTHER = replace(DEFAULT_WEIGHTS, vanguard=DEFAULT_WEIGHTS.vanguard * 3)
+
+
+@pytest.fixture(scope="module")
+def book_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("book") / "book.bin")
+    write(path, build(plies=1, depth=2, workers=1), 1, 2)
+    return path
+
+
+def test_book_answers_with_its_weights(book_path):
+    book = OpeningBook(book_path)
+    assert book.weights == DEFAULT_WEIGHTS
+    state = initial_state()
+    mv, val, stats = choose_best_move_given_roll(state, state.turn, 2, 3, book=book)
+    assert stats.book_hits == 1
+    assert (mv, val) == book.probe(state, 3)
+
+
+def test_search_with_other_weights_ignores_book(book_path):
+    state = initial_state()
+    mv, val, stats = choose_best_move_given_roll(state, state.turn, 2, 3, weights=OTHER, book=OpeningBook(book_path))
+    assert stats.book_hits == 0
+    assert (mv, val) == choose_best_move_given_roll(state, state.turn, 2, 3, weights=OTHER)[:2]
+
+
+def test_weights_round_trip(tmp_path):
+    path = str(tmp_path / "other.bin")
+    write(path, {}, 1, 2, OTHER)
+    assert OpeningBook(path).weights == OTHER
+
+
+def test_values_round_trip_exactly(tmp_path):
+    path = str(tmp_path / "exact.bin")
+    entries = {1: (0, 20_000_123.4375), 2: (3, -1 / 3)}
+    write(path, entries, 1, 2)
+    book = OpeningBook(path)
+    book._load()
+    assert book._entries == entries
+
+
+def test_sim_rejects_book_with_other_weights(book_path):
+    config = PlayerConfig(book=book_path, weights={"vanguard": OTHER.vanguard})
+    with pytest.raises(ValueError):
+        _Player(config, Player.BLACK, random.Random(0))
+    _Player(PlayerConfig(book=book_path), Player.BLACK, random.Random(0))
@@ -0,0 +1,58 @@
+import random
+from collections import Counter
+
+import pytest
+
+from game.constants import ROLL_PROBS
+from game.dice import ROLL_OF_BITS, toss_sticks, roll_bytes, roll_array, RollStream, HAVE_NUMPY
+
+N = 200_000
+# Chi-square with 4 degrees of freedom: exceeded by a correct generator one
+# time in a thousand.
+CHI2_LIMIT = 18.47
+
+
+def _chi2(rolls) -> float:
+    counts = Counter(rolls)
+    assert set(counts) <= set(ROLL_PROBS)
+    n = sum(counts.values())
+    return sum((counts[r] - n * p) ** 2 / (n * p) for r, p in ROLL_PROBS.items())
+
+
+def test_bit_patterns_give_roll_probs():
+    counts = Counter(ROLL_OF_BITS)
+    assert {r: k / 16 for r, k in counts.items()} == ROLL_PROBS
+
+
+def test_toss_sticks():
+    rng = random.Random(0)
+    assert _chi2(toss_sticks(rng) for _ in range(N)) < CHI2_LIMIT
+
+
+def test_roll_bytes():
+    data = roll_bytes(N, random.Random(1))
+    assert len(data) == N
+    assert _chi2(data) < CHI2_LIMIT
+    assert len(roll_bytes(7, random.Random(1))) == 7
+
+
+@pytest.mark.skipif(not HAVE_NUMPY, reason="roll_array needs numpy")
+def test_roll_array():
+    import numpy as np
+    assert _chi2(roll_array(N, np.random.default_rng(2)).tolist()) < CHI2_LIMIT
+
+
+def test_roll_stream():
+    assert _chi2(RollStream(3).take(N)) < CHI2_LIMIT
+
+
+def test_roll_stream_is_reproducible():
+    a = RollStream(5, game=2)
+    first = a.take(10)
+    a.skip(RollStream.CHUNK)
+    b = RollStream(5, game=2)
+    b.skip(10 + RollStream.CHUNK)
+    assert b.take(100) == a.take(100)
+    assert a.position == b.position
+    assert RollStream(5, game=2).take(10) == first
+    assert RollStream(5, game=3).take(50) != RollStream(5, game=2).take(50)
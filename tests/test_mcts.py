@@ -0,0 +1,61 @@
+import random
+
+from game.state import GameState
+from game.rules import initial_state, legal_moves, apply_move, skip_turn, is_terminal
+from game.dice import toss_sticks
+from game.zobrist import position_hash
+from game.canonical import move_from_square
+from ai.mcts import MCTS
+
+
+def _renumber(state: GameState) -> GameState:
+    # The same position with each side's piece ids reversed.
+    n = len(state.black)
+    pending = state.pending
+    if pending:
+        pp, pid, req = pending
+        pending = (pp, n - 1 - pid, req)
+    return GameState(black=state.black[::-1], white=state.white[::-1], turn=state.turn, pending=pending)
+
+
+def _check_tree(node, state, depth=3):
+    # Every edge decodes to a legal move of `state`, and leads to the node of
+    # the position that move makes.
+    assert node.key == position_hash(state)
+    if depth == 0 or is_terminal(state):
+        return
+    for roll, edges in node.edges.items():
+        legal = legal_moves(state, roll)
+        for e in edges:
+            mv = move_from_square(state, e.code)
+            if mv is None:
+                assert not legal
+                child = skip_turn(state, roll)
+            else:
+                assert mv in legal
+                child = apply_move(state, roll, mv)
+            if e.child is not None:
+                _check_tree(e.child, child, depth - 1)
+
+
+def test_reused_subtree_under_another_numbering():
+    rng = random.Random(3)
+    state = initial_state()
+    for _ in range(30):
+        roll = toss_sticks(rng)
+        moves = legal_moves(state, roll)
+        state = apply_move(state, roll, rng.choice(moves)) if moves else skip_turn(state, roll)
+    mcts = MCTS(seed=1)
+    roll = 3
+    mv, _, _ = mcts.choose_move(state, state.turn, roll, max_iterations=3000)
+    child = apply_move(state, roll, mv) if mv else skip_turn(state, roll)
+    renumbered = _renumber(child)
+    assert renumbered != child and position_hash(renumbered) == position_hash(child)
+
+    for r in range(1, 6):
+        mv, _, stats = mcts.choose_move(renumbered, renumbered.turn, r, max_iterations=500)
+        if mv is not None:
+            assert mv in legal_moves(renumbered, r)
+    root = mcts._root
+    assert sum(e.visits for edges in root.edges.values() for e in edges) > 5 * 500
+    _check_tree(root, renumbered)
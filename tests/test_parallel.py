@@ -0,0 +1,64 @@
+import random
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+
+from game.rules import initial_state, legal_moves, apply_move, skip_turn, is_terminal
+from game.dice import toss_sticks
+from ai.eval import DEFAULT_WEIGHTS
+from ai.expectiminimax import choose_best_move_given_roll, SearchCancelled, SearchTimeout
+from ai.parallel import ParallelSearch
+
+
+def _positions(n, seed=11):
+    rng = random.Random(seed)
+    out = []
+    while len(out) < n:
+        state = initial_state()
+        for _ in range(rng.randrange(10, 50)):
+            roll = toss_sticks(rng)
+            moves = legal_moves(state, roll)
+            state = apply_move(state, roll, rng.choice(moves)) if moves else skip_turn(state, roll)
+            if is_terminal(state):
+                break
+        roll = toss_sticks(rng)
+        if not is_terminal(state) and len(legal_moves(state, roll)) > 1:
+            out.append((state, roll))
+    return out
+
+
+@pytest.mark.parametrize("split_rolls", [False, True])
+def test_matches_serial_when_weights_change(split_rolls):
+    other = replace(DEFAULT_WEIGHTS, vanguard=DEFAULT_WEIGHTS.vanguard * 4, rear=2000.0, danger=-80000.0)
+    positions = _positions(4)
+    with ParallelSearch(workers=2) as search:
+        # The same positions twice, so the second pass would hit entries the
+        # first one stored if the workers shared a table across weights.
+        for weights in (DEFAULT_WEIGHTS, other, DEFAULT_WEIGHTS):
+            for state, roll in positions:
+                mv, val, _ = search.choose_best_move(state, state.turn, 3, roll, weights=weights,
+                                                     split_rolls=split_rolls)
+                serial_mv, serial_val, _ = choose_best_move_given_roll(state, state.turn, 3, roll, weights=weights)
+                assert (mv, val) == (serial_mv, serial_val)
+
+
+def test_deadline_and_cancel_stop_the_workers():
+    state, roll = _positions(1, seed=3)[0]
+    with ParallelSearch(workers=2) as search:
+        start = time.perf_counter()
+        with pytest.raises(SearchTimeout) as info:
+            search.choose_best_move(state, state.turn, 12, roll, deadline=start + 0.3)
+        assert time.perf_counter() - start < 5.0
+        assert info.value.stats.nodes > 0
+
+        timer = threading.Timer(0.3, search.cancel)
+        timer.start()
+        with pytest.raises(SearchCancelled):
+            search.choose_best_move(state, state.turn, 12, roll, split_rolls=True)
+        timer.join()
+
+        # The pool is still usable and the event is cleared for the next search.
+        mv, val, _ = search.choose_best_move(state, state.turn, 3, roll)
+        assert (mv, val) == choose_best_move_given_roll(state, state.turn, 3, roll)[:2]
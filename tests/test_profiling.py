@@ -0,0 +1,23 @@
+import random
+
+from game.rules import initial_state, legal_moves, apply_move, skip_turn
+from game.dice import toss_sticks
+from ai.profiling import search_profile, STAR1
+from ai.expectiminimax import choose_best_move_given_roll
+
+
+def test_roll_values_only_count_complete_chance_nodes():
+    rng = random.Random(0)
+    state = initial_state()
+    for _ in range(40):
+        roll = toss_sticks(rng)
+        moves = legal_moves(state, roll)
+        state = apply_move(state, roll, rng.choice(moves)) if moves else skip_turn(state, roll)
+    with search_profile() as prof:
+        choose_best_move_given_roll(state, state.turn, 4, 3)
+    assert sum(prof.cutoffs[STAR1].values()) > 0
+    assert prof.roll_values
+    for rolls in prof.roll_values.values():
+        # A node cut partway would have counted only its first rolls.
+        assert len({k for k, _ in rolls.values()}) == 1
+        assert len(rolls) == 5
@@ -0,0 +1,65 @@
+import random
+import struct
+from dataclasses import replace
+
+import pytest
+
+from game.state import GameState, Player, OUT
+from ai.eval import DEFAULT_WEIGHTS, eval_bounds
+from ai.tablebase import SIZE, Tablebase, index_of, state_of, write
+from senet.sim import PlayerConfig, _Player
+
+OTHER = replace(DEFAULT_WEIGHTS, vanguard=DEFAULT_WEIGHTS.vanguard * 3)
+# Three men each in the region, four off each.
+RACE = GameState(black=(22, 24, 26, OUT, OUT, OUT, OUT), white=(21, 23, 25, OUT, OUT, OUT, OUT), turn=Player.BLACK)
+
+
+@pytest.fixture(scope="module")
+def table_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tb") / "tb.bin")
+    write(path, [0.5] * SIZE)
+    return path
+
+
+def test_index_round_trip():
+    rng = random.Random(7)
+    for index in rng.sample(range(SIZE), 5000):
+        state = state_of(index)
+        if state is not None:
+            assert index_of(state) == index
+    assert index_of(state_of(index_of(RACE))) == index_of(RACE)
+
+
+def test_value_rises_with_probability_inside_bounds(table_path):
+    tb = Tablebase(table_path)
+    assert tb.probe(RACE) == pytest.approx(0.5, abs=1e-4)
+    index = index_of(RACE)
+    for ai_player in (Player.BLACK, Player.WHITE):
+        lo, hi = eval_bounds(RACE, ai_player, 0, DEFAULT_WEIGHTS)
+        values = []
+        for q in range(0, 0x10000, 0x1000):
+            tb._table = {index: q}
+            values.append(tb.value(RACE, ai_player))
+        assert all(lo <= v <= hi for v in values)
+        rising = values if ai_player == RACE.turn else values[::-1]
+        assert all(a < b for a, b in zip(rising, rising[1:]))
+
+
+def test_other_weights_are_rejected(table_path):
+    tb = Tablebase(table_path)
+    assert tb.weights == DEFAULT_WEIGHTS
+    with pytest.raises(ValueError):
+        tb.value(RACE, Player.BLACK, OTHER)
+    with pytest.raises(ValueError):
+        _Player(PlayerConfig(weights={"vanguard": OTHER.vanguard}, tablebase=table_path),
+                Player.BLACK, random.Random(0))
+
+
+def test_header_mismatch_is_rejected(tmp_path, table_path):
+    with open(table_path, "rb") as f:
+        data = bytearray(f.read())
+    struct.pack_into("<H", data, 4, 1)  # an older version
+    path = tmp_path / "old.bin"
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        Tablebase(str(path)).probe(RACE)
@@ -0,0 +1,38 @@
+import pickle
+
+import pytest
+
+from game.rules import initial_state
+from ai.trace import TraceSink, ArrayTrace, FileTrace, read_trace, RESULT
+from ai.expectiminimax import choose_best_move_given_roll
+
+
+def test_incomplete_sink_fails_on_construction():
+    with pytest.raises(TypeError):
+        TraceSink()
+
+    class NoRecords(TraceSink):
+        def _write(self, *fields):
+            pass
+
+    with pytest.raises(TypeError):
+        NoRecords()
+
+
+def _fields(records):
+    # alpha and beta are NaN where they don't apply, and NaN != NaN.
+    return [(r.kind, r.depth, r.roll, r.move, r.value) for r in records]
+
+
+def test_array_and_file_traces_agree(tmp_path):
+    state = initial_state()
+    array = ArrayTrace()
+    choose_best_move_given_roll(state, state.turn, 2, 3, trace=array)
+    for name in ("t.bin", "t.jsonl"):
+        path = str(tmp_path / name)
+        with FileTrace(path) as sink:
+            choose_best_move_given_roll(state, state.turn, 2, 3, trace=sink)
+        assert _fields(read_trace(path)) == _fields(array.records())
+    records = list(array.records())
+    assert records[-1].kind == RESULT
+    assert _fields(pickle.loads(pickle.dumps(array)).records()) == _fields(records)
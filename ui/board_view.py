@@ -0,0 +1,241 @@
+from __future__ import annotations
+import tkinter as tk
+
+from game.state import GameState, OUT
+from game.path import index_to_cell, cell_to_index
+from game.constants import BOARD_COLS, BOARD_ROWS, PIECES_PER_PLAYER
+
+CELL_SIZE = 85
+PADDING = 20
+
+EXIT_BOX_W = 180
+EXIT_BOX_H = 250
+
+SPECIAL_SQUARES = (15, 26, 27, 28, 29, 30)
+HIGHLIGHT_FILL = "#90EE90"
+PIECE_RADIUS = 25
+_SIDES = ("b", "w")
+_PIECE_STYLE = {"b": ("#708090", 0.5), "w": ("#FFFAFA", 1)}  # fill, outline width
+_OUT_FILL = {"b": "#708090", "w": "#FFFAFA"}
+
+
+def square_origin(square: int) -> tuple[int, int]:
+    """Top-left canvas corner of a board square."""
+    cell = index_to_cell(square)
+    return PADDING + cell.col * CELL_SIZE, PADDING + cell.row * CELL_SIZE
+
+
+def exit_box() -> tuple[int, int, int, int]:
+    bx1 = PADDING + BOARD_COLS * CELL_SIZE + 30
+    by1 = PADDING
+    return bx1, by1, bx1 + EXIT_BOX_W, by1 + EXIT_BOX_H
+
+
+class BoardView:
+    """
+    Retained-mode board on a Canvas: every item is created once in
+    __init__ and draw() only moves, shows, hides or recolours the ones
+    whose look differs from the last draw().
+
+    Items are tagged by what they show: "sq<n>" for everything on square n
+    and "fill<n>" for its background, "b<pid>"/"w<pid>" for a piece,
+    "out_b<i>"/"out_w<i>" for the i-th piece in the exit box, and "exit_box",
+    "exit_text", "dest" and "selected" for the overlays. Items stacked in
+    the same order as the old full redraw, so they look the same.
+    """
+
+    def __init__(self, canvas: tk.Canvas):
+        self.canvas = canvas
+        self._shown: dict[str, object] = {}
+        self._base_fill: dict[int, str] = {}
+        self._build()
+
+    # --- one-off construction ---
+
+    def _build(self):
+        c = self.canvas
+        for r in range(BOARD_ROWS):
+            for col in range(BOARD_COLS):
+                self._build_cell(r, col)
+
+        bx1, by1, bx2, by2 = exit_box()
+        c.create_rectangle(bx1, by1, bx2, by2, fill="#f8f9fa", outline="#333", width=2, tags="exit_box")
+        c.create_text((bx1 + bx2) // 2, by1 + 20, text="EXIT", font=("Arial", 14, "bold"), tags="exit_text")
+        for side, cx in (("b", bx1 + 40), ("w", bx1 + 120)):
+            for i in range(PIECES_PER_PLAYER):
+                y = by1 + 50 + i * 30
+                c.create_oval(cx - 20, y, cx + 20, y + 40, fill=_OUT_FILL[side], outline="#000000", width=0.4,
+                              state=tk.HIDDEN, tags=f"out_{side}{i}")
+
+        c.create_rectangle(0, 0, 0, 0, outline=HIGHLIGHT_FILL, width=4, state=tk.HIDDEN, tags="dest")
+        c.create_oval(0, 0, 0, 0, outline=HIGHLIGHT_FILL, width=4, state=tk.HIDDEN, tags="selected")
+        for side in _SIDES:
+            fill, width = _PIECE_STYLE[side]
+            for pid in range(PIECES_PER_PLAYER):
+                c.create_oval(0, 0, 0, 0, fill=fill, outline="#000000", width=width, state=tk.HIDDEN,
+                              tags=("piece", f"{side}{pid}"))
+
+    def _build_cell(self, r: int, col: int):
+        c = self.canvas
+        x1 = PADDING + col * CELL_SIZE
+        y1 = PADDING + r * CELL_SIZE
+        x2 = x1 + CELL_SIZE
+        y2 = y1 + CELL_SIZE
+        idx = cell_to_index(r, col)
+        fill = self._base_fill[idx] = "#F5F5DC" if (r + col) % 2 == 0 else "#DEB887"
+        self._shown[f"fill{idx}"] = fill
+        tags = ("cell", f"sq{idx}", f"fill{idx}")
+        line_tags = ("cell", f"sq{idx}")
+        radius = 4
+        d = radius * 2
+        c.create_rectangle(x1 + radius, y1, x2 - radius, y2, fill=fill, outline="", width=0, tags=tags)
+        c.create_rectangle(x1, y1 + radius, x2, y2 - radius, fill=fill, outline="", width=0, tags=tags)
+        c.create_oval(x1, y1, x1 + d, y1 + d, fill=fill, outline="", width=0, tags=tags)
+        c.create_oval(x2 - d, y1, x2, y1 + d, fill=fill, outline="", width=0, tags=tags)
+        c.create_oval(x1, y2 - d, x1 + d, y2, fill=fill, outline="", width=0, tags=tags)
+        c.create_oval(x2 - d, y2 - d, x2, y2, fill=fill, outline="", width=0, tags=tags)
+        c.create_line(x1 + radius, y1, x2 - radius, y1, fill="#000000", width=0.5, tags=line_tags)
+        c.create_line(x1 + radius, y2, x2 - radius, y2, fill="#000000", width=0.5, tags=line_tags)
+        c.create_line(x1, y1 + radius, x1, y2 - radius, fill="#000000", width=0.5, tags=line_tags)
+        c.create_line(x2, y1 + radius, x2, y2 - radius, fill="#000000", width=0.5, tags=line_tags)
+        c.create_arc(x1, y1, x1 + d, y1 + d, start=90, extent=90, outline="#000000", width=0.5, style=tk.ARC,
+                     tags=line_tags)
+        c.create_arc(x2 - d, y1, x2, y1 + d, start=0, extent=90, outline="#000000", width=0.5, style=tk.ARC,
+                     tags=line_tags)
+        c.create_arc(x1, y2 - d, x1 + d, y2, start=180, extent=90, outline="#000000", width=0.5, style=tk.ARC,
+                     tags=line_tags)
+        c.create_arc(x2 - d, y2 - d, x2, y2, start=270, extent=90, outline="#000000", width=0.5, style=tk.ARC,
+                     tags=line_tags)
+        if idx in SPECIAL_SQUARES:
+            c.create_rectangle(x1 + 2, y1 + 2, x2 - 2, y2 - 2, outline="#2a9d8f", width=3, tags=line_tags)
+            self._build_icon(x1, y1, x2, y2, idx, line_tags)
+
+    def _build_icon(self, x1, y1, x2, y2, square: int, tags):
+        """Special square icons (15, 26-30)"""
+        c = self.canvas
+        cx = (x1 + x2) // 2
+        cy = (y1 + y2) // 2
+        icon_color = "#000000"
+
+        if square == 15:
+            c.create_oval(cx - 10, cy - 20, cx + 10, cy - 5, outline=icon_color, width=2, tags=tags)
+            c.create_line(cx, cy - 5, cx, cy + 15, width=3, fill=icon_color, tags=tags)
+            c.create_line(cx - 8, cy + 5, cx + 8, cy + 5, width=3, fill=icon_color, tags=tags)
+
+        elif square == 26:
+            for i in range(3):
+                x = cx - 15 + i * 15
+                c.create_line(x, cy - 18, x, cy + 12, width=3, fill=icon_color, tags=tags)
+                c.create_rectangle(x - 4, cy - 20, x + 4, cy - 12, outline=icon_color, width=2, tags=tags)
+
+        elif square == 27:
+            for wave_y in range(3):
+                y = cy - 10 + wave_y * 10
+                points = []
+                for i in range(7):
+                    x = x1 + 8 + i * (CELL_SIZE - 16) // 6
+                    y_offset = 4 * (1 if i % 2 == 0 else -1)
+                    points.extend([x, y + y_offset])
+                c.create_line(points, width=2, fill=icon_color, smooth=True, tags=tags)
+
+        elif square == 28:
+            for i in range(3):
+                x = cx - 18 + i * 18
+                c.create_rectangle(x - 5, cy - 8, x + 5, cy + 8, outline=icon_color, width=2, tags=tags)
+                c.create_oval(x - 3, cy - 12, x + 3, cy - 6, outline=icon_color, width=2, tags=tags)
+                c.create_arc(x - 8, cy - 5, x + 2, cy + 5, start=0, extent=180, outline=icon_color, width=2,
+                             style=tk.ARC, tags=tags)
+
+        elif square == 29:
+            for i in range(2):
+                x = cx - 12 + i * 24
+                c.create_oval(x - 5, cy - 18, x + 5, cy - 8, outline=icon_color, width=2, tags=tags)
+                c.create_rectangle(x - 4, cy - 8, x + 4, cy + 5, outline=icon_color, width=2, tags=tags)
+                c.create_arc(x - 8, cy + 2, x, cy + 12, start=0, extent=90, outline=icon_color, width=2,
+                             style=tk.ARC, tags=tags)
+                c.create_arc(x, cy + 2, x + 8, cy + 12, start=90, extent=90, outline=icon_color, width=2,
+                             style=tk.ARC, tags=tags)
+
+        elif square == 30:
+            c.create_oval(cx - 15, cy - 15, cx + 15, cy + 15, outline=icon_color, width=2, tags=tags)
+            c.create_oval(cx - 10, cy - 10, cx + 10, cy + 10, outline=icon_color, width=2, tags=tags)
+            c.create_oval(cx - 4, cy - 4, cx + 4, cy + 4, fill=icon_color, outline=icon_color, tags=tags)
+
+    # --- updates ---
+
+    def _changed(self, key: str, value) -> bool:
+        # Records `value` as what `key` shows; True if that is news.
+        if self._shown.get(key, _UNSET) == value:
+            return False
+        self._shown[key] = value
+        return True
+
+    def _place(self, tag: str, box):
+        # box: canvas coordinates, or None to hide the item.
+        if not self._changed(tag, box):
+            return
+        if box is None:
+            self.canvas.itemconfigure(tag, state=tk.HIDDEN)
+        else:
+            self.canvas.coords(tag, *box)
+            self.canvas.itemconfigure(tag, state=tk.NORMAL)
+
+    def draw(self, state: GameState, highlights=(), dest: int | None = None, selected: tuple[str, int] | None = None,
+             exit_available: bool = False):
+        """
+        Bring the canvas up to `state`. `highlights`: squares shown in the
+        highlight colour (the AI's last move); `dest`: the square outlined
+        as the selected piece's destination; `selected`: ("b" or "w", piece
+        id) of the piece ringed as selected; `exit_available`: light up the
+        exit box.
+        """
+        c = self.canvas
+        for sq, base in self._base_fill.items():
+            fill = HIGHLIGHT_FILL if sq in highlights else base
+            if self._changed(f"fill{sq}", fill):
+                c.itemconfigure(f"fill{sq}", fill=fill)
+
+        if self._changed("exit_box", exit_available):
+            c.itemconfigure("exit_box", fill=HIGHLIGHT_FILL if exit_available else "#f8f9fa",
+                            outline="#2a9d8f" if exit_available else "#333", width=4 if exit_available else 2)
+            c.itemconfigure("exit_text", text="EXIT (Click!)" if exit_available else "EXIT")
+
+        for side, positions in zip(_SIDES, (state.black, state.white)):
+            out = sum(1 for p in positions if p == OUT)
+            for i in range(PIECES_PER_PLAYER):
+                tag = f"out_{side}{i}"
+                if self._changed(tag, i < out):
+                    c.itemconfigure(tag, state=tk.NORMAL if i < out else tk.HIDDEN)
+
+        dest_box = None
+        if dest is not None:
+            x1, y1 = square_origin(dest)
+            dest_box = (x1 + 3, y1 + 3, x1 + CELL_SIZE - 3, y1 + CELL_SIZE - 3)
+        self._place("dest", dest_box)
+
+        ring = None
+        if selected is not None:
+            side, pid = selected
+            pos = (state.black if side == "b" else state.white)[pid]
+            if pos != OUT:
+                cx, cy = _centre(pos)
+                r = PIECE_RADIUS + 6
+                ring = (cx - r, cy - r, cx + r, cy + r)
+        self._place("selected", ring)
+
+        r = PIECE_RADIUS
+        for side, positions in zip(_SIDES, (state.black, state.white)):
+            for pid, pos in enumerate(positions):
+                box = None
+                if pos != OUT:
+                    cx, cy = _centre(pos)
+                    box = (cx - r, cy - r, cx + r, cy + r)
+                self._place(f"{side}{pid}", box)
+
+
+_UNSET = object()
+
+
+def _centre(square: int) -> tuple[int, int]:
+    x1, y1 = square_origin(square)
+    return x1 + CELL_SIZE // 2, y1 + CELL_SIZE // 2
@@ -1,25 +1,32 @@
 from __future__ import annotations
+import argparse
+import sys
+import time
 import tkinter as tk
 from dataclasses import dataclass
+from typing import Sequence
 
 from game.rules import initial_state, legal_moves, apply_move, skip_turn, is_terminal, winner
-from game.state import Player, OUT
+from game.state import GameState, Player, OUT
 from game.dice import toss_sticks
-from game.path import index_to_cell, cell_to_index
+from game.path import cell_to_index
 from game.constants import BOARD_COLS, BOARD_ROWS
 
-from ai.expectiminimax import choose_best_move_given_roll
+from ai.trace import format_trace
 from game.move import Move, MoveKind
-
-CELL_SIZE = 85
-PADDING = 20
-
-EXIT_BOX_W = 180
-EXIT_BOX_H = 250
+from game.record import GameArchive
+from .board_view import BoardView, CELL_SIZE, PADDING, EXIT_BOX_W, EXIT_BOX_H
 
 AI_PLAYER = Player.WHITE
 DEFAULT_DEPTH = 2
 
+AI_POLL_MS = 50
+SPINNER_FRAMES = "◐◓◑◒"
+
+# Replays redraw at most once per display frame.
+FRAME_MS = 16
+REPLAY_PLIES_PER_SECOND = 60.0
+
 
 @dataclass
 class UiState:
@@ -35,17 +42,38 @@ class UiState:
 
 
 class SenetTkUI:
-    def __init__(self):
+    """
+    Human vs AI game, or with `replay` a list of states played back at
+    `plies_per_second` with nobody to move. Either way the board is a
+    BoardView that only touches the canvas items that change, and a replay
+    redraws at most once per FRAME_MS however fast the plies go by.
+    """
+
+    def __init__(self, engine: str = "expectiminimax", replay: Sequence[GameState] | None = None,
+                 plies_per_second: float = REPLAY_PLIES_PER_SECOND, book: str | None = None):
         self.root = tk.Tk()
-        self.root.title("Senet (Human vs AI)")
+        self.root.title("Senet (Human vs AI)" if replay is None else "Senet (replay)")
 
-        self.state = initial_state()
+        self.state = replay[0] if replay else initial_state()
         self.ui = UiState()
+        self._engine = engine
+        self._book = book
+        self.search = self._new_search() if replay is None else None
+        self._spinner_frame = 0
+        self._score_counts = None
+        self._replay: list[GameState] | None = None
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
         self._build_layout()
         self._render_all()
         self.root.update()
         self.root.update_idletasks()
+        if replay is not None:
+            self._replay = list(replay)
+            self._replay_start = time.perf_counter()
+            self._replay_pps = plies_per_second
+            self.root.after(FRAME_MS, self._replay_frame)
+            return
         self._ask_print_option()
         self._check_end_or_prompt()
     
@@ -187,6 +215,12 @@ class SenetTkUI:
         self.lbl_ai_nodes = tk.Label(ai_control_frame, text="Nodes: 0", font=("Arial", 9), fg="blue")
         self.lbl_ai_nodes.pack(side=tk.LEFT, padx=10)
 
+        self.lbl_spinner = tk.Label(ai_control_frame, text="", font=("Arial", 12), fg="blue", width=2)
+        self.lbl_spinner.pack(side=tk.LEFT)
+
+        self.btn_move_now = tk.Button(ai_control_frame, text="Move now", command=self.on_move_now, state=tk.DISABLED)
+        self.btn_move_now.pack(side=tk.LEFT, padx=5)
+
         self.msg = tk.Label(self.root, text="", anchor="w", justify="left", fg="darkgreen", font=("Arial", 11, "bold"))
         self.msg.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
 
@@ -197,11 +231,17 @@ class SenetTkUI:
         
         self.canvas = tk.Canvas(self.root, width=w, height=h, bg="#808080")
         self.canvas.pack(side=tk.TOP, padx=10, pady=10)
+        self.board = BoardView(self.canvas)
         
         self.root.geometry(f"{w + 50}x{h + 200}")
 
         self.canvas.bind("<Button-1>", self.on_canvas_click)
 
+    def _new_search(self):
+        # Imported here: replays never search, so they don't load the engine.
+        from ai.worker import BackgroundSearch
+        return BackgroundSearch(self._engine, self._book)
+
     def _set_status(self, text: str, error: bool = False):
         self.msg.configure(text="", fg=("red" if error else "darkgreen"))
     
@@ -217,6 +257,9 @@ class SenetTkUI:
     
     def _update_score_boxes(self, black_count: int, white_count: int):
         """Update the score boxes with circles representing exited pieces"""
+        if self._score_counts == (black_count, white_count):
+            return
+        self._score_counts = (black_count, white_count)
         self.black_score_box.delete("all")
         self.lbl_black_score.configure(text=f"Black: {black_count}")
         
@@ -254,56 +297,9 @@ class SenetTkUI:
                     fill="#FFFAFA", outline="#000000", width=0.4
                 )
 
-    def _draw_special_square_icon(self, canvas, x1, y1, x2, y2, square: int):
-        """Draw special square icons (15, 26-30)"""
-        cx = (x1 + x2) // 2
-        cy = (y1 + y2) // 2
-        icon_color = "#000000"
-        
-        if square == 15:
-            self.canvas.create_oval(cx - 10, cy - 20, cx + 10, cy - 5, outline=icon_color, width=2)
-            self.canvas.create_line(cx, cy - 5, cx, cy + 15, width=3, fill=icon_color)
-            self.canvas.create_line(cx - 8, cy + 5, cx + 8, cy + 5, width=3, fill=icon_color)
-        
-        elif square == 26:
-            for i in range(3):
-                x = cx - 15 + i * 15
-                self.canvas.create_line(x, cy - 18, x, cy + 12, width=3, fill=icon_color)
-                self.canvas.create_rectangle(x - 4, cy - 20, x + 4, cy - 12, outline=icon_color, width=2)
-        
-        elif square == 27:
-            for wave_y in range(3):
-                y = cy - 10 + wave_y * 10
-                points = []
-                for i in range(7):
-                    x = x1 + 8 + i * (CELL_SIZE - 16) // 6
-                    y_offset = 4 * (1 if i % 2 == 0 else -1)
-                    points.extend([x, y + y_offset])
-                if len(points) >= 4:
-                    self.canvas.create_line(points, width=2, fill=icon_color, smooth=True)
-        
-        elif square == 28:
-            for i in range(3):
-                x = cx - 18 + i * 18
-                self.canvas.create_rectangle(x - 5, cy - 8, x + 5, cy + 8, outline=icon_color, width=2)
-                self.canvas.create_oval(x - 3, cy - 12, x + 3, cy - 6, outline=icon_color, width=2)
-                self.canvas.create_arc(x - 8, cy - 5, x + 2, cy + 5, start=0, extent=180, outline=icon_color, width=2, style=tk.ARC)
-        
-        elif square == 29:
-            for i in range(2):
-                x = cx - 12 + i * 24
-                self.canvas.create_oval(x - 5, cy - 18, x + 5, cy - 8, outline=icon_color, width=2)
-                self.canvas.create_rectangle(x - 4, cy - 8, x + 4, cy + 5, outline=icon_color, width=2)
-                self.canvas.create_arc(x - 8, cy + 2, x, cy + 12, start=0, extent=90, outline=icon_color, width=2, style=tk.ARC)
-                self.canvas.create_arc(x, cy + 2, x + 8, cy + 12, start=90, extent=90, outline=icon_color, width=2, style=tk.ARC)
-        
-        elif square == 30:
-            self.canvas.create_oval(cx - 15, cy - 15, cx + 15, cy + 15, outline=icon_color, width=2)
-            self.canvas.create_oval(cx - 10, cy - 10, cx + 10, cy + 10, outline=icon_color, width=2)
-            self.canvas.create_oval(cx - 4, cy - 4, cx + 4, cy + 4, fill=icon_color, outline=icon_color)
-
     def _draw_game_over_overlay(self):
         """Draw Game Over overlay on the canvas"""
+        self.canvas.delete("overlay")
         if not is_terminal(self.state):
             return
         
@@ -318,7 +314,7 @@ class SenetTkUI:
         
         self.canvas.create_rectangle(
             0, 0, canvas_width, canvas_height,
-            fill="black", outline="", stipple="gray50"
+            fill="black", outline="", stipple="gray50", tags="overlay"
         )
         
         center_x = canvas_width // 2
@@ -329,7 +325,8 @@ class SenetTkUI:
                 center_x, center_y - 80,
                 text="🎉 CONGRATULATIONS! 🎉",
                 font=("Arial", 36, "bold"),
-                fill="gold"
+                fill="gold",
+                tags="overlay"
             )
             winner_text = "You Won! 🏆"
             winner_color = "green"
@@ -338,7 +335,8 @@ class SenetTkUI:
                 center_x, center_y - 60,
                 text="🎮 GAME OVER 🎮",
                 font=("Arial", 32, "bold"),
-                fill="red"
+                fill="red",
+                tags="overlay"
             )
             winner_text = "AI Won! 🤖"
             winner_color = "orange"
@@ -347,7 +345,8 @@ class SenetTkUI:
             center_x, center_y,
             text=winner_text,
             font=("Arial", 24, "bold"),
-            fill=winner_color
+            fill=winner_color,
+            tags="overlay"
         )
         
         score_text = f"Black: {b_out}/7 | White: {w_out}/7"
@@ -355,94 +354,21 @@ class SenetTkUI:
             center_x, center_y + 40,
             text=score_text,
             font=("Arial", 18),
-            fill="white"
+            fill="white",
+            tags="overlay"
         )
 
     def _render_all(self):
-        self.canvas.delete("all")
-
-        for r in range(BOARD_ROWS):
-            for c in range(BOARD_COLS):
-                x1 = PADDING + c * CELL_SIZE
-                y1 = PADDING + r * CELL_SIZE
-                x2 = x1 + CELL_SIZE
-                y2 = y1 + CELL_SIZE
-                
-                fill = "#F5F5DC" if (r + c) % 2 == 0 else "#DEB887"
-                
-                idx = cell_to_index(r, c)
-                
-                highlight = False
-                if idx == self.ui.ai_move_from or idx == self.ui.ai_move_to:
-                    fill = "#90EE90"
-                    highlight = True
-                
-                radius = 4
-                self.canvas.create_rectangle(x1 + radius, y1, x2 - radius, y2, fill=fill, outline="", width=0)
-                self.canvas.create_rectangle(x1, y1 + radius, x2, y2 - radius, fill=fill, outline="", width=0)
-                self.canvas.create_oval(x1, y1, x1 + radius*2, y1 + radius*2, fill=fill, outline="", width=0)
-                self.canvas.create_oval(x2 - radius*2, y1, x2, y1 + radius*2, fill=fill, outline="", width=0)
-                self.canvas.create_oval(x1, y2 - radius*2, x1 + radius*2, y2, fill=fill, outline="", width=0)
-                self.canvas.create_oval(x2 - radius*2, y2 - radius*2, x2, y2, fill=fill, outline="", width=0)
-                self.canvas.create_line(x1 + radius, y1, x2 - radius, y1, fill="#000000", width=0.5)
-                self.canvas.create_line(x1 + radius, y2, x2 - radius, y2, fill="#000000", width=0.5)
-                self.canvas.create_line(x1, y1 + radius, x1, y2 - radius, fill="#000000", width=0.5)
-                self.canvas.create_line(x2, y1 + radius, x2, y2 - radius, fill="#000000", width=0.5)
-                self.canvas.create_arc(x1, y1, x1 + radius*2, y1 + radius*2, start=90, extent=90, outline="#000000", width=0.5, style=tk.ARC)
-                self.canvas.create_arc(x2 - radius*2, y1, x2, y1 + radius*2, start=0, extent=90, outline="#000000", width=0.5, style=tk.ARC)
-                self.canvas.create_arc(x1, y2 - radius*2, x1 + radius*2, y2, start=180, extent=90, outline="#000000", width=0.5, style=tk.ARC)
-                self.canvas.create_arc(x2 - radius*2, y2 - radius*2, x2, y2, start=270, extent=90, outline="#000000", width=0.5, style=tk.ARC)
-
-                if idx in (15, 26, 27, 28, 29, 30):
-                    self.canvas.create_rectangle(x1 + 2, y1 + 2, x2 - 2, y2 - 2, outline="#2a9d8f", width=3)
-                    self._draw_special_square_icon(self.canvas, x1, y1, x2, y2, idx)
-
-        bx1 = PADDING + BOARD_COLS * CELL_SIZE + 30
-        by1 = PADDING
-        bx2 = bx1 + EXIT_BOX_W
-        by2 = by1 + EXIT_BOX_H
-        
         exit_available = False
         if self.state.turn == self.ui.human_player and self.ui.roll is not None:
             mvs = legal_moves(self.state, self.ui.roll)
             exit_available = any(m.kind == MoveKind.PROMOTE for m in mvs)
-        
-        exit_fill = "#90EE90" if exit_available else "#f8f9fa"
-        exit_outline = "#2a9d8f" if exit_available else "#333"
-        exit_width = 4 if exit_available else 2
-        
-        self.canvas.create_rectangle(bx1, by1, bx2, by2, fill=exit_fill, outline=exit_outline, width=exit_width)
-        exit_text = "EXIT (Click!)" if exit_available else "EXIT"
-        self.canvas.create_text((bx1 + bx2) // 2, by1 + 20, text=exit_text, font=("Arial", 14, "bold"))
-        
-        b_out, w_out = self._count_out()
-        exit_y = by1 + 50
-        piece_radius = 20
-        spacing = 30
-        max_visible = 7
-        
-        for i in range(min(b_out, max_visible)):
-            y = exit_y + i * spacing
-            cx = bx1 + 40
-            self.canvas.create_oval(cx - piece_radius, y, cx + piece_radius, y + piece_radius * 2, 
-                                   fill="#708090", outline="#000000", width=0.4)
-        
-        for i in range(min(w_out, max_visible)):
-            y = exit_y + i * spacing
-            cx = bx1 + 120
-            self.canvas.create_oval(cx - piece_radius, y, cx + piece_radius, y + piece_radius * 2, 
-                                   fill="#FFFAFA", outline="#000000", width=0.4)
-
-        if self.ui.expected_dest is not None:
-            cell = index_to_cell(self.ui.expected_dest)
-            x1 = PADDING + cell.col * CELL_SIZE
-            y1 = PADDING + cell.row * CELL_SIZE
-            x2 = x1 + CELL_SIZE
-            y2 = y1 + CELL_SIZE
-            self.canvas.create_rectangle(x1 + 3, y1 + 3, x2 - 3, y2 - 3, outline="#90EE90", width=4)
-
-        self._draw_pieces(Player.BLACK, self.state.black)
-        self._draw_pieces(Player.WHITE, self.state.white)
+
+        selected = None
+        if self.ui.selected_piece is not None and self.state.turn == self.ui.human_player:
+            selected = ("b" if self.ui.human_player == Player.BLACK else "w", self.ui.selected_piece)
+        self.board.draw(self.state, highlights=(self.ui.ai_move_from, self.ui.ai_move_to), dest=self.ui.expected_dest,
+                        selected=selected, exit_available=exit_available)
 
         turn_text = "White's turn" if self.state.turn == Player.WHITE else "Black's turn"
         self.lbl_turn.configure(text=turn_text)
@@ -455,8 +381,7 @@ class SenetTkUI:
 
         self.lbl_ai_nodes.configure(text=f"Nodes: {self.ui.last_ai_nodes}")
 
-        if is_terminal(self.state):
-            self._draw_game_over_overlay()
+        self._draw_game_over_overlay()
 
         if self.state.turn == self.ui.human_player and self.ui.roll is not None:
             mvs = legal_moves(self.state, self.ui.roll)
@@ -494,34 +419,26 @@ class SenetTkUI:
         else:
             self.sticks_canvas.configure(cursor="arrow")
 
-    def _draw_pieces(self, player: Player, positions: tuple[int, ...]):
-        for pid, pos in enumerate(positions):
-            if pos == OUT:
-                continue
-            cell = index_to_cell(pos)
-            cx = PADDING + cell.col * CELL_SIZE + CELL_SIZE // 2
-            cy = PADDING + cell.row * CELL_SIZE + CELL_SIZE // 2
-
-            r = 25
-            if player == Player.WHITE:
-                fill = "#FFFAFA"
-                outline = "#000000"
-                outline_width = 1
-            else:
-                fill = "#708090"
-                outline = "#000000"
-                outline_width = 0.5
-
-            if self.ui.selected_piece == pid and self.state.turn == self.ui.human_player and player == self.ui.human_player:
-                self.canvas.create_oval(cx - (r + 6), cy - (r + 6), cx + (r + 6), cy + (r + 6), outline="#90EE90", width=4)
-
-            self.canvas.create_oval(cx - r, cy - r, cx + r, cy + r, fill=fill, outline=outline, width=outline_width)
+    def _replay_frame(self):
+        # Once per frame: jump to the ply due by now and draw that, however
+        # many plies it skips, so fast replays cost one redraw per frame.
+        ply = min(int((time.perf_counter() - self._replay_start) * self._replay_pps), len(self._replay) - 1)
+        if self._replay[ply] is not self.state:
+            self.state = self._replay[ply]
+            self._render_all()
+        if ply < len(self._replay) - 1:
+            self.root.after(FRAME_MS, self._replay_frame)
+        else:
+            self._set_status(f"Replay finished: {len(self._replay) - 1} plies")
 
     def on_toss(self):
-        if is_terminal(self.state):
+        if is_terminal(self.state) or self._replay is not None:
             return
 
         if self.state.turn != self.ui.human_player:
+            if self.search is None and self.ui.roll is not None:
+                self._ai_play()  # retry after a failed search
+                return
             self._set_status("Cannot roll now. It's AI's turn.", error=True)
             return
 
@@ -539,10 +456,13 @@ class SenetTkUI:
     
     def on_sticks_click(self, event):
         """Click on sticks area to roll"""
-        if is_terminal(self.state):
+        if is_terminal(self.state) or self._replay is not None:
             return
         
         if self.state.turn != self.ui.human_player:
+            if self.search is None and self.ui.roll is not None:
+                self._ai_play()  # retry after a failed search
+                return
             self._set_status("Cannot roll now. It's AI's turn.", error=True)
             return
 
@@ -621,14 +541,49 @@ class SenetTkUI:
 
         search_depth = self.depth_var.get()
 
-        mv, val, stats = choose_best_move_given_roll(self.state, AI_PLAYER, search_depth, roll, self.ui.print_algorithm_info)
+        if self.search is None:
+            self.search = self._new_search()
+        self.search.start(self.state, AI_PLAYER, roll, search_depth, self.ui.print_algorithm_info)
+        self.btn_move_now.configure(state=tk.NORMAL)
+        self.root.after(AI_POLL_MS, lambda: self._poll_ai(roll, search_depth))
+
+    def _poll_ai(self, roll: int, search_depth: int):
+        if not self.search.done():
+            self._spinner_frame = (self._spinner_frame + 1) % len(SPINNER_FRAMES)
+            self.lbl_spinner.configure(text=SPINNER_FRAMES[self._spinner_frame])
+            self.lbl_ai_nodes.configure(text=f"Nodes: {self.search.nodes()}")
+            self.root.after(AI_POLL_MS, lambda: self._poll_ai(roll, search_depth))
+            return
+
+        self.lbl_spinner.configure(text="")
+        self.btn_move_now.configure(state=tk.DISABLED)
+        try:
+            mv, val, stats = self.search.result()
+        except Exception as e:
+            # The worker may be gone; the next try starts a fresh one.
+            self.search.shutdown()
+            self.search = None
+            self.lbl_ai_nodes.configure(text="Nodes: 0")
+            self.msg.configure(text=f"AI search failed: {e}. Click the sticks to retry.", fg="red")
+            return
+        self._finish_ai_search(mv, val, stats, roll, search_depth)
+
+    def on_move_now(self):
+        if self.search is not None and self.search.running():
+            self.search.move_now()
 
+    def _on_close(self):
+        if self.search is not None:
+            self.search.shutdown()
+        self.root.destroy()
+
+    def _finish_ai_search(self, mv: Move | None, val: float, stats, roll: int, search_depth: int):
         self.ui.last_ai_nodes = stats.nodes
         
         # Print algorithm information if requested
         if self.ui.print_algorithm_info:
             print("\n" + "="*80)
-            print(f"AI MOVE - Roll: {roll}, Depth: {search_depth}")
+            print(f"AI MOVE - Roll: {roll}, Depth: {stats.depth_reached}/{search_depth}")
             print("="*80)
             print(f"Nodes explored: {stats.nodes}")
             print(f"Leaf nodes: {stats.leafs}")
@@ -641,6 +596,11 @@ class SenetTkUI:
             print("\n--- Search Tree ---")
             for info in stats.tree_info:
                 print(info)
+            if stats.trace is not None:
+                for line in format_trace(stats.trace.records()):
+                    print(line)
+                if stats.trace.dropped:
+                    print(f"... {stats.trace.dropped} more records not kept")
             print("="*80 + "\n")
 
         if mv is None:
@@ -894,3 +854,30 @@ class SenetTkUI:
 
     def run(self):
         self.root.mainloop()
+
+
+def build_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="python -m ui.tkinter_ui", description="Play Senet against the AI")
+    parser.add_argument("--engine", default="expectiminimax", help="ai.worker engine: expectiminimax or mcts")
+    parser.add_argument("--book", default=None, help="opening book file for the AI")
+    parser.add_argument("--replay", default=None, metavar="ARCHIVE", help="watch a game from a game.record archive")
+    parser.add_argument("--game", type=int, default=0, help="with --replay: the game to watch")
+    parser.add_argument("--plies-per-second", type=float, default=REPLAY_PLIES_PER_SECOND)
+    return parser
+
+
+def run(args) -> int:
+    replay = None
+    if args.replay:
+        with GameArchive(args.replay) as archive:
+            replay = list(archive[args.game].states())
+    SenetTkUI(args.engine, replay=replay, plies_per_second=args.plies_per_second, book=args.book).run()
+    return 0
+
+
+def main(argv=None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())